@@ -0,0 +1,59 @@
+"""Stored remaining_amount with partial queue indexes.
+
+Adds `remaining_amount` to `charity_project` and `donation`, backfills
+it in id batches (each batch committed separately, so a large table
+isn't locked for the whole run), then makes it NOT NULL and creates
+the partial indexes on (create_date, id) WHERE remaining_amount > 0.
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = '0002_remaining_amount'
+down_revision = '0001_initial'
+branch_labels = None
+depends_on = None
+
+TABLES = ('charity_project', 'donation')
+BATCH_SIZE = 10000
+
+
+def backfill(table):
+    bind = op.get_bind()
+    last_id = bind.execute(
+        sa.text(f'SELECT MAX(id) FROM {table}')
+    ).scalar() or 0
+    for start in range(0, last_id, BATCH_SIZE):
+        with op.get_context().autocommit_block():
+            bind.execute(
+                sa.text(
+                    f'UPDATE {table} SET remaining_amount = CASE '
+                    'WHEN fully_invested THEN 0 '
+                    'ELSE full_amount - invested_amount END '
+                    'WHERE id > :start AND id <= :end'
+                ),
+                {'start': start, 'end': start + BATCH_SIZE},
+            )
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(
+            table, sa.Column('remaining_amount', sa.Integer(), nullable=True)
+        )
+        backfill(table)
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column('remaining_amount', nullable=False)
+        op.create_index(
+            f'ix_{table}_queue',
+            table,
+            ['create_date', 'id'],
+            sqlite_where=sa.text('remaining_amount > 0'),
+            postgresql_where=sa.text('remaining_amount > 0'),
+        )
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_queue', table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column('remaining_amount')
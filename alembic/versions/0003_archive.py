@@ -0,0 +1,122 @@
+"""Archive tables and ids that are never reused.
+
+Creates `charity_project_archive` and `donation_archive`. On SQLite,
+rebuilds `charity_project` and `donation` as AUTOINCREMENT tables:
+a plain rowid table hands out max(id) + 1 again once the newest rows
+were moved to the archive, and the next archiving run would collide
+with the archived row. SQLite doesn't reflect the WHERE of partial
+indexes, so those are dropped with the old tables and created again.
+Adds the partial index on `charity_project.close_date` the archiving
+job scans.
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = '0003_archive'
+down_revision = '0002_remaining_amount'
+branch_labels = None
+depends_on = None
+
+TABLES = ('charity_project', 'donation')
+PROJECT_NAME_MAX_LEN = 100
+
+FULLY_INVESTED = sa.column('fully_invested').is_(True)
+REMAINING = sa.text('remaining_amount > 0')
+# (table, name, columns, where)
+PARTIAL_INDEXES = (
+    ('charity_project', 'ix_charity_project_closed',
+     ['create_date', 'close_date'], FULLY_INVESTED),
+    ('charity_project', 'ix_charity_project_queue',
+     ['create_date', 'id'], REMAINING),
+    ('donation', 'ix_donation_closed', ['close_date'], FULLY_INVESTED),
+    ('donation', 'ix_donation_queue', ['create_date', 'id'], REMAINING),
+)
+CLOSE_DATE_INDEX = (
+    'charity_project', 'ix_charity_project_close_date',
+    ['close_date'], FULLY_INVESTED,
+)
+
+
+def archive_columns(*own_columns):
+    """Columns of an archive table, in the order of its model."""
+    return [
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        *own_columns,
+        sa.Column('full_amount', sa.Integer(), nullable=False),
+        sa.Column('invested_amount', sa.Integer(), nullable=False),
+        sa.Column('fully_invested', sa.Boolean(), nullable=False),
+        sa.Column('remaining_amount', sa.Integer(), nullable=False),
+        sa.Column('create_date', sa.DateTime(), nullable=False),
+        sa.Column('close_date', sa.DateTime(), nullable=True),
+        sa.Column('change_seq', sa.BigInteger(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    ]
+
+
+def create_partial_index(table, name, columns, where):
+    op.create_index(
+        name, table, columns,
+        sqlite_where=where, postgresql_where=where,
+    )
+
+
+def rebuild_with_autoincrement(table):
+    existing = {
+        index['name']
+        for index in sa.inspect(op.get_bind()).get_indexes(table)
+    }
+    with op.batch_alter_table(
+        table,
+        recreate='always',
+        table_kwargs={'sqlite_autoincrement': True},
+    ) as batch:
+        for index_table, name, _, _ in PARTIAL_INDEXES:
+            if index_table == table and name in existing:
+                batch.drop_index(name)
+    # The copied rows seed sqlite_sequence with the current max(id)
+
+
+def upgrade():
+    op.create_table(
+        'charity_project_archive',
+        *archive_columns(
+            sa.Column(
+                'name', sa.String(PROJECT_NAME_MAX_LEN), nullable=False
+            ),
+            sa.Column('description', sa.Text(), nullable=False),
+        ),
+    )
+    op.create_index(
+        'ix_charity_project_archive_name', 'charity_project_archive',
+        ['name'], unique=True,
+    )
+    op.create_table(
+        'donation_archive',
+        *archive_columns(
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('comment', sa.Text(), nullable=True),
+        ),
+    )
+    op.create_index(
+        'ix_donation_archive_user_id', 'donation_archive', ['user_id'],
+    )
+    if op.get_bind().dialect.name == 'sqlite':
+        for table in TABLES:
+            rebuild_with_autoincrement(table)
+        for index in PARTIAL_INDEXES:
+            create_partial_index(*index)
+    create_partial_index(*CLOSE_DATE_INDEX)
+
+
+def downgrade():
+    # The tables stay AUTOINCREMENT: harmless, and ids must not be
+    # reused while archived rows may still exist elsewhere
+    op.drop_index(CLOSE_DATE_INDEX[1], table_name=CLOSE_DATE_INDEX[0])
+    op.drop_index('ix_donation_archive_user_id', table_name='donation_archive')
+    op.drop_table('donation_archive')
+    op.drop_index(
+        'ix_charity_project_archive_name',
+        table_name='charity_project_archive',
+    )
+    op.drop_table('charity_project_archive')
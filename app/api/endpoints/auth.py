@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_async_session
 from app.core.security import (
     create_access_token,
     get_password_hash,
+    password_needs_rehash,
     verify_password,
 )
 from app.core.constants import MIN_PASSWORD_LEN
@@ -15,6 +17,30 @@ from app.schemas.user import Token, UserCreate, UserLogin, UserRead
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+async def rehash_password(
+    session: AsyncSession,
+    user_id: int,
+    password: str,
+    old_hash: str,
+) -> None:
+    """Re-hash a password stored with an outdated bcrypt cost.
+
+    Runs as a background task after the login response is sent, reusing
+    the request session (it is closed only after background tasks).
+    The update is skipped if the hash changed meanwhile.
+    """
+    new_hash = await run_in_threadpool(get_password_hash, password)
+    await session.execute(
+        update(AuthUser)
+        .where(
+            AuthUser.id == user_id,
+            AuthUser.hashed_password == old_hash,
+        )
+        .values(hashed_password=new_hash)
+    )
+    await session.commit()
+
+
 @router.post(
     "/register",
     response_model=UserRead,
@@ -61,6 +87,7 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     user_in: UserLogin,
+    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_async_session),
 ) -> Token:
     res = await session.execute(
@@ -75,5 +102,13 @@ async def login(
             status_code=400,
             detail="Incorrect email or password"
         )
+    if password_needs_rehash(user.hashed_password):
+        background_tasks.add_task(
+            rehash_password,
+            session,
+            user.id,
+            user_in.password,
+            user.hashed_password,
+        )
     token = create_access_token({"sub": str(user.id)})
     return Token(access_token=token)
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.constants import CHANGES_DEFAULT_LIMIT, CHANGES_MAX_LIMIT
+from app.core.db import get_read_session
+from app.core.user import current_superuser
+from app.crud.change_feed import UPSERT, get_changes
+from app.schemas.change_feed import ChangeRead, ChangesRead
+from app.schemas.charity_project import CharityProjectRead
+from app.schemas.donation import DonationAdminRead
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+READ_SCHEMAS = {
+    "charity_project": CharityProjectRead,
+    "donation": DonationAdminRead,
+}
+
+
+@router.get("/", response_model=ChangesRead)
+async def get_change_feed(
+    since: int = Query(0, ge=0),
+    limit: int = Query(
+        CHANGES_DEFAULT_LIMIT, gt=0, le=CHANGES_MAX_LIMIT
+    ),
+    session: AsyncSession = Depends(get_read_session),
+    superuser=Depends(current_superuser),
+):
+    """Изменения проектов и донатов после курсора `since`.
+
+    - Доступ: только суперюзер
+    - Порядок: по `seq` (глобальный номер изменения); строка, менявшаяся
+      несколько раз, приходит один раз в последнем состоянии
+    - Удаления приходят с `op = "delete"` и без `data`
+    - Следующая страница: `since = next_since`, пока `has_more`
+    """
+    changes = await get_changes(session, since, limit + 1)
+    page = [
+        ChangeRead(
+            seq=change.seq,
+            entity=change.entity,
+            op=change.op,
+            id=change.id,
+            data=(
+                READ_SCHEMAS[change.entity].from_orm(change.obj)
+                if change.op == UPSERT else None
+            ),
+        )
+        for change in changes[:limit]
+    ]
+    await session.close()
+    return ChangesRead(
+        changes=page,
+        next_since=page[-1].seq if page else since,
+        has_more=len(changes) > limit,
+    )
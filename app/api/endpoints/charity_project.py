@@ -1,18 +1,38 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_async_session
+from app.api.fields import FieldSelector, Fields, sparse_response
+from app.api.params import id_list
+from app.core.constants import IDEMPOTENCY_KEY_MAX_LEN
+from app.core.db import get_async_session, get_read_session
 from app.core.user import current_superuser
 from app.models.charity_project import CharityProject
 from app.schemas.charity_project import (
+    CharityProjectBatchRead,
     CharityProjectCreate,
     CharityProjectRead,
+    CharityProjectSpeedRead,
     CharityProjectUpdate,
 )
+from app.services.accounting import (
+    record_project_closed,
+    record_project_created,
+    record_project_removed,
+)
+from app.services.idempotency import idempotent
 from app.services.investment import allocate_donations_to_project
+from app.services.progress import progress_broker, progress_events
+from app.services.reports import (
+    fundraising_speed_csv,
+    fundraising_speed_rows,
+)
+from app.crud.archive import (
+    get_many_with_archive, merge_by_id, project_archive_crud,
+)
 from app.crud.charity_project import charity_project_crud
 from app.crud.donation import donation_crud
 
@@ -26,6 +46,9 @@ async def get_project_or_404(
     project: Optional[CharityProject] = await charity_project_crud.get(
         session, project_id
     )
+    if not project:
+        # Archived projects are closed: found, but not editable
+        project = await project_archive_crud.get(session, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -39,7 +62,10 @@ async def ensure_unique_project_name(
     name: str,
     exclude_id: Optional[int] = None,
 ) -> None:
-    existing = await charity_project_crud.get_by_name(session, name)
+    existing = (
+        await charity_project_crud.get_by_name(session, name) or
+        await project_archive_crud.get_by_name(session, name)
+    )
     if existing and (exclude_id is None or existing.id != exclude_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -77,6 +103,7 @@ def apply_full_amount_update(
                 detail="full_amount can't be less than invested_amount",
             )
         project.full_amount = new_full
+        project.remaining_amount = new_full - project.invested_amount
         # Close if fully invested after change
         if (
             project.invested_amount >= project.full_amount and not
@@ -88,19 +115,103 @@ def apply_full_amount_update(
 
 @router.get("/", response_model=List[CharityProjectRead])
 async def get_projects(
-    session: AsyncSession = Depends(get_async_session),
+    include_archived: bool = False,
+    fields: Fields = Depends(FieldSelector(CharityProjectRead)),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """Получить список всех благотворительных проектов.
 
     - Доступ: любой пользователь
     - Возвращает: полный список `CharityProjectRead`
+    - `include_archived=true` — вместе с перенесёнными в архив закрытыми
+      проектами (по возрастанию `id`)
+    - `fields=id,name,invested_amount,full_amount` — только эти поля;
+      остальные колонки (например, `description`) не читаются из БД
+    """
+    projects = await charity_project_crud.get_multi(session, columns=fields)
+    if include_archived:
+        projects = merge_by_id(
+            projects,
+            await project_archive_crud.get_multi(session, columns=fields),
+        )
+    # Return the connection to the pool before serialisation
+    await session.close()
+    if fields is not None:
+        return sparse_response(projects, fields)
+    return projects
+
+
+@router.get("/batch", response_model=CharityProjectBatchRead)
+async def get_projects_batch(
+    ids: List[int] = Depends(id_list),
+    include_archived: bool = False,
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Проекты по списку `id` одним запросом к БД.
+
+    - Доступ: любой пользователь
+    - `ids=1,2,3` (не больше 1000); порядок ответа — порядок `ids`,
+      повторы возвращаются один раз
+    - `missing` — запрошенные `id`, которых нет
+    - `include_archived=true` — искать и в архиве закрытых проектов
     """
-    return await charity_project_crud.get_multi(session)
+    if include_archived:
+        projects, missing = await get_many_with_archive(
+            session, charity_project_crud, project_archive_crud, ids
+        )
+    else:
+        projects, missing = await charity_project_crud.get_many(session, ids)
+    await session.close()
+    return CharityProjectBatchRead(items=projects, missing=missing)
+
+
+@router.get("/report", response_model=List[CharityProjectSpeedRead])
+async def get_fundraising_speed_report(
+    limit: Optional[int] = Query(None, gt=0),
+    format: Literal["json", "csv"] = "json",
+    session: AsyncSession = Depends(get_read_session),
+    superuser=Depends(current_superuser),
+):
+    """Закрытые проекты, отсортированные по скорости сбора средств.
+
+    - Доступ: только суперюзер
+    - `duration_seconds` = `close_date - create_date`, считается в SQL
+    - `limit` — топ-N самых быстрых; `format=csv` — потоковый CSV
+    - Результат кешируется, пока не изменится число закрытых проектов
+      в `fund_stats` (проверяется перед каждым ответом)
+    """
+    if format == "csv":
+        return StreamingResponse(
+            fundraising_speed_csv(session, limit),
+            media_type="text/csv",
+        )
+    return [row async for row in fundraising_speed_rows(session, limit)]
+
+
+@router.get("/stream")
+async def stream_project_progress():
+    """Поток изменений сбора средств по проектам (Server-Sent Events).
+
+    - Доступ: любой пользователь
+    - Событие `progress`: `{"id", "invested_amount", "fully_invested"}`
+      после каждого коммита, изменившего проект
+    - Событие `reset`: клиент не успевал читать и отключён — нужно
+      перечитать `GET /charity_project/` и переподключиться
+    - Не использует соединение с БД
+    """
+    return StreamingResponse(
+        progress_events(progress_broker),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/", response_model=CharityProjectRead)
 async def create_project(
     project_in: CharityProjectCreate,
+    idempotency_key: Optional[str] = Header(
+        None, max_length=IDEMPOTENCY_KEY_MAX_LEN
+    ),
     session: AsyncSession = Depends(get_async_session),
     superuser=Depends(current_superuser),
 ):
@@ -109,32 +220,42 @@ async def create_project(
     - Доступ: только суперюзер
     - Проверки: уникальность имени, валидность `full_amount`
     - Инвестиции: сразу после создания распределяются открытые донаты
+    - `Idempotency-Key`: повтор с тем же ключом возвращает сохранённый
+      ответ, а не ошибку уникальности имени
 
     Примечание: коммит выполняется один раз — после расчётов инвестирования.
     """
-    # Unique name check
-    await ensure_unique_project_name(session, project_in.name)
-
-    project = await charity_project_crud.create(
-        session,
-        {
-            "name": project_in.name,
-            "description": project_in.description,
-            "full_amount": project_in.full_amount,
-        },
-        commit=False,
-        refresh=False,
-    )
-
-    # Allocate existing donations to this new project
-    donations = await donation_crud.get_open_ordered(session)
-    allocate_donations_to_project(project, donations)
-    # Persist possible changes after allocation
-    project = await charity_project_crud.update(
-        session, project, {}, commit=True, refresh=True
-    )
+    async with idempotent(
+        session, f"charity_project:{superuser.id}", idempotency_key,
+        project_in,
+    ) as call:
+        if call.replay is not None:
+            return call.replay
+        # Unique name check
+        await ensure_unique_project_name(session, project_in.name)
+
+        project = await charity_project_crud.create(
+            session,
+            {
+                "name": project_in.name,
+                "description": project_in.description,
+                "full_amount": project_in.full_amount,
+            },
+            commit=False,
+            refresh=False,
+        )
 
-    return project
+        # Allocate existing donations to this new project
+        donations = await donation_crud.get_open_ordered(session)
+        investments = allocate_donations_to_project(project, donations)
+        await session.flush()
+        await record_project_created(session, project, investments)
+        # Serialise before the single commit: no refresh (and no second
+        # pool checkout) is needed after it
+        response = CharityProjectRead.from_orm(project)
+        call.store(response)
+        await session.commit()
+        return response
 
 
 @router.patch("/{project_id}", response_model=CharityProjectRead)
@@ -177,13 +298,21 @@ async def update_project(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="full_amount can't be less than invested_amount",
             )
+        update_data["remaining_amount"] = new_full - project.invested_amount
         # If closing condition will be achieved after update
         if project.invested_amount >= new_full and not project.fully_invested:
             update_data["fully_invested"] = True
             update_data["close_date"] = datetime.now().replace(microsecond=0)
 
-    project = await charity_project_crud.update(session, project, update_data)
-    return project
+    project = await charity_project_crud.update(
+        session, project, update_data, commit=False
+    )
+    await session.flush()
+    if update_data.get("fully_invested"):
+        await record_project_closed(session, project)
+    response = CharityProjectRead.from_orm(project)
+    await session.commit()
+    return response
 
 
 @router.delete("/{project_id}", response_model=CharityProjectRead)
@@ -197,14 +326,7 @@ async def delete_project(
     - Доступ: только суперюзер
     - Нельзя удалить проект, если он закрыт или в него уже внесены средства
     """
-    project: Optional[CharityProject] = await charity_project_crud.get(
-        session, project_id
-    )
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
+    project = await get_project_or_404(session, project_id)
 
     if project.fully_invested or project.invested_amount > 0:
         raise HTTPException(
@@ -212,5 +334,5 @@ async def delete_project(
             detail="Can't delete invested/closed project"
         )
 
-    deleted = await charity_project_crud.remove(session, project.id)
-    return deleted
+    await record_project_removed(session, project)
+    return await charity_project_crud.delete(session, project)
@@ -1,17 +1,32 @@
-from typing import List
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_async_session
+from app.core.constants import IDEMPOTENCY_KEY_MAX_LEN
+from app.api.fields import FieldSelector, Fields, sparse_response
+from app.api.params import id_list
+from app.core.config import settings
+from app.core.db import get_async_session, get_read_session
 from app.core.user import current_superuser, current_user
 from app.schemas.donation import (
     DonationAdminRead,
+    DonationBatchRead,
     DonationCreate,
+    DonationImportRead,
     DonationRead,
+    DonorSummaryRead,
 )
+from app.services.accounting import record_donation_created
+from app.services.donation_import import CSV, NDJSON, RowError
+from app.services.donation_import import import_donations
+from app.services.idempotency import idempotent
 from app.services.investment import allocate_projects_for_donation
+from app.crud.archive import (
+    donation_archive_crud, get_many_with_archive, merge_by_id,
+)
 from app.crud.donation import donation_crud
+from app.crud.donor_summary import donor_summary_crud
 from app.crud.charity_project import charity_project_crud
 
 router = APIRouter(prefix="/donation", tags=["donation"])
@@ -20,6 +35,9 @@ router = APIRouter(prefix="/donation", tags=["donation"])
 @router.post("/", response_model=DonationRead)
 async def create_donation(
     donation_in: DonationCreate,
+    idempotency_key: Optional[str] = Header(
+        None, max_length=IDEMPOTENCY_KEY_MAX_LEN
+    ),
     session: AsyncSession = Depends(get_async_session),
     user=Depends(current_user),
 ):
@@ -27,47 +45,177 @@ async def create_donation(
 
     - Доступ: авторизованный пользователь
     - Инвестиции: после создания средства распределяются по открытым проектам
+    - `Idempotency-Key`: повтор запроса с тем же ключом возвращает
+      сохранённый ответ (заголовок `Idempotent-Replayed: true`) без
+      нового доната; тот же ключ с другим телом — 422
     """
-    donation = await donation_crud.create(
-        session,
-        {
-            "user_id": user.id,
-            "comment": donation_in.comment,
-            "full_amount": donation_in.full_amount,
-        },
-        commit=False,
-        refresh=False,
-    )
+    async with idempotent(
+        session, f"donation:{user.id}", idempotency_key, donation_in
+    ) as call:
+        if call.replay is not None:
+            return call.replay
+        donation = await donation_crud.create(
+            session,
+            {
+                "user_id": user.id,
+                "comment": donation_in.comment,
+                "full_amount": donation_in.full_amount,
+            },
+            commit=False,
+            refresh=False,
+        )
 
-    projects = await charity_project_crud.get_open_ordered(session)
-    allocate_projects_for_donation(donation, projects)
-    # Persist potential updates after allocation
-    donation = await donation_crud.update(
-        session, donation, {}, commit=True, refresh=True
-    )
+        projects = await charity_project_crud.get_open_ordered(session)
+        investments = allocate_projects_for_donation(donation, projects)
+        await session.flush()
+        await record_donation_created(session, donation, investments)
+        # Serialise before the single commit: no refresh (and no second
+        # pool checkout) is needed after it
+        response = DonationRead.from_orm(donation)
+        call.store(response)
+        await session.commit()
+        return response
+
+
+@router.post(
+    "/import",
+    response_model=DonationImportRead,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/x-ndjson": {"schema": {"type": "string"}},
+        "text/csv": {"schema": {"type": "string"}},
+    }}},
+)
+async def import_donation_file(
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = None,
+    session: AsyncSession = Depends(get_async_session),
+    superuser=Depends(current_superuser),
+):
+    """Массовый импорт донатов офлайн-кампаний (NDJSON или CSV).
 
-    return donation
+    - Доступ: только суперюзер
+    - Формат: `format=ndjson|csv`, по умолчанию по `Content-Type`
+      (`text/csv` — CSV с заголовком, иначе NDJSON)
+    - Строка: `full_amount`, `comment`, `user_id` (по умолчанию — id
+      импортирующего, должен быть зарегистрированным пользователем);
+      проверки как у `POST /donation/`
+    - Тело читается потоково; донаты вставляются и распределяются
+      по открытым проектам пачками по `IMPORT_BATCH_SIZE`, каждая
+      пачка — отдельная транзакция
+    - Ошибочные строки пропускаются и перечисляются в `errors` (номер
+      строки и причина, первые 100), их общее число — `failed`
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = CSV if content_type.startswith("text/csv") else NDJSON
+    try:
+        return await import_donations(
+            session,
+            request.stream(),
+            format,
+            default_user_id=superuser.id,
+            batch_size=settings.import_batch_size,
+        )
+    except RowError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(error)
+        )
 
 
 @router.get("/my", response_model=List[DonationRead])
 async def get_my_donations(
-    session: AsyncSession = Depends(get_async_session),
+    include_archived: bool = False,
+    fields: Fields = Depends(FieldSelector(DonationRead)),
+    session: AsyncSession = Depends(get_read_session),
     user=Depends(current_user),
 ):
     """Список донатов текущего пользователя.
 
     - Доступ: авторизованный пользователь
+    - `include_archived=true` — вместе с перенесёнными в архив
+      инвестированными донатами
+    - `fields=id,full_amount` — только эти поля (`comment` без запроса
+      не читается из БД)
+    """
+    donations = await donation_crud.get_by_user(
+        session, user.id, columns=fields
+    )
+    if include_archived:
+        donations = merge_by_id(
+            donations,
+            await donation_archive_crud.get_by_user(
+                session, user.id, columns=fields
+            ),
+        )
+    # Return the connection to the pool before serialisation
+    await session.close()
+    if fields is not None:
+        return sparse_response(donations, fields)
+    return donations
+
+
+@router.get("/my/summary", response_model=DonorSummaryRead)
+async def get_my_donation_summary(
+    session: AsyncSession = Depends(get_read_session),
+    user=Depends(current_user),
+):
+    """Сводка по донатам текущего пользователя.
+
+    - Доступ: авторизованный пользователь
+    - Возвращает: число донатов, сумму, инвестированную сумму и дату
+      последнего доната (одна строка по первичному ключу)
     """
-    return await donation_crud.get_by_user(session, user.id)
+    summary = await donor_summary_crud.get_by_user(session, user.id)
+    await session.close()
+    if summary is None:
+        return DonorSummaryRead()
+    return summary
 
 
 @router.get("/", response_model=List[DonationAdminRead])
 async def get_all_donations(
-    session: AsyncSession = Depends(get_async_session),
+    include_archived: bool = False,
+    fields: Fields = Depends(FieldSelector(DonationAdminRead)),
+    session: AsyncSession = Depends(get_read_session),
     superuser=Depends(current_superuser),
 ):
     """Список всех донатов (для администраторов).
 
     - Доступ: только суперюзер
+    - `include_archived=true` — вместе с архивом
+    - `fields=id,user_id,full_amount` — только эти поля
+    """
+    donations = await donation_crud.get_multi(session, columns=fields)
+    if include_archived:
+        donations = merge_by_id(
+            donations,
+            await donation_archive_crud.get_multi(session, columns=fields),
+        )
+    await session.close()
+    if fields is not None:
+        return sparse_response(donations, fields)
+    return donations
+
+
+@router.get("/batch", response_model=DonationBatchRead)
+async def get_donations_batch(
+    ids: List[int] = Depends(id_list),
+    include_archived: bool = False,
+    session: AsyncSession = Depends(get_read_session),
+    superuser=Depends(current_superuser),
+):
+    """Донаты по списку `id` (для администраторов).
+
+    - Доступ: только суперюзер
+    - `ids=1,2,3` (не больше 1000); порядок ответа — порядок `ids`
+    - `missing` — запрошенные `id`, которых нет
+    - `include_archived=true` — искать и в архиве
     """
-    return await donation_crud.get_multi(session)
+    if include_archived:
+        donations, missing = await get_many_with_archive(
+            session, donation_crud, donation_archive_crud, ids
+        )
+    else:
+        donations, missing = await donation_crud.get_many(session, ids)
+    await session.close()
+    return DonationBatchRead(items=donations, missing=missing)
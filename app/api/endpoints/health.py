@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Request, Response, status
+
+from app.schemas.health import WarmupRead
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def liveness():
+    """Процесс жив и обрабатывает запросы.
+
+    - Доступ: любой пользователь
+    - Не обращается к БД
+    """
+    return {"status": "ok"}
+
+
+@router.get(
+    "/ready",
+    response_model=WarmupRead,
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": WarmupRead}},
+)
+async def readiness(request: Request, response: Response):
+    """Готовность принимать трафик: прогрев при старте завершён.
+
+    - Доступ: любой пользователь
+    - 503, пока идёт прогрев (`WARMUP_ENABLED=true`); в ответе — время
+      прогрева по шагам
+    """
+    state = request.app.state.warmup
+    if not state.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return state.report()
@@ -0,0 +1,93 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.core.user import current_superuser
+from app.schemas.memory import (
+    AllocationTopRead,
+    MemoryRead,
+    TracemallocStatus,
+)
+from app.services.memory import allocation_tracer, memory_report
+
+router = APIRouter(
+    prefix="/memory",
+    tags=["memory"],
+    dependencies=[Depends(current_superuser)],
+)
+
+
+def ensure_tracing() -> None:
+    if not allocation_tracer.tracing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="tracemalloc is not running",
+        )
+
+
+@router.get("/", response_model=MemoryRead)
+def get_memory():
+    """Память текущего процесса-воркера.
+
+    - Доступ: только суперюзер
+    - RSS, число объектов под сборщиком мусора, живые ORM-объекты по
+      моделям, открытые сессии и размер их identity map, размеры
+      кешей приложения, состояние tracemalloc
+    - Обходит все объекты процесса: для диагностики, не для мониторинга
+    """
+    return memory_report()
+
+
+@router.post("/tracemalloc/start", response_model=TracemallocStatus)
+def start_tracemalloc(frames: int = Query(1, ge=1, le=50)):
+    """Включить tracemalloc (`frames` — глубина стека мест выделения).
+
+    - Доступ: только суперюзер
+    - Пока включён, выделения памяти медленнее; базовый снимок
+      сбрасывается
+    """
+    allocation_tracer.start(frames)
+    return allocation_tracer.status()
+
+
+@router.post("/tracemalloc/stop", response_model=TracemallocStatus)
+def stop_tracemalloc():
+    """Выключить tracemalloc и забыть базовый снимок.
+
+    - Доступ: только суперюзер
+    """
+    allocation_tracer.stop()
+    return allocation_tracer.status()
+
+
+@router.post("/tracemalloc/snapshot", response_model=TracemallocStatus)
+def save_tracemalloc_snapshot():
+    """Сохранить базовый снимок для сравнения в `/tracemalloc/top`.
+
+    - Доступ: только суперюзер
+    - 409, если tracemalloc не включён
+    """
+    ensure_tracing()
+    allocation_tracer.save_baseline()
+    return allocation_tracer.status()
+
+
+@router.get("/tracemalloc/top", response_model=AllocationTopRead)
+def get_allocation_top(
+    limit: int = Query(20, ge=1, le=500),
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+    compare: bool = False,
+):
+    """Крупнейшие места выделения памяти.
+
+    - Доступ: только суперюзер
+    - `compare=true` — рост с базового снимка (`size_diff`,
+      `count_diff`), по убыванию роста
+    - 409, если tracemalloc не включён
+    """
+    ensure_tracing()
+    compared = compare and allocation_tracer.baseline is not None
+    return AllocationTopRead(
+        compared=compared,
+        sites=allocation_tracer.top(limit, group_by, compared),
+    )
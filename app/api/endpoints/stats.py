@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import List, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_async_session, get_read_session
+from app.core.user import current_superuser
+from app.crud.donation_rollup import donation_rollup_crud
+from app.crud.donor_summary import donor_summary_crud
+from app.crud.fund_stats import fund_stats_crud
+from app.crud.outbox import outbox_crud
+from app.schemas.donation import DonationRollupRead
+from app.schemas.fund_stats import FundStatsCheck, FundStatsRead
+from app.schemas.outbox import OutboxStatsRead
+from app.services.outbox import outbox_pool
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/", response_model=FundStatsRead)
+async def get_fund_stats(
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Сводная статистика фонда.
+
+    - Доступ: любой пользователь
+    - Читает одну строку, которую поддерживают операции записи
+    """
+    stats = await fund_stats_crud.read(session)
+    await session.close()
+    return stats
+
+
+@router.get("/check", response_model=FundStatsCheck)
+async def check_fund_stats(
+    session: AsyncSession = Depends(get_async_session),
+    superuser=Depends(current_superuser),
+):
+    """Сверить статистику с полным пересчётом по таблицам.
+
+    - Доступ: только суперюзер
+    """
+    mismatches = await fund_stats_crud.check(session)
+    return FundStatsCheck(consistent=not mismatches, mismatches=mismatches)
+
+
+@router.post("/rebuild", response_model=FundStatsRead)
+async def rebuild_fund_stats(
+    session: AsyncSession = Depends(get_async_session),
+    superuser=Depends(current_superuser),
+):
+    """Пересчитать статистику по таблицам и сохранить.
+
+    - Доступ: только суперюзер
+    - Заодно пересчитывает сводки доноров (`/donation/my/summary`),
+      в том числе по донатам, сделанным до появления сводок
+    - Возвращает: статистику фонда
+    """
+    await donor_summary_crud.rebuild(session)
+    return await fund_stats_crud.rebuild(session)
+
+
+@router.get("/donations", response_model=List[DonationRollupRead])
+async def get_donation_rollups(
+    start: datetime,
+    end: datetime,
+    granularity: Literal["hour", "day"] = "day",
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Объём донатов по часам или дням за период `[start, end)`.
+
+    - Доступ: любой пользователь
+    - Отвечает только из предрасчитанной таблицы `donation_rollup`;
+      пустые интервалы в ответ не попадают
+    """
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="start must be earlier than end",
+        )
+    rollups = await donation_rollup_crud.get_range(
+        session, granularity, start, end
+    )
+    await session.close()
+    return rollups
+
+
+@router.get("/outbox", response_model=OutboxStatsRead)
+async def get_outbox_stats(
+    session: AsyncSession = Depends(get_async_session),
+    superuser=Depends(current_superuser),
+):
+    """Очередь фоновых событий (outbox) и метрики воркеров процесса.
+
+    - Доступ: только суперюзер
+    - `oldest_pending_age_seconds` — отставание доставки по базе,
+      `*_lag_seconds` — задержка от коммита до обработки в этом процессе
+    """
+    lag = await outbox_crud.get_lag(session)
+    await session.close()
+    oldest_age = None
+    if lag.oldest_pending_at is not None:
+        oldest_age = max(
+            (datetime.now() - lag.oldest_pending_at).total_seconds(), 0.0
+        )
+    return OutboxStatsRead(
+        workers=outbox_pool.workers,
+        running=outbox_pool.running,
+        pending=lag.pending,
+        oldest_pending_age_seconds=oldest_age,
+        **outbox_pool.metrics.snapshot(),
+    )
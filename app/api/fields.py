@@ -0,0 +1,56 @@
+"""Sparse fieldsets for list endpoints: `?fields=id,name,full_amount`.
+
+`FieldSelector(schema)` is a dependency that checks the requested
+fields against the endpoint's response schema. The endpoint then loads
+only those columns (`columns=` of the CRUD list queries) and serialises
+them with `sparse_response`, so large text such as `description` or
+`comment` is neither read from the database nor sent when not asked for.
+Without `?fields=` the endpoint responds as usual.
+"""
+from typing import Iterable, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Requested field names, or None for the full schema
+Fields = Optional[Tuple[str, ...]]
+
+
+class FieldSelector:
+    def __init__(self, schema: Type[BaseModel]):
+        self.schema = schema
+
+    def __call__(
+        self,
+        fields: Optional[str] = Query(
+            None,
+            description="Поля ответа через запятую, например `id,name`",
+        ),
+    ) -> Fields:
+        if fields is None:
+            return None
+        requested = tuple(dict.fromkeys(
+            name.strip() for name in fields.split(",") if name.strip()
+        ))
+        allowed = self.schema.__fields__
+        unknown = [name for name in requested if name not in allowed]
+        if not requested or unknown:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=(
+                    f"Unknown fields: {', '.join(unknown)}; "
+                    f"allowed: {', '.join(allowed)}"
+                ),
+            )
+        return requested
+
+
+def sparse_response(
+    objs: Iterable, fields: Tuple[str, ...]
+) -> JSONResponse:
+    """`fields` of each object, in the order they were requested."""
+    return JSONResponse(jsonable_encoder([
+        {name: getattr(obj, name) for name in fields} for obj in objs
+    ]))
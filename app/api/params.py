@@ -0,0 +1,29 @@
+from typing import List
+
+from fastapi import HTTPException, Query, status
+
+from app.core.constants import BATCH_MAX_IDS
+
+
+def id_list(
+    ids: List[str] = Query(
+        ...,
+        description="id через запятую (`ids=1,2,3`) или повтором параметра",
+    ),
+) -> List[int]:
+    """`?ids=` as a list of ints, at most BATCH_MAX_IDS of them."""
+    try:
+        parsed = [
+            int(part) for value in ids for part in value.split(",") if part
+        ]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ids must be integers",
+        )
+    if not parsed or len(parsed) > BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Pass from 1 to {BATCH_MAX_IDS} ids",
+        )
+    return parsed
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseSettings, Field
 
 
@@ -8,11 +10,50 @@ class Settings(BaseSettings):
     app_description: str = Field(
         'API сервиса благотворительного фонда QRKot', env='APP_DESCRIPTION'
     )
+    # Serve the checked-in openapi.json instead of generating the schema
+    openapi_static: bool = Field(False, env='OPENAPI_STATIC')
+    # Append every request to this JSONL file (load-test trace)
+    request_log_path: Optional[str] = Field(None, env='REQUEST_LOG_PATH')
+    # cProfile output of `?_profile=1` requests by superusers; unset
+    # (the default) or empty turns the switch off
+    profile_dir: Optional[str] = Field(None, env='PROFILE_DIR')
+    # Older profiles are deleted beyond this count; 0 keeps them all
+    profile_max_files: int = Field(100, env='PROFILE_MAX_FILES')
     # Default async SQLite URL to satisfy tests and local runs
     database_url: str = Field(
         'sqlite+aiosqlite:///./app.db',
         env='DATABASE_URL'
     )
+    # Optional read replica for read-only routes. After a write the
+    # client keeps reading from the primary for `primary_pin_seconds`
+    read_replica_url: Optional[str] = Field(None, env='DATABASE_READ_URL')
+    primary_pin_seconds: float = Field(5, env='PRIMARY_PIN_SECONDS')
+
+    # Startup warm-up (pool, hot statements, caches, bcrypt); until it has
+    # finished GET /health/ready answers 503. Connections default to
+    # pool_size
+    warmup_enabled: bool = Field(False, env='WARMUP_ENABLED')
+    warmup_pool_connections: Optional[int] = Field(
+        None, env='WARMUP_POOL_CONNECTIONS'
+    )
+    warmup_bcrypt: bool = Field(True, env='WARMUP_BCRYPT')
+
+    # Connection pool. For file-based SQLite a queue pool is used too, so
+    # per-connection PRAGMAs and the page cache survive between requests
+    pool_size: int = Field(5, env='POOL_SIZE')
+    pool_max_overflow: int = Field(10, env='POOL_MAX_OVERFLOW')
+    pool_timeout: int = Field(30, env='POOL_TIMEOUT')
+    pool_recycle: int = Field(-1, env='POOL_RECYCLE')
+    pool_pre_ping: bool = Field(False, env='POOL_PRE_PING')
+
+    # SQLite profile: PRAGMAs applied to every new connection
+    sqlite_tuning: bool = Field(True, env='SQLITE_TUNING')
+    sqlite_journal_mode: str = Field('WAL', env='SQLITE_JOURNAL_MODE')
+    sqlite_synchronous: str = Field('NORMAL', env='SQLITE_SYNCHRONOUS')
+    sqlite_busy_timeout_ms: int = Field(5000, env='SQLITE_BUSY_TIMEOUT_MS')
+    # Negative value is a size in KiB (SQLite convention)
+    sqlite_cache_size: int = Field(-64000, env='SQLITE_CACHE_SIZE')
+    sqlite_mmap_size: int = Field(256 * 1024 * 1024, env='SQLITE_MMAP_SIZE')
 
     # Auth settings
     secret_key: str = Field('insecure-dev-secret', env='SECRET_KEY')
@@ -22,6 +63,43 @@ class Settings(BaseSettings):
     )
     algorithm: str = Field('HS256', env='ALGORITHM')
 
+    # Password hashing: a fixed bcrypt cost, or calibration at startup
+    # that picks the highest cost fitting into the millisecond budget
+    bcrypt_rounds: Optional[int] = Field(None, env='BCRYPT_ROUNDS')
+    bcrypt_calibrate: bool = Field(False, env='BCRYPT_CALIBRATE')
+    bcrypt_budget_ms: int = Field(250, env='BCRYPT_BUDGET_MS')
+
+    # Transactional outbox workers (0: events are left to other
+    # processes; delivered ones are still purged)
+    outbox_workers: int = Field(1, env='OUTBOX_WORKERS')
+    outbox_batch_size: int = Field(100, env='OUTBOX_BATCH_SIZE')
+    outbox_poll_interval: float = Field(1.0, env='OUTBOX_POLL_INTERVAL')
+    outbox_lease_seconds: float = Field(30, env='OUTBOX_LEASE_SECONDS')
+    outbox_max_attempts: int = Field(10, env='OUTBOX_MAX_ATTEMPTS')
+    outbox_retry_seconds: float = Field(5, env='OUTBOX_RETRY_SECONDS')
+    outbox_retention_hours: float = Field(24, env='OUTBOX_RETENTION_HOURS')
+
+    # Live progress stream (SSE): per-subscriber buffer, keepalive
+    # comments for idle connections, optional cross-process relay
+    progress_queue_size: int = Field(64, env='PROGRESS_QUEUE_SIZE')
+    progress_keepalive_seconds: float = Field(
+        15, env='PROGRESS_KEEPALIVE_SECONDS'
+    )
+    progress_retry_ms: int = Field(3000, env='PROGRESS_RETRY_MS')
+    progress_relay_address: Optional[str] = Field(
+        None, env='PROGRESS_RELAY_ADDRESS'
+    )
+
+    # Responses stored for `Idempotency-Key` retries are kept this long
+    idempotency_ttl_hours: float = Field(24, env='IDEMPOTENCY_TTL_HOURS')
+
+    # Donations inserted and allocated per transaction by the bulk import
+    import_batch_size: int = Field(5000, env='IMPORT_BATCH_SIZE')
+
+    # Archiving of closed projects and donations into history tables
+    archive_after_days: int = Field(30, env='ARCHIVE_AFTER_DAYS')
+    archive_batch_size: int = Field(1000, env='ARCHIVE_BATCH_SIZE')
+
     class Config:
         env_file = '.env'
 
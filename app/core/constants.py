@@ -12,3 +12,39 @@ PROJECT_NAME_MAX_LEN: Final[int] = 100
 
 # Auth requirements
 MIN_PASSWORD_LEN: Final[int] = 3
+
+# Password hashing (bcrypt cost factor bounds used by calibration)
+BCRYPT_MIN_ROUNDS: Final[int] = 4
+BCRYPT_MAX_ROUNDS: Final[int] = 16
+
+# Donation rollups: supported time buckets
+ROLLUP_GRANULARITIES: Final[tuple] = ('hour', 'day')
+ROLLUP_GRANULARITY_MAX_LEN: Final[int] = 8
+
+# Transactional outbox
+OUTBOX_EVENT_TYPE_MAX_LEN: Final[int] = 32
+OUTBOX_LOCK_TOKEN_MAX_LEN: Final[int] = 32
+# Upper bound for the exponential retry delay of a failing event
+OUTBOX_MAX_RETRY_SECONDS: Final[int] = 3600
+
+# Change feed
+CHANGE_ENTITY_MAX_LEN: Final[int] = 32
+CHANGES_DEFAULT_LIMIT: Final[int] = 100
+CHANGES_MAX_LIMIT: Final[int] = 1000
+
+# Idempotency keys (`Idempotency-Key` header)
+IDEMPOTENCY_KEY_MAX_LEN: Final[int] = 255
+IDEMPOTENCY_SCOPE_MAX_LEN: Final[int] = 64
+IDEMPOTENCY_FINGERPRINT_LEN: Final[int] = 64
+
+# Bulk donation import
+IMPORT_MAX_ERRORS: Final[int] = 100
+IMPORT_MAX_LINE_BYTES: Final[int] = 64 * 1024
+
+# Multi-get by id list (`?ids=`)
+BATCH_MAX_IDS: Final[int] = 1000
+# Ids per `WHERE id IN (...)` query, well below SQLite's variable limit
+GET_MANY_CHUNK_SIZE: Final[int] = 500
+
+# Request log (`REQUEST_LOG_PATH`): larger bodies are not recorded
+REQUEST_LOG_MAX_BODY_BYTES: Final[int] = 64 * 1024
@@ -1,17 +1,128 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import time
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Depends, Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.memory import caches
+from app.core.replica import (
+    PIN_COOKIE, pin_cookie_max_age, pin_key, primary_pins,
+)
 
 # Base declarative class for SQLAlchemy models
 Base = declarative_base()
 
+
+def is_sqlite_url(url: str) -> bool:
+    return make_url(url).get_backend_name() == 'sqlite'
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Keyword arguments for `create_async_engine` built from settings."""
+    options: Dict[str, Any] = {
+        'future': True,
+        'echo': False,
+        'pool_pre_ping': settings.pool_pre_ping,
+        'pool_recycle': settings.pool_recycle,
+    }
+    parsed = make_url(url)
+    if parsed.get_backend_name() == 'sqlite':
+        if parsed.database in (None, '', ':memory:'):
+            # In-memory database lives in its single static connection
+            return options
+        # aiosqlite defaults to NullPool: a new connection (and a cold
+        # page cache) for every checkout
+        options['poolclass'] = AsyncAdaptedQueuePool
+    options.update(
+        pool_size=settings.pool_size,
+        max_overflow=settings.pool_max_overflow,
+        pool_timeout=settings.pool_timeout,
+    )
+    return options
+
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    return {
+        'journal_mode': settings.sqlite_journal_mode,
+        'synchronous': settings.sqlite_synchronous,
+        'busy_timeout': settings.sqlite_busy_timeout_ms,
+        'cache_size': settings.sqlite_cache_size,
+        'mmap_size': settings.sqlite_mmap_size,
+    }
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """`connect` event handler applying the SQLite profile.
+
+    WAL lets readers proceed while a donation commit is being written;
+    synchronous=NORMAL is durable in WAL mode except on power loss.
+    """
+    cursor = dbapi_connection.cursor()
+    for pragma, value in sqlite_pragmas().items():
+        cursor.execute(f'PRAGMA {pragma}={value}')
+    cursor.close()
+
+
+def create_engine_for_url(url: str) -> AsyncEngine:
+    """Create an async engine tuned according to settings."""
+    new_engine = create_async_engine(url, **engine_options(url))
+    if is_sqlite_url(url) and settings.sqlite_tuning:
+        event.listen(new_engine.sync_engine, 'connect', set_sqlite_pragmas)
+    return new_engine
+
+
+class PoolMetrics:
+    """Connection pool checkout counters, collected via pool events."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.checkins = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.hold_seconds = 0.0
+
+    def attach(self, target_engine: AsyncEngine) -> None:
+        event.listen(target_engine.sync_engine, 'checkout', self._checkout)
+        event.listen(target_engine.sync_engine, 'checkin', self._checkin)
+
+    def _checkout(self, dbapi_connection, connection_record, proxy):
+        self.checkouts += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        connection_record.info['checked_out_at'] = time.perf_counter()
+
+    def _checkin(self, dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop('checked_out_at', None)
+        if checked_out_at is None:
+            return
+        self.checkins += 1
+        self.in_use -= 1
+        self.hold_seconds += time.perf_counter() - checked_out_at
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'checkouts': self.checkouts,
+            'checkins': self.checkins,
+            'in_use': self.in_use,
+            'peak_in_use': self.peak_in_use,
+            'hold_seconds': round(self.hold_seconds, 6),
+        }
+
+
+pool_metrics = PoolMetrics()
+
 # Create async engine using default database URL from settings
-engine = create_async_engine(
-    settings.database_url,
-    future=True,
-    echo=False,
-)
+engine = create_engine_for_url(settings.database_url)
+pool_metrics.attach(engine)
 
 # Async session factory
 AsyncSessionLocal = sessionmaker(
@@ -22,8 +133,126 @@ AsyncSessionLocal = sessionmaker(
     autocommit=False,
 )
 
+# Optional read replica; without it reads go to the primary
+read_engine: Optional[AsyncEngine] = (
+    create_engine_for_url(settings.read_replica_url)
+    if settings.read_replica_url else None
+)
+if read_engine is not None:
+    pool_metrics.attach(read_engine)
+
+
+def compiled_cache_size(async_engine: AsyncEngine) -> Callable[[], int]:
+    """Entries of the engine's compiled statement cache (LRU)."""
+    return lambda: len(async_engine.sync_engine._compiled_cache or ())
+
 
-async def get_async_session() -> AsyncSession:
-    """FastAPI dependency that yields an AsyncSession."""
+caches.register('sql_compiled_statements', compiled_cache_size(engine))
+if read_engine is not None:
+    caches.register(
+        'sql_compiled_statements_replica', compiled_cache_size(read_engine)
+    )
+
+ReadSessionLocal = sessionmaker(
+    bind=read_engine or engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+    autocommit=False,
+)
+
+# session.info keys used for read-your-writes pinning
+PIN_KEY = 'primary_pin_key'
+PIN_RESPONSE = 'primary_pin_response'
+WROTE = 'primary_pin_wrote'
+# session.info key holding callbacks to run after a successful commit
+AFTER_COMMIT = 'after_commit_callbacks'
+
+
+def on_commit(session: Session, callback: Callable[[], None]) -> None:
+    """Run `callback` once the session's current transaction commits.
+
+    Dropped if the transaction rolls back. Takes the sync `Session`
+    (as passed to ORM events; for AsyncSession use `.sync_session`).
+    """
+    session.info.setdefault(AFTER_COMMIT, []).append(callback)
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_commit_callbacks(session):
+    for callback in session.info.pop(AFTER_COMMIT, ()):
+        callback()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_commit_callbacks(session):
+    session.info.pop(AFTER_COMMIT, None)
+
+
+def primary_pin_key(request: Request) -> Optional[str]:
+    return pin_key(request.headers.get('authorization'))
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_session_write(session, flush_context):
+    if PIN_KEY in session.info:
+        session.info[WROTE] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _pin_writer_to_primary(session):
+    # Pin before the response is sent, so the client's next read
+    # can't reach a replica that hasn't caught up yet
+    if not session.info.pop(WROTE, False):
+        return
+    primary_pins.pin(session.info.get(PIN_KEY))
+    response = session.info.get(PIN_RESPONSE)
+    if read_engine is not None and response is not None:
+        # For the other workers, which don't share `primary_pins`
+        response.set_cookie(
+            PIN_COOKIE, '1', max_age=pin_cookie_max_age(),
+            httponly=True, samesite='lax',
+        )
+
+
+async def get_async_session(
+    request: Request, response: Response
+) -> AsyncSession:
+    """FastAPI dependency that yields a lazily connected AsyncSession.
+
+    No connection is checked out of the pool until the first statement
+    runs, so requests rejected without a valid token cost nothing. A
+    request with an invalid body still pays for the `current_user`
+    lookup: FastAPI resolves dependencies before it validates the body.
+    The connection goes back to the pool when the transaction ends:
+    handlers don't refresh after their final commit, and read-only ones
+    close the session before the response is serialised.
+    """
     async with AsyncSessionLocal() as session:
+        session.sync_session.info[PIN_KEY] = primary_pin_key(request)
+        # FastAPI merges cookies set on it into the endpoint's response
+        session.sync_session.info[PIN_RESPONSE] = response
+        yield session
+
+
+async def get_read_session(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+) -> AsyncSession:
+    """FastAPI dependency for read-only routes.
+
+    Uses the read replica when configured, except for clients pinned to
+    the primary after a recent write: by this process, or by any worker
+    through `PIN_COOKIE`. Otherwise it shares the request's
+    primary session (e.g. with `current_user`), so one connection serves
+    the whole request.
+    """
+    if (
+        read_engine is None or
+        PIN_COOKIE in request.cookies or
+        primary_pins.is_pinned(primary_pin_key(request))
+    ):
         yield session
+        return
+    async with ReadSessionLocal() as read_session:
+        yield read_session
@@ -0,0 +1,30 @@
+"""Registry of in-process caches, reported by `GET /memory/`.
+
+Modules that keep something in memory between requests register it
+where it is created:
+
+    caches.register('closed_projects_report', closed_projects_report)
+
+with an object that supports `len()` or a callable returning a size.
+"""
+from typing import Callable, Dict, Sized, Union
+
+SizeSource = Union[Sized, Callable[[], int]]
+
+
+class CacheRegistry:
+    def __init__(self):
+        self._sources: Dict[str, SizeSource] = {}
+
+    def register(self, name: str, source: SizeSource) -> None:
+        self._sources[name] = source
+
+    def sizes(self) -> Dict[str, int]:
+        """Current number of entries of every registered cache."""
+        return {
+            name: source() if callable(source) else len(source)
+            for name, source in sorted(self._sources.items())
+        }
+
+
+caches = CacheRegistry()
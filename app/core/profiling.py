@@ -0,0 +1,255 @@
+"""On-demand profiling of single requests for superusers.
+
+A request with `?_profile=1` or an `X-Profile: 1` header and a
+superuser's bearer token runs under cProfile. The middleware only marks
+such requests; `current_user` starts the profile once it has
+authenticated a superuser, so the token costs no extra session and
+endpoints that don't authenticate are never profiled. The stats are written to
+`PROFILE_DIR` as a `.prof` file (`python -m pstats`, `snakeviz` or
+`flameprof` turn it into a call tree or flame graph) and the response
+gets:
+
+    Server-Timing: total;dur=..., allocation;dur=..., sql;dur=...,
+                   serialization;dur=...
+    X-Profile: <file name>
+
+`allocation` is the time in `app.services.investment`, `serialization`
+the time in FastAPI's response serialisation and rendering (both taken
+from the profile), `sql` the time spent in the database driver for
+this request. Other requests are not affected: without the switch the
+middleware only looks at the query string and headers, and the SQL
+timers are hooked up only for requests with the switch. Profiles run one
+at a time, since cProfile sees every coroutine on the event loop; a
+streamed response is profiled up to its first body chunk, so an
+endless stream doesn't hold up the next profile. Only the newest
+`PROFILE_MAX_FILES` profiles are kept.
+"""
+import asyncio
+import cProfile
+import pstats
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Key in the request state: coroutine function starting the profile
+PROFILE_START = 'profile_start'
+PROFILE_PARAM = b'_profile='
+PROFILE_HEADER = b'x-profile'
+TRUE_VALUES = frozenset({b'1', b'true', b'yes'})
+
+# (file path suffix, function name); nested matches are counted once
+ALLOCATION_CODE = (('app/services/investment.py', None),)
+SERIALIZATION_CODE = (
+    ('fastapi/routing.py', 'serialize_response'),
+    ('starlette/responses.py', 'render'),
+    ('fastapi/responses.py', 'render'),
+)
+
+StatKey = Tuple[str, int, str]
+
+
+def profile_requested(scope) -> bool:
+    query = scope.get('query_string', b'')
+    if PROFILE_PARAM in query:
+        for pair in query.split(b'&'):
+            name, _, value = pair.partition(b'=')
+            if name == b'_profile' and value.lower() in TRUE_VALUES:
+                return True
+    for name, value in scope.get('headers') or ():
+        if name == PROFILE_HEADER and value.lower() in TRUE_VALUES:
+            return True
+    return False
+
+
+async def start_requested_profile(scope, user: Any) -> None:
+    """Start the profile the request asked for if `user` may have it."""
+    start = scope.get('state', {}).get(PROFILE_START)
+    if start is not None and getattr(user, 'is_superuser', False):
+        await start()
+
+
+def matches(key: StatKey, code: Iterable[Tuple[str, Optional[str]]]) -> bool:
+    filename, _, function = key
+    filename = filename.replace('\\', '/')
+    return any(
+        filename.endswith(suffix) and name in (None, function)
+        for suffix, name in code
+    )
+
+
+def outermost_time(
+    stats: pstats.Stats, code: Iterable[Tuple[str, Optional[str]]]
+) -> float:
+    """Cumulative seconds in `code`, not counting calls nested in it."""
+    code = tuple(code)
+    total = 0.0
+    for key, (_, _, _, cumulative, callers) in stats.stats.items():
+        if matches(key, code) and not any(
+            matches(caller, code) for caller in callers
+        ):
+            total += cumulative
+    return total
+
+
+class SQLTimer:
+    """Driver time of the current request's statements.
+
+    Listens on every engine, but only while at least one timer is
+    attached; statements are attributed through a context variable, so
+    queries of concurrent requests are not counted.
+    """
+
+    current: ContextVar[Optional['SQLTimer']] = ContextVar(
+        'sql_timer', default=None
+    )
+    _attached = 0
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.statements = 0
+
+    @staticmethod
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if SQLTimer.current.get() is not None:
+            conn.info.setdefault('profile_started', []).append(
+                time.perf_counter()
+            )
+
+    @staticmethod
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        timer = SQLTimer.current.get()
+        started = conn.info.get('profile_started')
+        if timer is not None and started:
+            timer.seconds += time.perf_counter() - started.pop()
+            timer.statements += 1
+
+    def __enter__(self) -> 'SQLTimer':
+        if not SQLTimer._attached:
+            event.listen(Engine, 'before_cursor_execute', self._before)
+            event.listen(Engine, 'after_cursor_execute', self._after)
+        SQLTimer._attached += 1
+        self._token = SQLTimer.current.set(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        SQLTimer.current.reset(self._token)
+        SQLTimer._attached -= 1
+        if not SQLTimer._attached:
+            event.remove(Engine, 'before_cursor_execute', self._before)
+            event.remove(Engine, 'after_cursor_execute', self._after)
+
+
+def server_timing(timings: Dict[str, float]) -> bytes:
+    return ', '.join(
+        f'{name};dur={seconds * 1000:.1f}'
+        for name, seconds in timings.items()
+    ).encode('latin-1')
+
+
+class RequestProfiler:
+    """Pure ASGI middleware profiling requests that ask for it."""
+
+    def __init__(self, app, directory: str, max_files: int = 0):
+        self.app = app
+        self.directory = Path(directory)
+        # 0 keeps every profile
+        self.max_files = max_files
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+        await self.profile(scope, receive, send)
+
+    async def profile(self, scope, receive, send):
+        """Run the request, profiling it from the point its superuser
+        is authenticated (`start_requested_profile`)."""
+        profiler = cProfile.Profile()
+        name = (
+            f"{datetime.now():%Y%m%dT%H%M%S%f}-{scope['method']}-"
+            f"{scope['path'].strip('/').replace('/', '_') or 'root'}.prof"
+        )
+        start: Optional[dict] = None
+        profiling = False
+
+        async def begin():
+            nonlocal profiling
+            if profiling:
+                return
+            await self._lock.acquire()
+            profiling = True
+            profiler.enable()
+
+        def stop():
+            # At the first body chunk rather than when the app returns,
+            # which a streamed response may never do
+            nonlocal profiling
+            if profiling:
+                profiling = False
+                profiler.disable()
+                self._lock.release()
+
+        async def profiled_send(message):
+            nonlocal start
+            if message['type'] == 'http.response.start' and profiling:
+                # Held back until the body: the timings aren't known yet
+                start = message
+                return
+            if start is not None:
+                # A streamed body is profiled up to its first chunk
+                profiler.disable()
+                try:
+                    timings = self.save(
+                        profiler, name, time.perf_counter() - started, sql
+                    )
+                finally:
+                    stop()
+                start['headers'] = list(start.get('headers', [])) + [
+                    (b'server-timing', server_timing(timings)),
+                    (b'x-profile', name.encode('latin-1')),
+                ]
+                await send(start)
+                start = None
+            await send(message)
+
+        scope.setdefault('state', {})[PROFILE_START] = begin
+        try:
+            started = time.perf_counter()
+            with SQLTimer() as sql:
+                await self.app(scope, receive, profiled_send)
+        finally:
+            stop()
+
+    def save(
+        self,
+        profiler: cProfile.Profile,
+        name: str,
+        total: float,
+        sql: SQLTimer,
+    ) -> Dict[str, float]:
+        """Write the stats to `name`; return the timings, in seconds."""
+        stats = pstats.Stats(profiler)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(self.directory / name)
+        self.prune()
+        return {
+            'total': total,
+            'allocation': outermost_time(stats, ALLOCATION_CODE),
+            'sql': sql.seconds,
+            'serialization': outermost_time(stats, SERIALIZATION_CODE),
+        }
+
+    def prune(self) -> None:
+        """Delete all but the newest `max_files` profiles."""
+        if not self.max_files:
+            return
+        # Names start with the timestamp, so they sort by age
+        profiles = sorted(self.directory.glob('*.prof'))
+        for path in profiles[:-self.max_files]:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,59 @@
+"""Counting the SQL statements an engine executes.
+
+    with QueryCounter(engine) as queries:
+        client.post('/donation/', json={'full_amount': 100})
+    queries.check(4, 'POST /donation/')
+
+Used by the test suite to hold endpoints to a statement budget, so an
+N+1 loop or an extra refresh SELECT fails a test instead of slipping
+through. Every statement executed on the engine while the block runs
+is counted, whichever task or thread runs it.
+"""
+from typing import Any, List, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    def __init__(self, engine: Union[Engine, AsyncEngine]):
+        self.engine = getattr(engine, 'sync_engine', engine)
+        self.statements: List[str] = []
+
+    def _record(
+        self, conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        self.statements.append(
+            f'{statement} [executemany]' if executemany else statement
+        )
+
+    def __enter__(self) -> 'QueryCounter':
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def report(self) -> str:
+        return '\n'.join(
+            f'{number}. {" ".join(statement.split())}'
+            for number, statement in enumerate(self.statements, 1)
+        )
+
+    def check(self, budget: int, label: str = 'block') -> None:
+        """Raise `QueryBudgetExceeded` if more than `budget` ran."""
+        if self.count > budget:
+            raise QueryBudgetExceeded(
+                f'{label} ran {self.count} SQL statements, budget is '
+                f'{budget}:\n{self.report()}'
+            )
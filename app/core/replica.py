@@ -0,0 +1,112 @@
+"""Read replica support: primary pinning and a local SQLite replica."""
+import argparse
+import hashlib
+import math
+import sqlite3
+import time
+from typing import Dict, Optional
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.core.memory import caches
+
+
+class PrimaryPins:
+    """Short-lived "read from primary" marks for clients that just wrote.
+
+    A replica may lag behind the primary, so a user who has just donated
+    could otherwise not see the donation in `GET /donation/my`. Keys are
+    digests of the clients' `Authorization` headers (see `pin_key`), so
+    no token is kept in memory; expired pins are purged lazily. The
+    marks live in one process: other workers learn about the write from
+    the `PIN_COOKIE` set on the writing response.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._pins: Dict[str, float] = {}
+
+    def pin(self, key: Optional[str]) -> None:
+        if not key:
+            return
+        now = time.monotonic()
+        self._pins[key] = now + self.ttl_seconds
+        if len(self._pins) > 1024:
+            self._purge(now)
+
+    def is_pinned(self, key: Optional[str]) -> bool:
+        if not key:
+            return False
+        expires_at = self._pins.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            self._pins.pop(key, None)
+            return False
+        return True
+
+    def _purge(self, now: float) -> None:
+        for key, expires_at in list(self._pins.items()):
+            if expires_at <= now:
+                del self._pins[key]
+
+    def __len__(self) -> int:
+        return len(self._pins)
+
+
+primary_pins = PrimaryPins(settings.primary_pin_seconds)
+caches.register('primary_pins', primary_pins)
+
+# Set on responses to writes while a replica is in use; any worker
+# sends requests carrying it to the primary until it expires
+PIN_COOKIE = 'read_primary'
+
+
+def pin_key(authorization: Optional[str]) -> Optional[str]:
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode('latin-1')).hexdigest()
+
+
+def pin_cookie_max_age() -> int:
+    return max(math.ceil(settings.primary_pin_seconds), 1)
+
+
+def sqlite_path(url: str) -> str:
+    database = make_url(url).database
+    if not database or database == ':memory:':
+        raise ValueError(f'Not a file-based SQLite URL: {url}')
+    return database
+
+
+def sync_sqlite_replica(primary_url: str, replica_url: str) -> None:
+    """Copy the primary SQLite file into the replica (online backup).
+
+    A stand-in for streaming replication when running locally.
+    """
+    source = sqlite3.connect(sqlite_path(primary_url))
+    target = sqlite3.connect(sqlite_path(replica_url))
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Keep a local SQLite read replica in sync.'
+    )
+    parser.add_argument(
+        '--interval', type=float, default=0,
+        help='repeat every N seconds (default: copy once)',
+    )
+    args = parser.parse_args()
+    if not settings.read_replica_url:
+        parser.error('DATABASE_READ_URL is not set')
+    while True:
+        sync_sqlite_replica(settings.database_url, settings.read_replica_url)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
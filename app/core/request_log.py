@@ -0,0 +1,132 @@
+"""Recording of live traffic as a JSONL trace for load-test replay.
+
+One line per request: method, path, query string, JSON body (passwords
+redacted), whether an `Authorization` header was sent (the token itself
+is never written), response status, duration and the offset from the
+first recorded request. Replay it with `python -m benchmarks.load`.
+
+Only `application/json` bodies up to `REQUEST_LOG_MAX_BODY_BYTES` are
+kept (others are recorded as `null`), so streamed uploads such as the
+NDJSON/CSV donation import stay unbuffered. Lines are written by a
+single background thread, in request order, never on the event loop;
+pending lines are flushed at application shutdown.
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, TextIO
+
+from app.core.constants import REQUEST_LOG_MAX_BODY_BYTES
+
+REDACTED = '***'
+SECRET_FIELDS = frozenset({'password'})
+JSON_CONTENT_TYPE = b'application/json'
+
+
+def redact(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in SECRET_FIELDS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+def records_body(headers: dict) -> bool:
+    content_type = headers.get(b'content-type', b'')
+    return content_type.split(b';')[0].strip().lower() == JSON_CONTENT_TYPE
+
+
+def parse_body(chunks: Optional[List[bytes]]) -> Any:
+    body = b''.join(chunks or ())
+    try:
+        return redact(json.loads(body)) if body else None
+    except ValueError:
+        return None
+
+
+class RequestRecorder:
+    """Pure ASGI middleware appending every HTTP request to `path`."""
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+        self._file: Optional[TextIO] = None
+        self._started: Optional[float] = None
+        # One thread: lines stay in order and the file is never shared
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='request-log'
+        )
+
+    def write(self, record: dict) -> None:
+        """Append `record`; runs on the writer thread."""
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def flush(self) -> None:
+        """Block until the records queued so far are written."""
+        self._writer.submit(lambda: None).result()
+
+    async def lifespan(self, scope, receive, send):
+        async def flushing_send(message):
+            if message['type'] == 'lifespan.shutdown.complete':
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.flush
+                )
+            await send(message)
+
+        await self.app(scope, receive, flushing_send)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(scope, receive, send)
+            return
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        if self._started is None:
+            self._started = started
+        headers = dict(scope.get('headers') or [])
+        chunks: Optional[List[bytes]] = [] if records_body(headers) else None
+        size = 0
+        status = None
+
+        async def recording_receive():
+            nonlocal chunks, size
+            message = await receive()
+            if message['type'] == 'http.request' and chunks is not None:
+                chunk = message.get('body', b'')
+                size += len(chunk)
+                if size > REQUEST_LOG_MAX_BODY_BYTES:
+                    chunks = None
+                else:
+                    chunks.append(chunk)
+            return message
+
+        async def recording_send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            self._writer.submit(self.write, {
+                'offset_ms': round((started - self._started) * 1000, 3),
+                'method': scope['method'],
+                'path': scope['path'],
+                'query': scope.get('query_string', b'').decode('latin-1'),
+                'body': parse_body(chunks),
+                'auth': b'authorization' in headers,
+                'status': status,
+                'duration_ms': round(
+                    (time.perf_counter() - started) * 1000, 3
+                ),
+            })
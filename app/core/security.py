@@ -1,26 +1,92 @@
+"""Password hashing and access tokens.
+
+passlib (with the bcrypt backend) and PyJWT are imported on first use,
+not at app import: most worker processes and test runs start without
+hashing a password. `pwd_context` is still importable from here.
+"""
+import argparse
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
-import jwt
-from passlib.context import CryptContext
-
 from app.core.config import settings
+from app.core.constants import BCRYPT_MAX_ROUNDS, BCRYPT_MIN_ROUNDS
+
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def __getattr__(name: str):
+    # Lazy module attribute (PEP 562)
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with a cost other than the current one."""
+    return get_pwd_context().needs_update(hashed_password)
+
+
+def calibrate_bcrypt_rounds(
+    budget_ms: int,
+    min_rounds: int = BCRYPT_MIN_ROUNDS,
+    max_rounds: int = BCRYPT_MAX_ROUNDS,
+) -> int:
+    """Pick the highest bcrypt cost hashing within `budget_ms` here.
+
+    Each extra round doubles the work, so the benchmark stops at the
+    first cost exceeding the budget. `min_rounds` is returned even if
+    it doesn't fit: the hash must stay usable on slow machines.
+    """
+    from passlib.hash import bcrypt
+
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        hasher = bcrypt.using(rounds=rounds)
+        started = time.perf_counter()
+        hasher.hash("calibration-password")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms > budget_ms:
+            break
+        chosen = rounds
+    return chosen
+
+
+def configure_password_hashing(rounds: int) -> None:
+    """Hash new passwords with `rounds`; other costs become outdated."""
+    get_pwd_context().update(bcrypt__rounds=rounds)
+
+
+def setup_password_hashing() -> Optional[int]:
+    """Apply the bcrypt cost from settings (fixed or calibrated)."""
+    rounds = settings.bcrypt_rounds
+    if rounds is None and settings.bcrypt_calibrate:
+        rounds = calibrate_bcrypt_rounds(settings.bcrypt_budget_ms)
+    if rounds is not None:
+        configure_password_hashing(rounds)
+    return rounds
 
 
 def create_access_token(
     data: Dict[str, Any],
     expires_delta: Optional[timedelta] = None
 ) -> str:
+    import jwt
+
     to_encode = data.copy()
     expire = datetime.utcnow() + (
         expires_delta or timedelta(
@@ -35,6 +101,19 @@ def create_access_token(
 
 
 def decode_access_token(token: str) -> Dict[str, Any]:
+    import jwt
+
     return jwt.decode(
         token, settings.secret_key, algorithms=[settings.algorithm]
     )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark bcrypt and print the recommended cost."
+    )
+    parser.add_argument(
+        "--budget-ms", type=int, default=settings.bcrypt_budget_ms
+    )
+    args = parser.parse_args()
+    print(f"BCRYPT_ROUNDS={calibrate_bcrypt_rounds(args.budget_ms)}")
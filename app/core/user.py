@@ -1,9 +1,12 @@
-from fastapi import Depends, HTTPException, status
+from typing import Iterable, Optional, Set
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import select
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_async_session
+from app.core.profiling import start_requested_profile
 from app.core.security import decode_access_token
 from app.models.auth_user import AuthUser
 
@@ -11,7 +14,36 @@ from app.models.auth_user import AuthUser
 security = HTTPBearer(auto_error=False)
 
 
+async def get_user(
+    session: AsyncSession, user_id: int
+) -> Optional[AuthUser]:
+    # Cached statement: runs on every authenticated request
+    result = await session.execute(lambda_stmt(
+        lambda: select(AuthUser).where(AuthUser.id == user_id)
+    ))
+    return result.scalar_one_or_none()
+
+
+async def existing_user_ids(
+    session: AsyncSession, user_ids: Iterable[int]
+) -> Set[int]:
+    """Those of `user_ids` that belong to registered users."""
+    result = await session.execute(
+        select(AuthUser.id).where(AuthUser.id.in_(list(user_ids)))
+    )
+    return set(result.scalars())
+
+
+def user_id_from_token(token: str) -> Optional[int]:
+    """The user id of a valid access token, None otherwise."""
+    try:
+        return int(decode_access_token(token)["sub"])
+    except Exception:
+        return None
+
+
 async def current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     session: AsyncSession = Depends(get_async_session),
 ):
@@ -22,33 +54,18 @@ async def current_user(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized"
         )
-    token = credentials.credentials
-    try:
-        payload = decode_access_token(token)
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized"
-        )
-    sub = payload.get("sub")
-    if not sub:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized"
-        )
-    try:
-        user_id = int(sub)
-    except Exception:
+    user_id = user_id_from_token(credentials.credentials)
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized"
         )
 
-    result = await session.execute(
-        select(AuthUser).where(AuthUser.id == user_id)
-    )
-    user = result.scalar_one_or_none()
+    user = await get_user(session, user_id)
     if user is None or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized"
         )
+    await start_requested_profile(request.scope, user)
     return user
 
 
@@ -0,0 +1,123 @@
+from datetime import datetime
+from heapq import merge
+from itertools import chain
+from operator import attrgetter
+from typing import Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
+
+from sqlalchemy import asc, delete, insert, lambda_stmt, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.core.db import Base
+from app.models.archive import CharityProjectArchive, DonationArchive
+from app.models.charity_project import CharityProject
+from app.models.donation import Donation
+
+ArchiveType = TypeVar("ArchiveType", bound=Base)
+
+
+def merge_by_id(*sorted_lists: Iterable) -> List:
+    """Merge hot and archived rows, each already ordered by `id`."""
+    return list(merge(*sorted_lists, key=attrgetter("id")))
+
+
+async def get_many_with_archive(
+    session: AsyncSession,
+    crud: CRUDBase,
+    archive_crud: "CRUDArchive",
+    ids: Sequence[int],
+) -> Tuple[List, List[int]]:
+    """`CRUDBase.get_many`, looking up hot misses in the archive."""
+    found, missing = await crud.get_many(session, ids)
+    if not missing:
+        return found, missing
+    archived, missing = await archive_crud.get_many(session, missing)
+    by_id = {obj.id: obj for obj in chain(found, archived)}
+    return [by_id[id] for id in dict.fromkeys(ids) if id in by_id], missing
+
+
+class CRUDArchive(CRUDBase[ArchiveType]):
+    """History table for closed rows of `hot_model`.
+
+    Rows keep their ids, so hot and archived rows can be merged by id.
+    """
+
+    def __init__(self, model: Type[ArchiveType], hot_model: Type[Base]):
+        super().__init__(model)
+        self.hot_model = hot_model
+
+    async def move_closed(
+        self,
+        session: AsyncSession,
+        closed_before: datetime,
+        limit: int,
+    ) -> int:
+        """Move up to `limit` rows closed before `closed_before`.
+
+        INSERT ... SELECT and DELETE by the same ids, in the caller's
+        transaction. Returns the number of rows moved.
+        """
+        hot = self.hot_model
+        ids = list((await session.execute(
+            select(hot.id)
+            .where(
+                hot.fully_invested.is_(True),
+                hot.close_date < closed_before,
+            )
+            .order_by(asc(hot.close_date), asc(hot.id))
+            .limit(limit)
+        )).scalars())
+        if not ids:
+            return 0
+        columns = [column.name for column in hot.__table__.columns]
+        await session.execute(
+            insert(self.model).from_select(
+                columns + ["archived_at"],
+                select(
+                    *hot.__table__.columns,
+                    literal(datetime.now(), self.model.archived_at.type),
+                ).where(hot.id.in_(ids)),
+            )
+        )
+        await session.execute(
+            delete(hot)
+            .where(hot.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        return len(ids)
+
+
+class CRUDCharityProjectArchive(CRUDArchive[CharityProjectArchive]):
+    async def get_by_name(
+        self, session: AsyncSession, name: str
+    ) -> Optional[CharityProjectArchive]:
+        result = await session.execute(lambda_stmt(
+            lambda: select(CharityProjectArchive)
+            .where(CharityProjectArchive.name == name)
+        ))
+        return result.scalars().first()
+
+
+class CRUDDonationArchive(CRUDArchive[DonationArchive]):
+    async def get_by_user(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[DonationArchive]:
+        stmt = lambda_stmt(
+            lambda: select(DonationArchive)
+            .where(DonationArchive.user_id == user_id)
+            .order_by(asc(DonationArchive.id))
+        )
+        if columns is not None:
+            option = self.load_only(columns)
+            stmt += lambda s: s.options(option)
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+
+project_archive_crud = CRUDCharityProjectArchive(
+    CharityProjectArchive, CharityProject
+)
+donation_archive_crud = CRUDDonationArchive(DonationArchive, Donation)
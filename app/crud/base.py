@@ -1,38 +1,97 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar
+from typing import (
+    Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar,
+)
 
-from sqlalchemy import asc, select
+from sqlalchemy import asc, insert, lambda_stmt, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
+from app.core.constants import GET_MANY_CHUNK_SIZE
 from app.core.db import Base
 
 
 ModelType = TypeVar("ModelType", bound=Base)
 
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
 
 class CRUDBase(Generic[ModelType]):
-    """Generic async CRUD helper for SQLAlchemy models."""
+    """Generic async CRUD helper for SQLAlchemy models.
+
+    Hot queries are built with `lambda_stmt`: the statement is constructed
+    and compiled once per call site (and model), later calls only bind
+    new parameter values.
+    """
 
     def __init__(self, model: Type[ModelType]):
         self.model = model
 
+    def load_only(self, columns: Sequence[str]):
+        """Loader option for `columns` (plus the primary key) only.
+
+        Names that aren't columns of the model are ignored; the other
+        attributes stay unloaded and must not be touched.
+        """
+        table_columns = self.model.__table__.columns
+        return load_only(*(
+            getattr(self.model, name) for name in columns
+            if name in table_columns
+        ))
+
     async def get(self, session: AsyncSession, id: int) -> Optional[ModelType]:
+        model = self.model
         result = await session.execute(
-            select(self.model).where(self.model.id == id)
+            lambda_stmt(lambda: select(model).where(model.id == id))
         )
         return result.scalars().first()
 
+    async def get_many(
+        self,
+        session: AsyncSession,
+        ids: Sequence[int],
+        chunk_size: int = GET_MANY_CHUNK_SIZE,
+    ) -> Tuple[List[ModelType], List[int]]:
+        """Rows with the given ids, in request order, and the missing ids.
+
+        One `WHERE id IN (...)` query per `chunk_size` ids; repeated ids
+        are returned once.
+        """
+        model = self.model
+        wanted = list(dict.fromkeys(ids))
+        found: Dict[int, ModelType] = {}
+        for start in range(0, len(wanted), chunk_size):
+            chunk = wanted[start:start + chunk_size]
+            result = await session.execute(
+                lambda_stmt(lambda: select(model).where(model.id.in_(chunk)))
+            )
+            found.update((obj.id, obj) for obj in result.scalars())
+        return (
+            [found[id] for id in wanted if id in found],
+            [id for id in wanted if id not in found],
+        )
+
     async def get_multi(
         self,
         session: AsyncSession,
         *,
         skip: int = 0,
         limit: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
     ) -> List[ModelType]:
-        stmt = select(self.model).order_by(asc(self.model.id))
+        model = self.model
+        stmt = lambda_stmt(lambda: select(model).order_by(asc(model.id)))
+        if columns is not None:
+            option = self.load_only(columns)
+            stmt += lambda s: s.options(option)
         if skip:
-            stmt = stmt.offset(skip)
+            stmt += lambda s: s.offset(skip)
         if limit is not None:
-            stmt = stmt.limit(limit)
+            stmt += lambda s: s.limit(limit)
         result = await session.execute(stmt)
         return list(result.scalars().all())
 
@@ -77,6 +136,108 @@ class CRUDBase(Generic[ModelType]):
         obj = await self.get(session, id)
         if obj is None:
             return None
-        await session.delete(obj)
+        return await self.delete(session, obj)
+
+    async def delete(
+        self,
+        session: AsyncSession,
+        db_obj: ModelType,
+    ) -> ModelType:
+        """Delete an already loaded object (no second SELECT)."""
+        await session.delete(db_obj)
         await session.commit()
-        return obj
+        return db_obj
+
+    async def increment(
+        self,
+        session: AsyncSession,
+        key: Dict[str, Any],
+        deltas: Dict[str, int],
+        **values: Any,
+    ) -> None:
+        """Atomically add `deltas` to counters of the row matching `key`.
+
+        A missing row is created with the deltas as initial values.
+        `values` are plain assignments made along (e.g. a last-seen date).
+        Runs a single upsert statement where the dialect supports it.
+        """
+        model = self.model
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas and not values:
+            return
+        dialect = session.sync_session.get_bind().dialect.name
+        upsert_insert = UPSERT_INSERTS.get(dialect)
+        if upsert_insert is not None:
+            stmt = upsert_insert(model).values(**key, **deltas, **values)
+            await session.execute(stmt.on_conflict_do_update(
+                index_elements=list(key),
+                set_={
+                    **{
+                        field: getattr(model, field) + delta
+                        for field, delta in deltas.items()
+                    },
+                    **values,
+                },
+            ))
+            return
+        result = await session.execute(
+            update(model)
+            .where(*(
+                getattr(model, field) == value
+                for field, value in key.items()
+            ))
+            .values({
+                getattr(model, field): getattr(model, field) + delta
+                for field, delta in deltas.items()
+            })
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            await session.execute(
+                insert(model).values(**key, **deltas, **values)
+            )
+
+    async def increment_many(
+        self,
+        session: AsyncSession,
+        rows: Sequence[Tuple[Dict[str, Any], Dict[str, int], Dict[str, Any]]],
+    ) -> None:
+        """`increment` for several `(key, deltas, values)` rows at once.
+
+        One executemany upsert where the dialect supports it, so the
+        number of statements doesn't grow with the number of rows.
+        Every key, and every row's `values`, has the same fields;
+        missing deltas count as 0.
+        """
+        rows = [
+            (key, deltas, values) for key, deltas, values in rows
+            if values or any(deltas.values())
+        ]
+        dialect = session.sync_session.get_bind().dialect.name
+        upsert_insert = UPSERT_INSERTS.get(dialect)
+        if upsert_insert is None or len(rows) < 2:
+            for key, deltas, values in rows:
+                await self.increment(session, key, deltas, **values)
+            return
+        model = self.model
+        fields = sorted({field for _, deltas, _ in rows for field in deltas})
+        stmt = upsert_insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(rows[0][0]),
+            set_={
+                **{
+                    field: getattr(model, field) + stmt.excluded[field]
+                    for field in fields
+                },
+                **{field: stmt.excluded[field] for field in rows[0][2]},
+            },
+        )
+        await session.execute(stmt, [
+            {
+                **key,
+                **{field: deltas.get(field, 0) for field in fields},
+                **values,
+            }
+            for key, deltas, values in rows
+        ])
@@ -0,0 +1,68 @@
+import heapq
+from typing import Any, List, NamedTuple, Optional
+
+from sqlalchemy import asc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.change_feed import ChangeTombstone
+from app.models.charity_project import CharityProject
+from app.models.donation import Donation
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+
+class Change(NamedTuple):
+    seq: int
+    entity: str
+    op: str
+    id: int
+    obj: Optional[Any]
+
+
+async def changed_rows(
+    session: AsyncSession, model, since: int, limit: int
+) -> List[Change]:
+    # Range scan over the unique index on change_seq
+    result = await session.execute(
+        select(model)
+        .where(model.change_seq > since)
+        .order_by(asc(model.change_seq))
+        .limit(limit)
+    )
+    return [
+        Change(obj.change_seq, model.__tablename__, UPSERT, obj.id, obj)
+        for obj in result.scalars().all()
+    ]
+
+
+async def deleted_rows(
+    session: AsyncSession, since: int, limit: int
+) -> List[Change]:
+    result = await session.execute(
+        select(ChangeTombstone)
+        .where(ChangeTombstone.change_seq > since)
+        .order_by(asc(ChangeTombstone.change_seq))
+        .limit(limit)
+    )
+    return [
+        Change(row.change_seq, row.entity, DELETE, row.entity_id, None)
+        for row in result.scalars().all()
+    ]
+
+
+async def get_changes(
+    session: AsyncSession, since: int, limit: int
+) -> List[Change]:
+    """Up to `limit` changes after `since`, in `change_seq` order.
+
+    Each source is read up to `limit` rows from its index, so a pull
+    costs O(limit) regardless of table sizes. A row changed several
+    times appears once, with its latest state and number.
+    """
+    sources = [
+        await changed_rows(session, CharityProject, since, limit),
+        await changed_rows(session, Donation, since, limit),
+        await deleted_rows(session, since, limit),
+    ]
+    return list(heapq.merge(*sources))[:limit]
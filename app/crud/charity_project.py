@@ -1,28 +1,75 @@
-from typing import Optional
+from typing import AsyncIterator, List, Optional
 
-from sqlalchemy import asc, select
+from sqlalchemy import asc, lambda_stmt, select, union_all
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base import CRUDBase
+from app.crud.sql_functions import seconds_between
+from app.models.archive import CharityProjectArchive
 from app.models.charity_project import CharityProject
 
 
+def closed_by_speed_stmt(limit: Optional[int] = None):
+    """Closed projects, fastest funded first; duration computed in SQL.
+
+    Covers archived projects too: all of them are closed.
+    """
+    closed = union_all(*(
+        select(
+            model.id,
+            model.name,
+            model.create_date,
+            model.close_date,
+            seconds_between(
+                model.create_date, model.close_date
+            ).label("duration_seconds"),
+        ).where(model.fully_invested.is_(True))
+        for model in (CharityProject, CharityProjectArchive)
+    )).subquery()
+    stmt = select(closed).order_by(
+        closed.c.duration_seconds, closed.c.id
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
 class CRUDCharityProject(CRUDBase[CharityProject]):
     async def get_by_name(
         self, session: AsyncSession, name: str
     ) -> Optional[CharityProject]:
-        result = await session.execute(
-            select(CharityProject).where(CharityProject.name == name)
-        )
+        result = await session.execute(lambda_stmt(
+            lambda: select(CharityProject).where(CharityProject.name == name)
+        ))
         return result.scalars().first()
 
-    async def get_open_ordered(self, session: AsyncSession):
-        result = await session.execute(
-            select(CharityProject)
-            .where(CharityProject.fully_invested.is_(False))
+    async def get_open_ordered(
+        self, session: AsyncSession, limit: Optional[int] = None
+    ) -> List[CharityProject]:
+        stmt = lambda_stmt(
+            lambda: select(CharityProject)
+            # Matches the partial index ix_charity_project_queue
+            .where(CharityProject.remaining_amount > 0)
             .order_by(asc(CharityProject.create_date), asc(CharityProject.id))
         )
+        if limit is not None:
+            stmt += lambda s: s.limit(limit)
+        result = await session.execute(stmt)
         return list(result.scalars().all())
 
+    async def get_closed_by_speed(
+        self, session: AsyncSession, limit: Optional[int] = None
+    ) -> List[Row]:
+        result = await session.execute(closed_by_speed_stmt(limit))
+        return list(result.all())
+
+    async def stream_closed_by_speed(
+        self, session: AsyncSession, limit: Optional[int] = None
+    ) -> AsyncIterator[Row]:
+        result = await session.stream(closed_by_speed_stmt(limit))
+        async for row in result:
+            yield row
+
 
 charity_project_crud = CRUDCharityProject(CharityProject)
@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Optional, Sequence
 
-from sqlalchemy import asc, select
+from sqlalchemy import asc, insert, lambda_stmt, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base import CRUDBase
@@ -9,22 +9,59 @@ from app.models.donation import Donation
 
 class CRUDDonation(CRUDBase[Donation]):
     async def get_by_user(
-        self, session: AsyncSession, user_id: int
+        self,
+        session: AsyncSession,
+        user_id: int,
+        columns: Optional[Sequence[str]] = None,
     ) -> List[Donation]:
-        result = await session.execute(
-            select(Donation)
+        stmt = lambda_stmt(
+            lambda: select(Donation)
             .where(Donation.user_id == user_id)
             .order_by(asc(Donation.id))
         )
+        if columns is not None:
+            option = self.load_only(columns)
+            stmt += lambda s: s.options(option)
+        result = await session.execute(stmt)
         return list(result.scalars().all())
 
-    async def get_open_ordered(self, session: AsyncSession) -> List[Donation]:
-        result = await session.execute(
-            select(Donation)
-            .where(Donation.fully_invested.is_(False))
+    async def get_open_ordered(
+        self, session: AsyncSession, limit: Optional[int] = None
+    ) -> List[Donation]:
+        stmt = lambda_stmt(
+            lambda: select(Donation)
+            # Matches the partial index ix_donation_queue
+            .where(Donation.remaining_amount > 0)
             .order_by(asc(Donation.create_date), asc(Donation.id))
         )
+        if limit is not None:
+            stmt += lambda s: s.limit(limit)
+        result = await session.execute(stmt)
         return list(result.scalars().all())
 
+    async def insert_many(
+        self, session: AsyncSession, donations: List[Donation]
+    ) -> None:
+        """INSERT transient donations with one executemany, set their ids.
+
+        Skips the ORM's row-by-row inserts. Every donation must carry a
+        unique `change_seq`: the ids are read back by it.
+        """
+        columns = [
+            column.name for column in Donation.__table__.columns
+            if column.name != "id"
+        ]
+        await session.execute(insert(Donation), [
+            {name: getattr(donation, name) for name in columns}
+            for donation in donations
+        ])
+        by_seq = {donation.change_seq: donation for donation in donations}
+        result = await session.execute(
+            select(Donation.id, Donation.change_seq)
+            .where(Donation.change_seq.between(min(by_seq), max(by_seq)))
+        )
+        for id, change_seq in result.all():
+            by_seq[change_seq].id = id
+
 
 donation_crud = CRUDDonation(Donation)
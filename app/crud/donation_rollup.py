@@ -0,0 +1,76 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import asc, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.constants import ROLLUP_GRANULARITIES
+from app.crud.base import CRUDBase
+from app.models.donation_rollup import DonationRollup
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    bucket = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        bucket = bucket.replace(hour=0)
+    return bucket
+
+
+class CRUDDonationRollup(CRUDBase[DonationRollup]):
+    async def add(
+        self,
+        session: AsyncSession,
+        donated_at: datetime,
+        **deltas: int,
+    ) -> None:
+        """Add deltas to every granularity's bucket containing the date."""
+        await self.add_many(session, [(donated_at, deltas)])
+
+    async def add_many(
+        self,
+        session: AsyncSession,
+        entries: Iterable[Tuple[datetime, Dict[str, int]]],
+    ) -> None:
+        """Add `(donated_at, deltas)` entries with one batched upsert."""
+        buckets: Dict[Tuple[str, datetime], Dict[str, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        for donated_at, deltas in entries:
+            for granularity in ROLLUP_GRANULARITIES:
+                bucket = buckets[
+                    granularity, bucket_start(donated_at, granularity)
+                ]
+                for field, delta in deltas.items():
+                    bucket[field] += delta
+        await self.increment_many(session, [
+            ({"granularity": granularity, "bucket_start": start}, deltas, {})
+            for (granularity, start), deltas in buckets.items()
+        ])
+
+    async def get_range(
+        self,
+        session: AsyncSession,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+    ) -> List[DonationRollup]:
+        """Buckets starting in `[start, end)`, oldest first."""
+        result = await session.execute(
+            select(DonationRollup)
+            .where(
+                DonationRollup.granularity == granularity,
+                DonationRollup.bucket_start >= bucket_start(
+                    start, granularity
+                ),
+                DonationRollup.bucket_start < end,
+            )
+            .order_by(asc(DonationRollup.bucket_start))
+        )
+        return list(result.scalars().all())
+
+    async def clear(self, session: AsyncSession) -> None:
+        await session.execute(delete(DonationRollup))
+
+
+donation_rollup_crud = CRUDDonationRollup(DonationRollup)
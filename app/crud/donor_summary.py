@@ -0,0 +1,89 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, lambda_stmt, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models.archive import DonationArchive
+from app.models.donation import Donation
+from app.models.donor_summary import DonorSummary
+
+
+class CRUDDonorSummary(CRUDBase[DonorSummary]):
+    async def add(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        *,
+        last_donation_date: Optional[datetime] = None,
+        **deltas: int,
+    ) -> None:
+        values = {}
+        if last_donation_date is not None:
+            values["last_donation_date"] = last_donation_date
+        await self.increment(session, {"user_id": user_id}, deltas, **values)
+
+    async def add_many(
+        self,
+        session: AsyncSession,
+        entries: Iterable[Tuple[int, Dict[str, int]]],
+        last_donation_dates: Optional[Dict[int, datetime]] = None,
+    ) -> None:
+        """Add `(user_id, deltas)` entries with one batched upsert.
+
+        With `last_donation_dates`, every entry's user must have a date.
+        """
+        await self.increment_many(session, [
+            (
+                {"user_id": user_id},
+                deltas,
+                {"last_donation_date": last_donation_dates[user_id]}
+                if last_donation_dates is not None else {},
+            )
+            for user_id, deltas in entries
+        ])
+
+    async def get_by_user(
+        self, session: AsyncSession, user_id: int
+    ) -> Optional[DonorSummary]:
+        result = await session.execute(lambda_stmt(
+            lambda: select(DonorSummary)
+            .where(DonorSummary.user_id == user_id)
+        ))
+        return result.scalars().first()
+
+    async def rebuild(self, session: AsyncSession) -> int:
+        """Recompute every summary from the donation tables.
+
+        For donations made before the summaries existed or restored in
+        bulk. Archived donations count too. Returns the number of donors.
+        """
+        donation = union_all(*(
+            select(
+                model.user_id, model.full_amount, model.invested_amount,
+                model.create_date,
+            )
+            for model in (Donation, DonationArchive)
+        )).subquery()
+        await session.execute(delete(DonorSummary))
+        result = await session.execute(
+            insert(DonorSummary).from_select(
+                [
+                    "user_id", "donation_count", "total_donated",
+                    "total_invested", "last_donation_date",
+                ],
+                select(
+                    donation.c.user_id,
+                    func.count(),
+                    func.sum(donation.c.full_amount),
+                    func.sum(donation.c.invested_amount),
+                    func.max(donation.c.create_date),
+                ).group_by(donation.c.user_id),
+            )
+        )
+        await session.commit()
+        return result.rowcount
+
+
+donor_summary_crud = CRUDDonorSummary(DonorSummary)
@@ -0,0 +1,102 @@
+from typing import Dict
+
+from sqlalchemy import case, func, lambda_stmt, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models.archive import CharityProjectArchive, DonationArchive
+from app.models.charity_project import CharityProject
+from app.models.donation import Donation
+from app.models.fund_stats import FUND_STATS_ID, FundStats
+
+STATS_FIELDS = (
+    "total_donated",
+    "total_invested",
+    "uninvested_balance",
+    "open_projects",
+    "closed_projects",
+    "open_donations",
+)
+
+
+def count_where(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+class CRUDFundStats(CRUDBase[FundStats]):
+    async def add(self, session: AsyncSession, **deltas: int) -> None:
+        """Apply counter deltas to the fund-wide row (same transaction)."""
+        await self.increment(session, {"id": FUND_STATS_ID}, deltas)
+
+    async def read(self, session: AsyncSession) -> Dict[str, int]:
+        stats = await self.get(session, FUND_STATS_ID)
+        return {
+            field: getattr(stats, field) if stats else 0
+            for field in STATS_FIELDS
+        }
+
+    async def closed_projects(self, session: AsyncSession) -> int:
+        """The closed projects count alone: one primary key lookup."""
+        result = await session.execute(lambda_stmt(
+            lambda: select(FundStats.closed_projects)
+            .where(FundStats.id == FUND_STATS_ID)
+        ))
+        return result.scalar() or 0
+
+    async def recompute(self, session: AsyncSession) -> Dict[str, int]:
+        """Full recompute from the project and donation tables.
+
+        Archived rows are included: archiving moves rows, it doesn't
+        change the fund's totals.
+        """
+        donation = union_all(*(
+            select(model.full_amount, model.invested_amount,
+                   model.fully_invested)
+            for model in (Donation, DonationArchive)
+        )).subquery()
+        project = union_all(*(
+            select(model.fully_invested)
+            for model in (CharityProject, CharityProjectArchive)
+        )).subquery()
+        donations = (await session.execute(select(
+            func.coalesce(func.sum(donation.c.full_amount), 0),
+            func.coalesce(func.sum(donation.c.invested_amount), 0),
+            count_where(donation.c.fully_invested.is_(False)),
+        ))).one()
+        projects = (await session.execute(select(
+            count_where(project.c.fully_invested.is_(False)),
+            count_where(project.c.fully_invested.is_(True)),
+        ))).one()
+        total_donated, total_invested, open_donations = donations
+        open_projects, closed_projects = projects
+        return {
+            "total_donated": total_donated,
+            "total_invested": total_invested,
+            "uninvested_balance": total_donated - total_invested,
+            "open_projects": open_projects,
+            "closed_projects": closed_projects,
+            "open_donations": open_donations,
+        }
+
+    async def check(self, session: AsyncSession) -> Dict[str, Dict[str, int]]:
+        """Compare the maintained row with a full recompute.
+
+        Returns the mismatching fields: `{field: {stored, actual}}`.
+        """
+        stored = await self.read(session)
+        actual = await self.recompute(session)
+        return {
+            field: {"stored": stored[field], "actual": actual[field]}
+            for field in STATS_FIELDS
+            if stored[field] != actual[field]
+        }
+
+    async def rebuild(self, session: AsyncSession) -> Dict[str, int]:
+        """Overwrite the row with a full recompute (e.g. after import)."""
+        actual = await self.recompute(session)
+        await self.increment(session, {"id": FUND_STATS_ID}, {}, **actual)
+        await session.commit()
+        return actual
+
+
+fund_stats_crud = CRUDFundStats(FundStats)
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, lambda_stmt, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models.idempotency import IdempotencyKey
+
+
+class CRUDIdempotencyKey(CRUDBase[IdempotencyKey]):
+    async def get_by_key(
+        self, session: AsyncSession, scope: str, key: str
+    ) -> Optional[IdempotencyKey]:
+        result = await session.execute(lambda_stmt(
+            lambda: select(IdempotencyKey).where(
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key,
+            )
+        ))
+        return result.scalars().first()
+
+    async def purge_expired(
+        self, session: AsyncSession, now: datetime
+    ) -> int:
+        result = await session.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.expires_at < now)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+
+idempotency_crud = CRUDIdempotencyKey(IdempotencyKey)
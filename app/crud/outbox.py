@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import asc, delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import on_commit
+from app.crud.base import CRUDBase
+from app.models.outbox import OutboxEvent
+
+
+class ClaimedEvent(NamedTuple):
+    id: int
+    event_type: str
+    payload: Any
+    attempts: int
+    created_at: datetime
+    token: str
+
+
+class OutboxLag(NamedTuple):
+    pending: int
+    oldest_pending_at: Optional[datetime]
+
+
+class CRUDOutbox(CRUDBase[OutboxEvent]):
+    def __init__(self, model):
+        super().__init__(model)
+        # Called after a commit that wrote events (wakes idle workers)
+        self.on_new_events = None
+
+    def add(self, session: AsyncSession, event_type: str, **payload) -> None:
+        """Queue an event; it is written by the caller's commit."""
+        session.add(OutboxEvent(event_type=event_type, payload=payload))
+        if self.on_new_events is not None:
+            on_commit(session.sync_session, self.on_new_events)
+
+    async def add_many(
+        self,
+        session: AsyncSession,
+        events: Iterable[Tuple[str, Dict[str, Any]]],
+    ) -> None:
+        """Queue `(event_type, payload)` pairs with one executemany."""
+        rows = [
+            {"event_type": event_type, "payload": payload}
+            for event_type, payload in events
+        ]
+        if not rows:
+            return
+        await session.execute(insert(OutboxEvent), rows)
+        if self.on_new_events is not None:
+            on_commit(session.sync_session, self.on_new_events)
+
+    async def claim(
+        self,
+        session: AsyncSession,
+        batch_size: int,
+        lease_seconds: float,
+    ) -> List[ClaimedEvent]:
+        """Lease up to `batch_size` due events for this caller.
+
+        The guarded UPDATE lets only one of several concurrent claimers
+        win an event; the caller commits to publish the lease.
+        """
+        now = datetime.now()
+        claimable = (
+            OutboxEvent.processed_at.is_(None),
+            OutboxEvent.available_at <= now,
+            or_(
+                OutboxEvent.locked_until.is_(None),
+                OutboxEvent.locked_until <= now,
+            ),
+        )
+        ids = (await session.execute(
+            select(OutboxEvent.id)
+            .where(*claimable)
+            .order_by(asc(OutboxEvent.id))
+            .limit(batch_size)
+        )).scalars().all()
+        if not ids:
+            return []
+        token = uuid4().hex
+        await session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(ids), *claimable)
+            .values(
+                locked_by=token,
+                locked_until=now + timedelta(seconds=lease_seconds),
+                attempts=OutboxEvent.attempts + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = (await session.execute(
+            select(
+                OutboxEvent.id,
+                OutboxEvent.event_type,
+                OutboxEvent.payload,
+                OutboxEvent.attempts,
+                OutboxEvent.created_at,
+            )
+            .where(OutboxEvent.locked_by == token)
+            .order_by(asc(OutboxEvent.id))
+        )).all()
+        return [ClaimedEvent(*row, token=token) for row in rows]
+
+    async def mark_done(
+        self, session: AsyncSession, event: ClaimedEvent
+    ) -> None:
+        await session.execute(
+            update(OutboxEvent)
+            .where(
+                OutboxEvent.id == event.id,
+                OutboxEvent.locked_by == event.token,
+            )
+            .values(
+                processed_at=datetime.now(),
+                locked_by=None,
+                locked_until=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def mark_failed(
+        self,
+        session: AsyncSession,
+        event: ClaimedEvent,
+        error: str,
+        retry_at: Optional[datetime],
+    ) -> None:
+        """Release the lease; without `retry_at` the event is given up."""
+        values = {
+            'locked_by': None,
+            'locked_until': None,
+            'last_error': error,
+        }
+        if retry_at is None:
+            values.update(processed_at=datetime.now(), failed=True)
+        else:
+            values['available_at'] = retry_at
+        await session.execute(
+            update(OutboxEvent)
+            .where(
+                OutboxEvent.id == event.id,
+                OutboxEvent.locked_by == event.token,
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def get_lag(self, session: AsyncSession) -> OutboxLag:
+        row = (await session.execute(
+            select(func.count(), func.min(OutboxEvent.created_at))
+            .where(OutboxEvent.processed_at.is_(None))
+        )).one()
+        return OutboxLag(*row)
+
+    async def purge_processed(
+        self, session: AsyncSession, older_than: datetime
+    ) -> int:
+        """Delete delivered events; failed ones are kept for inspection."""
+        result = await session.execute(
+            delete(OutboxEvent)
+            .where(
+                OutboxEvent.processed_at < older_than,
+                OutboxEvent.failed.is_(False),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+
+outbox_crud = CRUDOutbox(OutboxEvent)
@@ -0,0 +1,28 @@
+"""Portable SQL functions compiled per dialect (SQLite / PostgreSQL)."""
+from sqlalchemy import Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class seconds_between(FunctionElement):
+    """Whole seconds from the first datetime argument to the second."""
+    type = Integer()
+    name = 'seconds_between'
+    inherit_cache = True
+
+
+@compiles(seconds_between)
+def compile_seconds_between(element, compiler, **kw):
+    start, end = (compiler.process(arg, **kw) for arg in element.clauses)
+    return (
+        f'CAST(ROUND(EXTRACT(EPOCH FROM ({end} - {start}))) AS INTEGER)'
+    )
+
+
+@compiles(seconds_between, 'sqlite')
+def compile_seconds_between_sqlite(element, compiler, **kw):
+    start, end = (compiler.process(arg, **kw) for arg in element.clauses)
+    return (
+        f'CAST(ROUND((julianday({end}) - julianday({start})) * 86400) '
+        'AS INTEGER)'
+    )
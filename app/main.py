@@ -1,31 +1,184 @@
+"""Application factory.
+
+`create_app()` builds the FastAPI app; `app` is the instance used by
+`uvicorn app.main:app` and the tests, built on first access, so that
+importing the module (`uvicorn app.main:create_app --factory`, the
+CLI below) doesn't build a second one. Heavy optional dependencies
+(passlib/bcrypt, PyJWT) are imported on first use, and with
+`OPENAPI_STATIC=true` the checked-in `openapi.json` is served instead
+of generating the schema on the first `/docs` hit. Regenerate the file
+after changing endpoints or schemas:
+
+    python -m app.main --write-openapi openapi.json
+"""
+import argparse
+import asyncio
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
 from fastapi import FastAPI
 
 # Импортируем настройки проекта из config.py.
 from app.core.config import settings
 
+# Import models to ensure they are registered with SQLAlchemy Base
+# before metadata.create_all is called in tests.
 from app.models import charity_project, donation  # noqa: F401
+from app.models import donation_rollup, donor_summary, fund_stats  # noqa
+from app.models import archive, change_feed, idempotency, outbox  # noqa
+# Stamps change_seq on every write to projects and donations
+from app.services import change_feed as change_feed_stamping  # noqa
 # Важно: импортируем модель пользователя, чтобы таблица создавалась в тестах
 from app.models import auth_user  # noqa: F401
 
-# Устанавливаем заголовок приложения при помощи аргумента title,
-# в качестве значения указываем атрибут app_title объекта settings.
-app = FastAPI(title=settings.app_title, description=settings.app_description)
+OPENAPI_PATH = Path(__file__).resolve().parent.parent / "openapi.json"
 
-# Import models to ensure they are registered with SQLAlchemy Base
-# before metadata.create_all is called in tests.
+
+def include_routers(app: FastAPI) -> None:
+    from app.api.endpoints.auth import router as auth_router
+    from app.api.endpoints.changes import router as changes_router
+    from app.api.endpoints.charity_project import (
+        router as charity_project_router,
+    )
+    from app.api.endpoints.donation import router as donation_router
+    from app.api.endpoints.health import router as health_router
+    from app.api.endpoints.memory import router as memory_router
+    from app.api.endpoints.stats import router as stats_router
+
+    app.include_router(auth_router)
+    app.include_router(charity_project_router)
+    app.include_router(donation_router)
+    app.include_router(stats_router)
+    app.include_router(changes_router)
+    app.include_router(health_router)
+    app.include_router(memory_router)
+
+
+def add_warmup_handlers(app: FastAPI) -> None:
+    from app.core.security import setup_password_hashing
+    from app.services.warmup import WarmupState, run_warmup
+
+    app.state.warmup = WarmupState()
+
+    @app.on_event("startup")
+    def configure_password_hashing():
+        # bcrypt cost: fixed from settings or calibrated on this machine
+        setup_password_hashing()
+
+    @app.on_event("startup")
+    async def start_warmup():
+        # In the background: the process is live, but not ready until
+        # the warm-up has finished
+        if settings.warmup_enabled:
+            app.state.warmup_task = asyncio.create_task(
+                run_warmup(app.state.warmup)
+            )
+        else:
+            app.state.warmup.mark_skipped()
+
+    @app.on_event("shutdown")
+    async def cancel_warmup():
+        task = getattr(app.state, "warmup_task", None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+def add_background_handlers(app: FastAPI) -> None:
+    from app.services.outbox import outbox_pool
+    from app.services.progress import progress_broker
+    from app.services.progress_relay import ProgressRelayClient
+
+    @app.on_event("startup")
+    async def start_outbox_workers():
+        # OUTBOX_WORKERS workers and the purge of delivered events
+        await outbox_pool.start()
+
+    @app.on_event("shutdown")
+    async def stop_outbox_workers():
+        await outbox_pool.stop()
+
+    @app.on_event("startup")
+    async def connect_progress_relay():
+        # Share progress deltas with other app processes, if configured
+        if settings.progress_relay_address:
+            app.state.progress_relay = ProgressRelayClient(
+                progress_broker, settings.progress_relay_address
+            )
+            await app.state.progress_relay.start()
+
+    @app.on_event("shutdown")
+    async def disconnect_progress_relay():
+        relay = getattr(app.state, "progress_relay", None)
+        if relay is not None:
+            await relay.stop()
+
+
+def use_static_openapi(app: FastAPI, path: Path) -> None:
+    """Serve the schema from `path` (read on first request)."""
+    schema: Optional[Dict[str, Any]] = None
+
+    def openapi() -> Dict[str, Any]:
+        nonlocal schema
+        if schema is None:
+            schema = json.loads(path.read_text(encoding="utf-8"))
+        return schema
+
+    app.openapi = openapi
+
+
+def create_app(openapi_static: Optional[bool] = None) -> FastAPI:
+    # Устанавливаем заголовок приложения при помощи аргумента title,
+    # в качестве значения указываем атрибут app_title объекта settings.
+    app = FastAPI(
+        title=settings.app_title, description=settings.app_description
+    )
+    add_warmup_handlers(app)
+    add_background_handlers(app)
+    include_routers(app)
+    if settings.request_log_path:
+        from app.core.request_log import RequestRecorder
+
+        app.add_middleware(RequestRecorder, path=settings.request_log_path)
+    if settings.profile_dir:
+        from app.core.profiling import RequestProfiler
+
+        app.add_middleware(
+            RequestProfiler,
+            directory=settings.profile_dir,
+            max_files=settings.profile_max_files,
+        )
+    if openapi_static is None:
+        openapi_static = settings.openapi_static
+    if openapi_static:
+        use_static_openapi(app, OPENAPI_PATH)
+    return app
+
+
+_app: Optional[FastAPI] = None
+
+
+def __getattr__(name: str) -> Any:
+    global _app
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _app is None:
+        _app = create_app()
+    return _app
 
 
-# Routers
-from app.api.endpoints.charity_project import (  # noqa: E402
-    router as charity_project_router,
-)
-from app.api.endpoints.donation import (  # noqa: E402
-    router as donation_router,
-)
-from app.api.endpoints.auth import (  # noqa: E402
-    router as auth_router,
-)
-
-app.include_router(auth_router)
-app.include_router(charity_project_router)
-app.include_router(donation_router)
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Application utilities.")
+    parser.add_argument(
+        "--write-openapi", metavar="PATH", type=Path,
+        help="write the generated OpenAPI schema to PATH",
+    )
+    args = parser.parse_args()
+    if args.write_openapi is None:
+        parser.error("nothing to do")
+    schema = create_app(openapi_static=False).openapi()
+    args.write_openapi.write_text(
+        json.dumps(schema, ensure_ascii=False, indent=2) + "\n",
+        encoding="utf-8",
+    )
@@ -0,0 +1,13 @@
+from typing import Optional
+
+
+def remaining_amount_default(context) -> Optional[int]:
+    """`remaining_amount` of a project or donation inserted without one."""
+    if context is None:
+        # Asked outside of an INSERT (e.g. by test factories): None lets
+        # the ORM fall back to this default at flush time
+        return None
+    params = context.get_current_parameters()
+    if params.get('fully_invested'):
+        return 0
+    return params['full_amount'] - (params.get('invested_amount') or 0)
@@ -0,0 +1,47 @@
+from datetime import datetime
+from sqlalchemy import (
+    BigInteger, Boolean, Column, DateTime, Integer, String, Text,
+)
+
+from app.core.db import Base
+from app.core.constants import PROJECT_NAME_MAX_LEN
+
+
+class CharityProjectArchive(Base):
+    """Closed projects moved out of `charity_project` (same ids)."""
+    __tablename__ = 'charity_project_archive'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    # Names stay unique across both tables, see ensure_unique_project_name
+    name = Column(
+        String(PROJECT_NAME_MAX_LEN),
+        unique=True,
+        nullable=False,
+        index=True,
+    )
+    description = Column(Text, nullable=False)
+    full_amount = Column(Integer, nullable=False)
+    invested_amount = Column(Integer, nullable=False)
+    fully_invested = Column(Boolean, nullable=False)
+    remaining_amount = Column(Integer, nullable=False)
+    create_date = Column(DateTime, nullable=False)
+    close_date = Column(DateTime, nullable=True)
+    change_seq = Column(BigInteger, nullable=True)
+    archived_at = Column(DateTime, nullable=False, default=datetime.now)
+
+
+class DonationArchive(Base):
+    """Fully invested donations moved out of `donation` (same ids)."""
+    __tablename__ = 'donation_archive'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, nullable=False, index=True)
+    comment = Column(Text, nullable=True)
+    full_amount = Column(Integer, nullable=False)
+    invested_amount = Column(Integer, nullable=False)
+    fully_invested = Column(Boolean, nullable=False)
+    remaining_amount = Column(Integer, nullable=False)
+    create_date = Column(DateTime, nullable=False)
+    close_date = Column(DateTime, nullable=True)
+    change_seq = Column(BigInteger, nullable=True)
+    archived_at = Column(DateTime, nullable=False, default=datetime.now)
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+
+from app.core.constants import CHANGE_ENTITY_MAX_LEN
+from app.core.db import Base
+
+# The sequence counter lives in a single row with this id
+CHANGE_SEQUENCE_ID = 1
+
+
+class ChangeSequence(Base):
+    """Last `change_seq` handed out to a write."""
+    __tablename__ = 'change_sequence'
+
+    id = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+
+class ChangeTombstone(Base):
+    """A deleted row, kept so the change feed can report the deletion."""
+    __tablename__ = 'change_tombstone'
+
+    change_seq = Column(BigInteger, primary_key=True, autoincrement=False)
+    entity = Column(String(CHANGE_ENTITY_MAX_LEN), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.now)
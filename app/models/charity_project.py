@@ -1,8 +1,11 @@
 from datetime import datetime
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+from sqlalchemy import (
+    BigInteger, Boolean, Column, DateTime, Index, Integer, String, Text,
+)
 
 from app.core.db import Base
 from app.core.constants import PROJECT_NAME_MAX_LEN
+from app.models.amounts import remaining_amount_default
 
 
 class CharityProject(Base):
@@ -19,5 +22,40 @@ class CharityProject(Base):
     full_amount = Column(Integer, nullable=False)
     invested_amount = Column(Integer, nullable=False, default=0)
     fully_invested = Column(Boolean, nullable=False, default=False)
+    # full_amount - invested_amount (0 once closed), kept by the allocation
+    remaining_amount = Column(
+        Integer, nullable=False, default=remaining_amount_default
+    )
     create_date = Column(DateTime, nullable=False, default=datetime.now)
     close_date = Column(DateTime, nullable=True)
+    # Stamped on every insert/update, see app.services.change_feed
+    change_seq = Column(BigInteger, nullable=True, unique=True, index=True)
+
+    __table_args__ = (
+        # Partial index for reports over closed projects only
+        Index(
+            'ix_charity_project_closed',
+            'create_date',
+            'close_date',
+            sqlite_where=fully_invested.is_(True),
+            postgresql_where=fully_invested.is_(True),
+        ),
+        # The archiving job scans closed projects by close_date
+        Index(
+            'ix_charity_project_close_date',
+            'close_date',
+            sqlite_where=fully_invested.is_(True),
+            postgresql_where=fully_invested.is_(True),
+        ),
+        # The allocation queue: only projects that can still take money
+        Index(
+            'ix_charity_project_queue',
+            'create_date',
+            'id',
+            sqlite_where=remaining_amount > 0,
+            postgresql_where=remaining_amount > 0,
+        ),
+        # Never reuse ids of rows moved to the archive (SQLite would
+        # otherwise hand out max(id) + 1 again)
+        {'sqlite_autoincrement': True},
+    )
@@ -1,7 +1,10 @@
 from datetime import datetime
-from sqlalchemy import Boolean, Column, DateTime, Integer, Text
+from sqlalchemy import (
+    BigInteger, Boolean, Column, DateTime, Index, Integer, Text,
+)
 
 from app.core.db import Base
+from app.models.amounts import remaining_amount_default
 
 
 class Donation(Base):
@@ -13,5 +16,33 @@ class Donation(Base):
     full_amount = Column(Integer, nullable=False)
     invested_amount = Column(Integer, nullable=False, default=0)
     fully_invested = Column(Boolean, nullable=False, default=False)
+    # full_amount - invested_amount (0 once closed), kept by the allocation
+    remaining_amount = Column(
+        Integer, nullable=False, default=remaining_amount_default
+    )
     create_date = Column(DateTime, nullable=False, default=datetime.now)
     close_date = Column(DateTime, nullable=True)
+    # Stamped on every insert/update, see app.services.change_feed
+    change_seq = Column(BigInteger, nullable=True, unique=True, index=True)
+
+    __table_args__ = (
+        # Partial index for the archiving job: closed donations only, so
+        # inserts of new (open) donations don't maintain it
+        Index(
+            'ix_donation_closed',
+            'close_date',
+            sqlite_where=fully_invested.is_(True),
+            postgresql_where=fully_invested.is_(True),
+        ),
+        # The allocation queue: only donations that can still give money
+        Index(
+            'ix_donation_queue',
+            'create_date',
+            'id',
+            sqlite_where=remaining_amount > 0,
+            postgresql_where=remaining_amount > 0,
+        ),
+        # Never reuse ids of rows moved to the archive (SQLite would
+        # otherwise hand out max(id) + 1 again)
+        {'sqlite_autoincrement': True},
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, DateTime, Integer, String
+
+from app.core.constants import ROLLUP_GRANULARITY_MAX_LEN
+from app.core.db import Base
+
+
+class DonationRollup(Base):
+    """Donation volume per time bucket, maintained incrementally."""
+    __tablename__ = 'donation_rollup'
+
+    granularity = Column(String(ROLLUP_GRANULARITY_MAX_LEN), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    donation_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Integer, nullable=False, default=0)
+    invested_amount = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, DateTime, Integer
+
+from app.core.db import Base
+
+
+class DonorSummary(Base):
+    """Per-user donation totals maintained incrementally."""
+    __tablename__ = 'donor_summary'
+
+    user_id = Column(Integer, primary_key=True)
+    donation_count = Column(Integer, nullable=False, default=0)
+    total_donated = Column(Integer, nullable=False, default=0)
+    total_invested = Column(Integer, nullable=False, default=0)
+    last_donation_date = Column(DateTime, nullable=True)
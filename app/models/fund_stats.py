@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer
+
+from app.core.db import Base
+
+# The aggregate lives in a single row with this id
+FUND_STATS_ID = 1
+
+
+class FundStats(Base):
+    """Fund-wide totals maintained incrementally by the write paths."""
+    __tablename__ = 'fund_stats'
+
+    id = Column(Integer, primary_key=True)
+    total_donated = Column(Integer, nullable=False, default=0)
+    total_invested = Column(Integer, nullable=False, default=0)
+    uninvested_balance = Column(Integer, nullable=False, default=0)
+    open_projects = Column(Integer, nullable=False, default=0)
+    closed_projects = Column(Integer, nullable=False, default=0)
+    open_donations = Column(Integer, nullable=False, default=0)
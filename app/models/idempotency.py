@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    JSON, Column, DateTime, Integer, String, UniqueConstraint,
+)
+
+from app.core.constants import (
+    IDEMPOTENCY_FINGERPRINT_LEN, IDEMPOTENCY_KEY_MAX_LEN,
+    IDEMPOTENCY_SCOPE_MAX_LEN,
+)
+from app.core.db import Base
+
+
+class IdempotencyKey(Base):
+    """Response of a create request, replayed for retries with its key.
+
+    The row is inserted at the start of the request's transaction and
+    gets the response just before its commit, so a concurrent duplicate
+    blocks on the unique (scope, key) index until the first one is done.
+    """
+    __tablename__ = 'idempotency_key'
+
+    id = Column(Integer, primary_key=True)
+    # Route and user: keys of different users never clash
+    scope = Column(String(IDEMPOTENCY_SCOPE_MAX_LEN), nullable=False)
+    key = Column(String(IDEMPOTENCY_KEY_MAX_LEN), nullable=False)
+    # sha256 of the request body: a reused key with another body is an error
+    fingerprint = Column(String(IDEMPOTENCY_FINGERPRINT_LEN), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response = Column(JSON, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint('scope', 'key', name='uq_idempotency_key_scope_key'),
+    )
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    JSON, Boolean, Column, DateTime, Index, Integer, String, Text,
+)
+
+from app.core.constants import (
+    OUTBOX_EVENT_TYPE_MAX_LEN, OUTBOX_LOCK_TOKEN_MAX_LEN,
+)
+from app.core.db import Base
+
+
+class OutboxEvent(Base):
+    """Post-commit work, written in the same transaction as the change.
+
+    Workers lease pending events (`locked_by`/`locked_until`) and mark
+    them processed; an expired lease makes the event claimable again.
+    """
+    __tablename__ = 'outbox_event'
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String(OUTBOX_EVENT_TYPE_MAX_LEN), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    available_at = Column(DateTime, nullable=False, default=datetime.now)
+    attempts = Column(Integer, nullable=False, default=0)
+    locked_by = Column(String(OUTBOX_LOCK_TOKEN_MAX_LEN), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    processed_at = Column(DateTime, nullable=True)
+    failed = Column(Boolean, nullable=False, default=False)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # Workers only ever scan pending events
+        Index(
+            'ix_outbox_event_pending',
+            'available_at',
+            'id',
+            sqlite_where=processed_at.is_(None),
+            postgresql_where=processed_at.is_(None),
+        ),
+    )
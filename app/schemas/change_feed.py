@@ -0,0 +1,22 @@
+from typing import List, Literal, Optional, Union
+
+from pydantic import BaseModel
+
+from app.schemas.charity_project import CharityProjectRead
+from app.schemas.donation import DonationAdminRead
+
+
+class ChangeRead(BaseModel):
+    seq: int
+    entity: Literal['charity_project', 'donation']
+    op: Literal['upsert', 'delete']
+    id: int
+    # Current row for upserts, None for deletions
+    data: Optional[Union[CharityProjectRead, DonationAdminRead]] = None
+
+
+class ChangesRead(BaseModel):
+    changes: List[ChangeRead]
+    # Pass as `since` to get the following changes
+    next_since: int
+    has_more: bool
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, conint, constr
 
@@ -34,3 +34,17 @@ class CharityProjectRead(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class CharityProjectBatchRead(BaseModel):
+    items: List[CharityProjectRead]
+    # Requested ids that don't exist
+    missing: List[int]
+
+
+class CharityProjectSpeedRead(BaseModel):
+    id: int
+    name: str
+    create_date: datetime
+    close_date: datetime
+    duration_seconds: int
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, conint
 
@@ -12,6 +12,25 @@ class DonationCreate(BaseModel):
         extra = 'forbid'
 
 
+class DonationImportRow(DonationCreate):
+    """A row of a bulk import; the donor defaults to the importing user."""
+    user_id: Optional[conint(strict=True, gt=0)] = None
+
+
+class DonationImportError(BaseModel):
+    line: int
+    error: str
+
+
+class DonationImportRead(BaseModel):
+    imported: int = 0
+    invested_amount: int = 0
+    failed: int = 0
+    batches: int = 0
+    # The first IMPORT_MAX_ERRORS of `failed`
+    errors: List[DonationImportError] = []
+
+
 class DonationRead(BaseModel):
     id: int
     full_amount: int
@@ -34,3 +53,28 @@ class DonationAdminRead(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class DonationBatchRead(BaseModel):
+    items: List[DonationAdminRead]
+    missing: List[int]
+
+
+class DonorSummaryRead(BaseModel):
+    donation_count: int = 0
+    total_donated: int = 0
+    total_invested: int = 0
+    last_donation_date: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class DonationRollupRead(BaseModel):
+    bucket_start: datetime
+    donation_count: int
+    total_amount: int
+    invested_amount: int
+
+    class Config:
+        orm_mode = True
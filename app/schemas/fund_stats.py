@@ -0,0 +1,17 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class FundStatsRead(BaseModel):
+    total_donated: int
+    total_invested: int
+    uninvested_balance: int
+    open_projects: int
+    closed_projects: int
+    open_donations: int
+
+
+class FundStatsCheck(BaseModel):
+    consistent: bool
+    mismatches: Dict[str, Dict[str, int]]
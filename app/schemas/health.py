@@ -0,0 +1,12 @@
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+
+class WarmupRead(BaseModel):
+    ready: bool
+    skipped: bool
+    attempts: int
+    duration_ms: Optional[float] = None
+    steps_ms: Dict[str, float]
+    error: Optional[str] = None
@@ -0,0 +1,35 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class TracemallocStatus(BaseModel):
+    tracing: bool
+    frames: int
+    traced_bytes: int
+    traced_peak_bytes: int
+    has_baseline: bool
+
+
+class MemoryRead(BaseModel):
+    rss_bytes: Optional[int]
+    gc_objects: int
+    orm_instances: Dict[str, int]
+    sessions: int
+    identity_map_objects: int
+    caches: Dict[str, int]
+    tracemalloc: TracemallocStatus
+
+
+class AllocationSite(BaseModel):
+    site: str
+    size: int
+    count: int
+    # Only when compared with the baseline snapshot
+    size_diff: Optional[int] = None
+    count_diff: Optional[int] = None
+
+
+class AllocationTopRead(BaseModel):
+    compared: bool
+    sites: List[AllocationSite]
@@ -0,0 +1,16 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class OutboxStatsRead(BaseModel):
+    workers: int
+    running: bool
+    pending: int
+    oldest_pending_age_seconds: Optional[float]
+    delivered: int
+    retried: int
+    failed: int
+    batches: int
+    last_lag_seconds: float
+    max_lag_seconds: float
@@ -0,0 +1,212 @@
+"""Bookkeeping that accompanies every change of the fund's money.
+
+The endpoints call these after allocation has been flushed and before
+their commit, so the aggregates are updated in the same transaction as
+the rows (and generated values such as ids and dates are available).
+Slower follow-up work is queued into the outbox (`app.services.outbox`)
+in the same transaction and runs after the commit.
+"""
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.donation_rollup import donation_rollup_crud
+from app.crud.donor_summary import donor_summary_crud
+from app.crud.fund_stats import fund_stats_crud
+from app.crud.outbox import outbox_crud
+from app.models.charity_project import CharityProject
+from app.models.donation import Donation
+from app.services.investment import Investment
+from app.services.outbox import (
+    DONATION_CREATED, DONATION_FULLY_INVESTED, PROJECT_CLOSED,
+)
+
+
+def closing_events(
+    projects: Iterable[CharityProject],
+    donations: Iterable[Donation],
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Outbox events for those of the given objects that are now closed."""
+    events = []
+    for project in {project.id: project for project in projects}.values():
+        if project.fully_invested:
+            events.append((PROJECT_CLOSED, {"project_id": project.id}))
+    for donation in {donation.id: donation for donation in donations}.values():
+        if donation.fully_invested:
+            events.append((DONATION_FULLY_INVESTED, {
+                "donation_id": donation.id,
+                "user_id": donation.user_id,
+            }))
+    return events
+
+
+async def queue_closing_events(
+    session: AsyncSession,
+    projects: Iterable[CharityProject],
+    donations: Iterable[Donation],
+) -> None:
+    await outbox_crud.add_many(session, closing_events(projects, donations))
+
+
+async def record_donation_created(
+    session: AsyncSession,
+    donation: Donation,
+    investments: List[Investment],
+) -> None:
+    invested = sum(investment.amount for investment in investments)
+    closed_projects = sum(
+        1 for investment in investments if investment.project.fully_invested
+    )
+    await fund_stats_crud.add(
+        session,
+        total_donated=donation.full_amount,
+        total_invested=invested,
+        uninvested_balance=donation.full_amount - invested,
+        open_projects=-closed_projects,
+        closed_projects=closed_projects,
+        open_donations=0 if donation.fully_invested else 1,
+    )
+    await donor_summary_crud.add(
+        session,
+        donation.user_id,
+        last_donation_date=donation.create_date,
+        donation_count=1,
+        total_donated=donation.full_amount,
+        total_invested=invested,
+    )
+    await donation_rollup_crud.add(
+        session,
+        donation.create_date,
+        donation_count=1,
+        total_amount=donation.full_amount,
+        invested_amount=invested,
+    )
+    # One executemany, however many projects the donation closed
+    await outbox_crud.add_many(session, [
+        (DONATION_CREATED, {
+            "donation_id": donation.id,
+            "user_id": donation.user_id,
+            "amount": donation.full_amount,
+        }),
+        *closing_events(
+            (investment.project for investment in investments), [donation]
+        ),
+    ])
+
+
+async def record_donations_imported(
+    session: AsyncSession,
+    donations: List[Donation],
+    investments: List[Investment],
+) -> None:
+    """`record_donation_created` for a batch, with aggregated updates."""
+    total = sum(donation.full_amount for donation in donations)
+    invested = sum(investment.amount for investment in investments)
+    closed_projects = len({
+        investment.project.id for investment in investments
+        if investment.project.fully_invested
+    })
+    await fund_stats_crud.add(
+        session,
+        total_donated=total,
+        total_invested=invested,
+        uninvested_balance=total - invested,
+        open_projects=-closed_projects,
+        closed_projects=closed_projects,
+        open_donations=sum(
+            1 for donation in donations if not donation.fully_invested
+        ),
+    )
+    summaries = {}
+    last_dates = {}
+    for donation in donations:
+        summary = summaries.setdefault(donation.user_id, Counter())
+        summary["donation_count"] += 1
+        summary["total_donated"] += donation.full_amount
+        summary["total_invested"] += donation.invested_amount
+        last_dates[donation.user_id] = max(
+            donation.create_date,
+            last_dates.get(donation.user_id, donation.create_date),
+        )
+    await donor_summary_crud.add_many(
+        session, summaries.items(), last_donation_dates=last_dates
+    )
+    await donation_rollup_crud.add_many(session, (
+        (donation.create_date, {
+            "donation_count": 1,
+            "total_amount": donation.full_amount,
+            "invested_amount": donation.invested_amount,
+        })
+        for donation in donations
+    ))
+    await outbox_crud.add_many(session, chain(
+        (
+            (DONATION_CREATED, {
+                "donation_id": donation.id,
+                "user_id": donation.user_id,
+                "amount": donation.full_amount,
+            })
+            for donation in donations
+        ),
+        closing_events(
+            (investment.project for investment in investments), donations
+        ),
+    ))
+
+
+async def record_project_created(
+    session: AsyncSession,
+    project: CharityProject,
+    investments: List[Investment],
+) -> None:
+    invested = sum(investment.amount for investment in investments)
+    closed_donations = sum(
+        1 for investment in investments
+        if investment.donation.fully_invested
+    )
+    await fund_stats_crud.add(
+        session,
+        total_invested=invested,
+        uninvested_balance=-invested,
+        open_projects=0 if project.fully_invested else 1,
+        closed_projects=1 if project.fully_invested else 0,
+        open_donations=-closed_donations,
+    )
+    invested_by_user = Counter()
+    for investment in investments:
+        invested_by_user[investment.donation.user_id] += investment.amount
+    await donor_summary_crud.add_many(session, (
+        (user_id, {"total_invested": amount})
+        for user_id, amount in invested_by_user.items()
+    ))
+    await donation_rollup_crud.add_many(session, (
+        (
+            investment.donation.create_date,
+            {"invested_amount": investment.amount},
+        )
+        for investment in investments
+    ))
+    await queue_closing_events(
+        session,
+        [project],
+        (investment.donation for investment in investments),
+    )
+
+
+async def record_project_closed(
+    session: AsyncSession,
+    project: CharityProject,
+) -> None:
+    """A project closed without allocation (its goal was lowered)."""
+    await fund_stats_crud.add(session, open_projects=-1, closed_projects=1)
+    outbox_crud.add(session, PROJECT_CLOSED, project_id=project.id)
+
+
+async def record_project_removed(
+    session: AsyncSession,
+    project: CharityProject,
+) -> None:
+    # Only open projects without investments can be removed
+    await fund_stats_crud.add(session, open_projects=-1)
@@ -0,0 +1,71 @@
+"""Hot/cold archiving of closed projects and donations.
+
+Fully invested rows are never touched by allocation again. Moving the
+old ones into `charity_project_archive` / `donation_archive` keeps the
+hot tables and their indexes small, so the open-queue queries and
+donation inserts don't slow down as history grows:
+
+    python -m app.services.archive --older-than-days 30 --batch-size 1000
+
+Each batch is moved in its own short transaction. Archived rows keep
+their ids and their last `change_seq`; they simply stop appearing in
+the change feed (no tombstone: they were not deleted). List endpoints
+return them with `?include_archived=true`.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.crud.archive import donation_archive_crud, project_archive_crud
+
+
+async def archive_closed(
+    session_factory=AsyncSessionLocal,
+    older_than: Optional[timedelta] = None,
+    batch_size: Optional[int] = None,
+) -> Dict[str, int]:
+    """Move rows closed more than `older_than` ago, batch by batch.
+
+    Returns the number of moved rows per hot table.
+    """
+    if older_than is None:
+        older_than = timedelta(days=settings.archive_after_days)
+    if batch_size is None:
+        batch_size = settings.archive_batch_size
+    closed_before = datetime.now() - older_than
+    moved = {}
+    async with session_factory() as session:
+        for crud in (project_archive_crud, donation_archive_crud):
+            table = crud.hot_model.__tablename__
+            moved[table] = 0
+            while True:
+                count = await crud.move_closed(
+                    session, closed_before, batch_size
+                )
+                await session.commit()
+                moved[table] += count
+                if count < batch_size:
+                    break
+    return moved
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Move old closed projects and donations to history.'
+    )
+    parser.add_argument(
+        '--older-than-days', type=float, default=settings.archive_after_days
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=settings.archive_batch_size
+    )
+    args = parser.parse_args()
+    counts = asyncio.run(archive_closed(
+        older_than=timedelta(days=args.older_than_days),
+        batch_size=args.batch_size,
+    ))
+    for table, rows in counts.items():
+        print(f'{table}: {rows} rows archived')
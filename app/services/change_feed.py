@@ -0,0 +1,68 @@
+"""Change feed: a global, monotonically increasing `change_seq`.
+
+Every flush that inserts or updates projects or donations (allocation
+included) takes the next numbers from the single-row `change_sequence`
+counter and stamps them on the rows; deletions leave a tombstone with
+their own number. The counter row stays locked by the UPDATE until the
+transaction ends, so numbers become visible in commit order and a
+consumer reading `change_seq > cursor` never skips a late commit.
+"""
+from typing import List
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.change_feed import (
+    CHANGE_SEQUENCE_ID, ChangeSequence, ChangeTombstone,
+)
+from app.models.charity_project import CharityProject
+from app.models.donation import Donation
+
+TRACKED_MODELS = (CharityProject, Donation)
+
+
+def next_change_seqs(session: Session, amount: int) -> List[int]:
+    """Reserve `amount` consecutive sequence numbers."""
+    connection = session.connection()
+    result = connection.execute(
+        update(ChangeSequence)
+        .where(ChangeSequence.id == CHANGE_SEQUENCE_ID)
+        .values(value=ChangeSequence.value + amount)
+    )
+    if result.rowcount == 0:
+        connection.execute(
+            insert(ChangeSequence).values(id=CHANGE_SEQUENCE_ID, value=amount)
+        )
+        last = amount
+    else:
+        last = connection.execute(
+            select(ChangeSequence.value)
+            .where(ChangeSequence.id == CHANGE_SEQUENCE_ID)
+        ).scalar_one()
+    return list(range(last - amount + 1, last + 1))
+
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_change_seq(session, flush_context, instances):
+    changed = [
+        obj for obj in session.new
+        if isinstance(obj, TRACKED_MODELS)
+    ] + [
+        obj for obj in session.dirty
+        if isinstance(obj, TRACKED_MODELS) and
+        session.is_modified(obj, include_collections=False)
+    ]
+    deleted = [
+        obj for obj in session.deleted if isinstance(obj, TRACKED_MODELS)
+    ]
+    if not changed and not deleted:
+        return
+    seqs = iter(next_change_seqs(session, len(changed) + len(deleted)))
+    for obj in changed:
+        obj.change_seq = next(seqs)
+    for obj in deleted:
+        session.add(ChangeTombstone(
+            change_seq=next(seqs),
+            entity=obj.__tablename__,
+            entity_id=obj.id,
+        ))
@@ -0,0 +1,244 @@
+"""Bulk import of offline donations from a streamed NDJSON or CSV body.
+
+Rows are validated like `POST /donation/` bodies (`DonationImportRow`:
+`full_amount`, `comment` and an optional donor `user_id`). Valid rows
+are inserted `batch_size` at a time with one executemany. Each batch is
+allocated FIFO in a single pass over the open project queue and
+committed with its bookkeeping. Invalid rows, and rows whose `user_id`
+is not a registered user (checked with one query per batch), are
+reported by line number and skipped. Only one line, one batch and the first
+`IMPORT_MAX_ERRORS` errors are held in memory, whatever the size of
+the upload.
+
+CSV needs a header line and one row per line (no quoted line breaks).
+"""
+import csv
+import json
+from datetime import datetime
+from typing import (
+    Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple,
+)
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.constants import IMPORT_MAX_ERRORS, IMPORT_MAX_LINE_BYTES
+from app.core.user import existing_user_ids
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.models.donation import Donation
+from app.schemas.donation import (
+    DonationImportError, DonationImportRead, DonationImportRow,
+)
+from app.services.accounting import record_donations_imported
+from app.services.change_feed import next_change_seqs
+from app.services.investment import allocate_donations_in_order
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+IMPORT_FIELDS = tuple(DonationImportRow.__fields__)
+# CSV cells arrive as text; these are converted to int before validation
+CSV_INT_FIELDS = ('full_amount', 'user_id')
+
+
+class RowError(ValueError):
+    pass
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int = IMPORT_MAX_LINE_BYTES,
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """`(line number, line)`; None instead of a line that is too long."""
+    buffer = b''
+    number = 0
+    skipping = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            number += 1
+            yield number, None if skipping else line
+            skipping = False
+        if len(buffer) > max_line_bytes:
+            # Drop the rest of the line instead of buffering it
+            buffer = b''
+            skipping = True
+    if buffer or skipping:
+        yield number + 1, None if skipping else buffer
+
+
+def validation_message(error: ValidationError) -> str:
+    return '; '.join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def parse_ndjson(text: str) -> Dict[str, Any]:
+    try:
+        row = json.loads(text)
+    except ValueError as error:
+        raise RowError(f'invalid JSON: {error}')
+    if not isinstance(row, dict):
+        raise RowError('expected a JSON object')
+    return row
+
+
+def parse_csv(text: str, header: Sequence[str]) -> Dict[str, Any]:
+    cells = next(csv.reader([text]))
+    if len(cells) != len(header):
+        raise RowError(f'expected {len(header)} columns, got {len(cells)}')
+    row = {}
+    for name, cell in zip(header, cells):
+        if cell == '':
+            continue
+        if name in CSV_INT_FIELDS and cell.strip().lstrip('-').isdigit():
+            row[name] = int(cell)
+        else:
+            row[name] = cell
+    return row
+
+
+def parse_csv_header(text: str) -> List[str]:
+    header = [name.strip() for name in next(csv.reader([text]))]
+    unknown = set(header) - set(IMPORT_FIELDS)
+    if unknown:
+        raise RowError(f'unknown CSV columns: {", ".join(sorted(unknown))}')
+    return header
+
+
+class DonationImport:
+    """Feeds parsed lines into batches and keeps the report."""
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        format: str,
+        default_user_id: int,
+        batch_size: int,
+    ):
+        self.session = session
+        self.format = format
+        self.header: Optional[List[str]] = None
+        self.default_user_id = default_user_id
+        self.batch_size = batch_size
+        # (line number, donation) pairs
+        self.batch: List[Tuple[int, Donation]] = []
+        self.report = DonationImportRead()
+
+    def fail(self, line: int, message: str) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < IMPORT_MAX_ERRORS:
+            self.report.errors.append(
+                DonationImportError(line=line, error=message)
+            )
+
+    def parse(self, line: int, raw: Optional[bytes]) -> Optional[Dict]:
+        """The line as a row dict; None for blank or header lines."""
+        if raw is None:
+            raise RowError('line is too long')
+        try:
+            text = raw.decode('utf-8-sig' if line == 1 else 'utf-8').strip()
+        except UnicodeDecodeError:
+            raise RowError('not valid UTF-8')
+        if not text:
+            return None
+        if self.format == NDJSON:
+            return parse_ndjson(text)
+        if self.header is None:
+            self.header = parse_csv_header(text)
+            return None
+        return parse_csv(text, self.header)
+
+    async def feed(self, line: int, raw: Optional[bytes]) -> None:
+        try:
+            row = self.parse(line, raw)
+        except RowError as error:
+            if self.format == CSV and self.header is None:
+                # Nothing can be read without a valid header
+                raise
+            self.fail(line, str(error))
+            return
+        if row is not None:
+            await self.add(line, row)
+
+    async def add(self, line: int, row: Dict[str, Any]) -> None:
+        try:
+            donation_in = DonationImportRow.parse_obj(row)
+        except ValidationError as error:
+            self.fail(line, validation_message(error))
+            return
+        # Transient: inserted in bulk by `flush`, not by the ORM
+        self.batch.append((line, Donation(
+            user_id=donation_in.user_id or self.default_user_id,
+            comment=donation_in.comment,
+            full_amount=donation_in.full_amount,
+            invested_amount=0,
+            fully_invested=False,
+        )))
+        if len(self.batch) >= self.batch_size:
+            await self.flush()
+
+    async def known_donors(
+        self, batch: List[Tuple[int, Donation]]
+    ) -> List[Donation]:
+        """Donations of `batch` by registered users; fails the rest."""
+        # The importing superuser, used for rows without a user_id, exists
+        user_ids = {donation.user_id for _, donation in batch}
+        user_ids.discard(self.default_user_id)
+        if not user_ids:
+            return [donation for _, donation in batch]
+        unknown = user_ids - await existing_user_ids(self.session, user_ids)
+        donations = []
+        for line, donation in batch:
+            if donation.user_id in unknown:
+                self.fail(line, f'unknown user_id {donation.user_id}')
+            else:
+                donations.append(donation)
+        return donations
+
+    async def flush(self) -> None:
+        batch, self.batch = self.batch, []
+        donations = await self.known_donors(batch)
+        if not donations:
+            return
+        session = self.session
+        # Reloaded per batch: the queue may have changed between commits
+        projects = await charity_project_crud.get_open_ordered(session)
+        investments = allocate_donations_in_order(donations, projects)
+        now = datetime.now()
+        seqs = await session.run_sync(next_change_seqs, len(donations))
+        for donation, change_seq in zip(donations, seqs):
+            donation.create_date = now
+            donation.change_seq = change_seq
+        await donation_crud.insert_many(session, donations)
+        # Projects (and their change_seq) go through the ORM as usual
+        await session.flush()
+        await record_donations_imported(session, donations, investments)
+        await session.commit()
+        self.report.imported += len(donations)
+        self.report.invested_amount += sum(
+            investment.amount for investment in investments
+        )
+        self.report.batches += 1
+
+
+async def import_donations(
+    session: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    format: str,
+    default_user_id: int,
+    batch_size: int,
+) -> DonationImportRead:
+    """Import donations from the body `chunks` (see module docstring).
+
+    Raises `RowError` for a CSV body without a valid header.
+    """
+    donation_import = DonationImport(
+        session, format, default_user_id, batch_size
+    )
+    async for line, raw in iter_lines(chunks):
+        await donation_import.feed(line, raw)
+    await donation_import.flush()
+    return donation_import.report
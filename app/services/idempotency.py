@@ -0,0 +1,195 @@
+"""`Idempotency-Key` support for create endpoints.
+
+A client retrying `POST /donation/` after a timeout sends the same key;
+the stored response is replayed instead of creating a second donation
+and re-running the allocation:
+
+    async with idempotent(session, scope, key, payload) as call:
+        if call.replay is not None:
+            return call.replay
+        ...  # the work, flushed in `session`
+        call.store(response)
+        await session.commit()
+
+The key row is flushed first and gets the response in the same commit
+as the work, so a failed request leaves nothing behind and can simply
+be retried. Duplicates running concurrently in this process wait on a
+per-key lock; in other processes they wait on the unique index and
+replay the response once the first request has committed. Expired keys
+are deleted along the way, by the first new key claimed in each
+`PURGE_INTERVAL_SECONDS`.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.memory import caches
+from app.crud.idempotency import idempotency_crud
+from app.models.idempotency import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+# Expired keys are purged at most this often per process
+PURGE_INTERVAL_SECONDS = 60
+
+
+class KeyLocks:
+    """asyncio locks per key, dropped once nobody holds or awaits them."""
+
+    def __init__(self):
+        self._locks: Dict[str, List[Any]] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: str) -> AsyncIterator[None]:
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+idempotency_locks = KeyLocks()
+caches.register('idempotency_locks', idempotency_locks)
+
+
+class PurgeSchedule:
+    """Tells when a purge is due in this process."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._purged_at: Optional[float] = None
+
+    def due(self) -> bool:
+        now = time.monotonic()
+        if (
+            self._purged_at is not None and
+            now - self._purged_at < self.interval
+        ):
+            return False
+        self._purged_at = now
+        return True
+
+
+expired_keys_purge = PurgeSchedule(PURGE_INTERVAL_SECONDS)
+
+
+def fingerprint(payload: BaseModel) -> str:
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True)
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def replay_response(record: IdempotencyKey) -> JSONResponse:
+    return JSONResponse(
+        content=record.response,
+        status_code=record.status_code,
+        headers={REPLAYED_HEADER: 'true'},
+    )
+
+
+class IdempotentCall:
+    def __init__(self, record: Optional[IdempotencyKey] = None):
+        self.record = record
+        self.replay: Optional[JSONResponse] = None
+
+    def store(
+        self, response: Any, status_code: int = status.HTTP_200_OK
+    ) -> None:
+        """Keep `response` for retries; saved by the request's commit."""
+        if self.record is not None:
+            self.record.response = jsonable_encoder(response)
+            self.record.status_code = status_code
+
+
+async def find_replay(
+    session: AsyncSession, scope: str, key: str, request_fingerprint: str
+) -> Optional[JSONResponse]:
+    """The stored response for `key`, or None if it is unused/expired."""
+    record = await idempotency_crud.get_by_key(session, scope, key)
+    if record is None:
+        return None
+    if record.expires_at <= datetime.now():
+        await session.delete(record)
+        await session.flush()
+        return None
+    if record.fingerprint != request_fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='Idempotency-Key was used with another request body',
+        )
+    return replay_response(record)
+
+
+async def claim(
+    session: AsyncSession, scope: str, key: str, request_fingerprint: str
+) -> IdempotentCall:
+    replay = await find_replay(session, scope, key, request_fingerprint)
+    if replay is not None:
+        call = IdempotentCall()
+        call.replay = replay
+        return call
+    if expired_keys_purge.due():
+        # Commits with the request: no background task needed
+        await idempotency_crud.purge_expired(session, datetime.now())
+    record = IdempotencyKey(
+        scope=scope,
+        key=key,
+        fingerprint=request_fingerprint,
+        expires_at=datetime.now() + timedelta(
+            hours=settings.idempotency_ttl_hours
+        ),
+    )
+    session.add(record)
+    try:
+        # Waits here while another process holds the same key
+        await session.flush()
+    except IntegrityError:
+        await session.rollback()
+        call = IdempotentCall()
+        call.replay = await find_replay(
+            session, scope, key, request_fingerprint
+        )
+        if call.replay is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail='A request with this Idempotency-Key is in progress',
+            )
+        return call
+    return IdempotentCall(record)
+
+
+@asynccontextmanager
+async def idempotent(
+    session: AsyncSession,
+    scope: str,
+    key: Optional[str],
+    payload: BaseModel,
+) -> AsyncIterator[IdempotentCall]:
+    """Run a create request at most once per `(scope, key)`.
+
+    Without a key the request runs as usual (`call.replay` is None and
+    `call.store` does nothing).
+    """
+    if key is None:
+        yield IdempotentCall()
+        return
+    async with idempotency_locks.hold(f'{scope}:{key}'):
+        yield await claim(session, scope, key, fingerprint(payload))
@@ -1,82 +1,121 @@
 from datetime import datetime
-from typing import Iterable
+from typing import Iterable, List, NamedTuple
 
 from app.models.charity_project import CharityProject
 from app.models.donation import Donation
 
 
+class Investment(NamedTuple):
+    """A single transfer made by the allocation."""
+    project: CharityProject
+    donation: Donation
+    amount: int
+
+
 def now_truncated_to_seconds() -> datetime:
     return datetime.now().replace(microsecond=0)
 
 
+def remaining(obj) -> int:
+    """Amount `obj` can still take or give.
+
+    Counters of a row that hasn't been flushed yet are still None: fill
+    them in first.
+    """
+    if obj.invested_amount is None:
+        obj.invested_amount = 0
+    if obj.remaining_amount is None:
+        obj.remaining_amount = obj.full_amount - obj.invested_amount
+    return obj.remaining_amount
+
+
+def close(obj) -> None:
+    obj.remaining_amount = 0
+    obj.fully_invested = True
+    obj.close_date = now_truncated_to_seconds()
+
+
+def invest(
+    project: CharityProject,
+    donation: Donation,
+    amount: int,
+) -> Investment:
+    for obj in (project, donation):
+        obj.invested_amount += amount
+        obj.remaining_amount -= amount
+        if obj.remaining_amount <= 0:
+            close(obj)
+    return Investment(project, donation, amount)
+
+
 def allocate_donations_to_project(
     project: CharityProject,
     donations: Iterable[Donation],
-) -> None:
+) -> List[Investment]:
+    investments: List[Investment] = []
     if project.fully_invested:
-        return
-    # Coalesce possibly None invested_amount before first commit
-    if project.invested_amount is None:
-        project.invested_amount = 0
-    needed = project.full_amount - project.invested_amount
-    if needed <= 0:
-        project.fully_invested = True
-        project.close_date = now_truncated_to_seconds()
-        return
+        return investments
+    if remaining(project) <= 0:
+        close(project)
+        return investments
 
     for donation in donations:
-        if needed <= 0:
+        if project.remaining_amount <= 0:
             break
-        if donation.invested_amount is None:
-            donation.invested_amount = 0
-        available = donation.full_amount - donation.invested_amount
+        available = remaining(donation)
         if available <= 0:
             continue
-        to_invest = min(available, needed)
-        donation.invested_amount += to_invest
-        project.invested_amount += to_invest
-        needed -= to_invest
-
-        if donation.invested_amount >= donation.full_amount:
-            donation.fully_invested = True
-            donation.close_date = now_truncated_to_seconds()
-
-    if project.invested_amount >= project.full_amount:
-        project.fully_invested = True
-        project.close_date = now_truncated_to_seconds()
+        investments.append(invest(
+            project, donation, min(available, project.remaining_amount)
+        ))
+    return investments
 
 
 def allocate_projects_for_donation(
     donation: Donation,
     projects: Iterable[CharityProject],
-) -> None:
+) -> List[Investment]:
+    investments: List[Investment] = []
     if donation.fully_invested:
-        return
-    if donation.invested_amount is None:
-        donation.invested_amount = 0
-    available = donation.full_amount - donation.invested_amount
-    if available <= 0:
-        donation.fully_invested = True
-        donation.close_date = now_truncated_to_seconds()
-        return
+        return investments
+    if remaining(donation) <= 0:
+        close(donation)
+        return investments
 
     for project in projects:
-        if available <= 0:
+        if donation.remaining_amount <= 0:
             break
-        if project.invested_amount is None:
-            project.invested_amount = 0
-        needed = project.full_amount - project.invested_amount
+        needed = remaining(project)
         if needed <= 0:
             continue
-        to_invest = min(available, needed)
-        project.invested_amount += to_invest
-        donation.invested_amount += to_invest
-        available -= to_invest
-
-        if project.invested_amount >= project.full_amount:
-            project.fully_invested = True
-            project.close_date = now_truncated_to_seconds()
-
-    if donation.invested_amount >= donation.full_amount:
-        donation.fully_invested = True
-        donation.close_date = now_truncated_to_seconds()
+        investments.append(invest(
+            project, donation, min(needed, donation.remaining_amount)
+        ))
+    return investments
+
+
+def allocate_donations_in_order(
+    donations: Iterable[Donation],
+    projects: Iterable[CharityProject],
+) -> List[Investment]:
+    """Allocate several new donations, oldest first, in one queue pass.
+
+    Same result as `allocate_projects_for_donation` per donation, but
+    filled projects are not scanned again for every next donation.
+    """
+    investments: List[Investment] = []
+    queue = iter(projects)
+    project = next(queue, None)
+    for donation in donations:
+        if remaining(donation) <= 0:
+            close(donation)
+            continue
+        while project is not None and donation.remaining_amount > 0:
+            needed = 0 if project.fully_invested else remaining(project)
+            if needed <= 0:
+                project = next(queue, None)
+                continue
+            investments.append(invest(
+                project, donation, min(needed, donation.remaining_amount)
+            ))
+    return investments
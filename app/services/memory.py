@@ -0,0 +1,139 @@
+"""Memory diagnostics for `GET /memory/` and `/memory/tracemalloc/*`.
+
+Everything here inspects the current worker process only. Counting
+live ORM instances walks every object tracked by the garbage
+collector, and tracemalloc slows allocations down while it traces, so
+these are tools for investigating a leak, not for routine monitoring:
+
+1. `POST /memory/tracemalloc/start`, then `POST .../snapshot` for a
+   baseline;
+2. let traffic run;
+3. `GET /memory/tracemalloc/top?compare=true` for the allocation sites
+   that grew since the baseline, `POST .../stop` when done.
+"""
+import gc
+import os
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.db import Base
+from app.core.memory import caches
+
+# Allocations of tracemalloc itself and of the import machinery
+IGNORED_FILES = (tracemalloc.__file__, '<frozen importlib._bootstrap>')
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux), None elsewhere."""
+    try:
+        with open('/proc/self/statm') as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def orm_instance_counts(objects: List[object]) -> Dict[str, int]:
+    """Live instances of every mapped class among `objects`."""
+    classes = {
+        mapper.class_: mapper.class_.__name__
+        for mapper in Base.registry.mappers
+    }
+    counts = Counter(
+        classes[type(obj)] for obj in objects if type(obj) in classes
+    )
+    return {name: counts.get(name, 0) for name in sorted(classes.values())}
+
+
+def session_stats(objects: List[object]) -> Dict[str, int]:
+    """Live ORM sessions and the objects held in their identity maps."""
+    sessions = [obj for obj in objects if isinstance(obj, Session)]
+    return {
+        'sessions': len(sessions),
+        'identity_map_objects': sum(
+            len(session.identity_map) for session in sessions
+        ),
+    }
+
+
+class AllocationTracer:
+    """tracemalloc start/stop and a baseline snapshot to compare with."""
+
+    def __init__(self):
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int) -> None:
+        if not self.tracing:
+            tracemalloc.start(frames)
+        self.baseline = None
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self.baseline = None
+
+    def take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, filename) for filename in IGNORED_FILES
+        ])
+
+    def save_baseline(self) -> None:
+        self.baseline = self.take_snapshot()
+
+    def top(
+        self, limit: int, group_by: str, compare: bool
+    ) -> List[Dict[str, object]]:
+        """The largest allocation sites, or the largest growths since
+        the baseline with `compare`.
+        """
+        snapshot = self.take_snapshot()
+        if compare and self.baseline is not None:
+            stats = snapshot.compare_to(self.baseline, group_by)
+        else:
+            stats = snapshot.statistics(group_by)
+        return [
+            {
+                # Most recent call first: "leaf <- caller <- ..."
+                'site': ' <- '.join(
+                    str(frame) for frame in reversed(stat.traceback)
+                ),
+                'size': stat.size,
+                'count': stat.count,
+                'size_diff': getattr(stat, 'size_diff', None),
+                'count_diff': getattr(stat, 'count_diff', None),
+            }
+            for stat in stats[:limit]
+        ]
+
+    def status(self) -> Dict[str, object]:
+        current, peak = (
+            tracemalloc.get_traced_memory() if self.tracing else (0, 0)
+        )
+        return {
+            'tracing': self.tracing,
+            'frames': tracemalloc.get_traceback_limit(),
+            'traced_bytes': current,
+            'traced_peak_bytes': peak,
+            'has_baseline': self.baseline is not None,
+        }
+
+
+allocation_tracer = AllocationTracer()
+
+
+def memory_report() -> Dict[str, object]:
+    objects = gc.get_objects()
+    return {
+        'rss_bytes': rss_bytes(),
+        'gc_objects': len(objects),
+        'orm_instances': orm_instance_counts(objects),
+        **session_stats(objects),
+        'caches': caches.sizes(),
+        'tracemalloc': allocation_tracer.status(),
+    }
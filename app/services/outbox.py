@@ -0,0 +1,274 @@
+"""Transactional outbox: post-commit work run by background workers.
+
+`app.services.accounting` writes events into `outbox_event` in the same
+transaction as the money moves, so an event exists if and only if the
+change was committed. A pool of asyncio workers leases due events in
+batches and runs the handlers registered for their type. Delivery is
+at-least-once: an event whose worker died is re-delivered once its
+lease expires, so handlers must be idempotent. Delivered events are
+purged after `OUTBOX_RETENTION_HOURS` by a task of its own, which runs
+even in a process without workers.
+"""
+import asyncio
+import logging
+import traceback
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.constants import OUTBOX_MAX_RETRY_SECONDS
+from app.core.db import AsyncSessionLocal
+from app.crud.outbox import ClaimedEvent, outbox_crud
+from app.services.reports import fundraising_speed_rows
+
+DONATION_CREATED = 'donation_created'
+DONATION_FULLY_INVESTED = 'donation_fully_invested'
+PROJECT_CLOSED = 'project_closed'
+# Delivered events are purged at most this often
+PURGE_INTERVAL_SECONDS = 60
+
+logger = logging.getLogger(__name__)
+
+OutboxHandler = Callable[[AsyncSession, Dict[str, Any]], Awaitable[None]]
+
+
+class OutboxHandlers:
+    """Handlers per event type; all of them run in one transaction."""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[OutboxHandler]] = defaultdict(list)
+
+    def register(self, event_type: str):
+        def decorator(handler: OutboxHandler) -> OutboxHandler:
+            self._handlers[event_type].append(handler)
+            return handler
+        return decorator
+
+    def for_type(self, event_type: str) -> List[OutboxHandler]:
+        return self._handlers.get(event_type, [])
+
+
+outbox_handlers = OutboxHandlers()
+
+
+class OutboxMetrics:
+    """Delivery counters and lag (commit-to-delivery delay)."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.delivered = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    def observe_delivery(self, created_at: datetime) -> None:
+        lag = max((datetime.now() - created_at).total_seconds(), 0.0)
+        self.delivered += 1
+        self.last_lag_seconds = lag
+        self.max_lag_seconds = max(self.max_lag_seconds, lag)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'delivered': self.delivered,
+            'retried': self.retried,
+            'failed': self.failed,
+            'batches': self.batches,
+            'last_lag_seconds': round(self.last_lag_seconds, 6),
+            'max_lag_seconds': round(self.max_lag_seconds, 6),
+        }
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff: retry_seconds, 2x, 4x, ... capped."""
+    return min(
+        settings.outbox_retry_seconds * 2 ** max(attempts - 1, 0),
+        OUTBOX_MAX_RETRY_SECONDS,
+    )
+
+
+class OutboxWorkerPool:
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        handlers: OutboxHandlers = outbox_handlers,
+        *,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        lease_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        purge_interval: float = PURGE_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.handlers = handlers
+        self.workers = (
+            settings.outbox_workers if workers is None else workers
+        )
+        self.batch_size = batch_size or settings.outbox_batch_size
+        self.poll_interval = (
+            settings.outbox_poll_interval
+            if poll_interval is None else poll_interval
+        )
+        self.lease_seconds = lease_seconds or settings.outbox_lease_seconds
+        self.max_attempts = max_attempts or settings.outbox_max_attempts
+        self.purge_interval = purge_interval
+        self.metrics = OutboxMetrics()
+        self._tasks: List[asyncio.Task] = []
+        self._purge_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether workers are delivering events in this process."""
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        if self._purge_task is not None:
+            return
+        self._purge_task = asyncio.create_task(self._purge_periodically())
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._work())
+            for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        if self._purge_task is not None:
+            tasks.append(self._purge_task)
+            self._purge_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._wakeup = None
+
+    def wake(self) -> None:
+        """Skip the poll delay: new events were just committed."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                claimed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Outbox worker iteration failed')
+                claimed = 0
+            if claimed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), self.poll_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def run_once(self) -> int:
+        """Claim one batch and deliver it; returns the batch size."""
+        async with self.session_factory() as session:
+            events = await outbox_crud.claim(
+                session, self.batch_size, self.lease_seconds
+            )
+            await session.commit()
+        if not events:
+            return 0
+        self.metrics.batches += 1
+        for event in events:
+            await self.deliver(event)
+        return len(events)
+
+    async def deliver(self, event: ClaimedEvent) -> None:
+        # Handlers' writes and the "processed" mark commit together
+        async with self.session_factory() as session:
+            try:
+                for handler in self.handlers.for_type(event.event_type):
+                    await handler(session, event.payload)
+                await outbox_crud.mark_done(session, event)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                error = traceback.format_exc()
+            else:
+                self.metrics.observe_delivery(event.created_at)
+                return
+            if event.attempts >= self.max_attempts:
+                retry_at = None
+                self.metrics.failed += 1
+                logger.error(
+                    'Outbox event %s (%s) failed permanently',
+                    event.id, event.event_type,
+                )
+            else:
+                retry_at = datetime.now() + timedelta(
+                    seconds=retry_delay(event.attempts)
+                )
+                self.metrics.retried += 1
+            await outbox_crud.mark_failed(session, event, error, retry_at)
+            await session.commit()
+
+    async def _purge_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                await self.purge()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Housekeeping only: retried after the next interval
+                logger.exception('Outbox purge failed')
+
+    async def purge(self) -> int:
+        """Delete events delivered more than the retention time ago."""
+        async with self.session_factory() as session:
+            purged = await outbox_crud.purge_processed(
+                session,
+                datetime.now() -
+                timedelta(hours=settings.outbox_retention_hours),
+            )
+            await session.commit()
+        return purged
+
+
+outbox_pool = OutboxWorkerPool()
+outbox_crud.on_new_events = outbox_pool.wake
+
+
+@outbox_handlers.register(PROJECT_CLOSED)
+async def warm_closed_projects_report(
+    session: AsyncSession, payload: Dict[str, Any]
+) -> None:
+    # The closing commit bumped closed_projects: refill the report cache
+    async for _ in fundraising_speed_rows(session):
+        pass
+
+
+@outbox_handlers.register(DONATION_FULLY_INVESTED)
+async def notify_donor(
+    session: AsyncSession, payload: Dict[str, Any]
+) -> None:
+    # Stand-in for e-mail/push notifications
+    logger.info(
+        'Donation %s of user %s is fully invested',
+        payload['donation_id'], payload['user_id'],
+    )
+
+
+@outbox_handlers.register(DONATION_CREATED)
+async def send_donation_receipt(
+    session: AsyncSession, payload: Dict[str, Any]
+) -> None:
+    # Stand-in for the donor's receipt (e-mail/push)
+    logger.info(
+        'Donation %s of %s from user %s received',
+        payload['donation_id'], payload['amount'], payload['user_id'],
+    )
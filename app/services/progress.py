@@ -0,0 +1,170 @@
+"""Live funding progress of projects for the SSE stream.
+
+Committed allocation changes are published as compact deltas to an
+in-process broker that fans them out to every subscriber. Each
+subscriber has a bounded buffer: a consumer that can't keep up is
+dropped (it gets a `reset` and reconnects) instead of making the
+publisher wait or buffer without bounds. With several app processes
+the deltas are also exchanged through a relay, see
+`app.services.progress_relay`.
+"""
+import asyncio
+import json
+from itertools import chain
+from typing import (
+    Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set,
+)
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import on_commit
+from app.core.memory import caches
+from app.models.charity_project import CharityProject
+
+PROGRESS_FIELDS = ('invested_amount', 'fully_invested')
+# Queued after the buffered deltas of a dropped subscriber
+RESET = object()
+
+
+class Subscription:
+    def __init__(self, broker: 'ProgressBroker', max_queue: int):
+        self._broker = broker
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.dropped = False
+
+    def offer(self, delta: Dict[str, Any]) -> bool:
+        """Buffer a delta; False if the buffer is full."""
+        try:
+            self.queue.put_nowait(delta)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def drop(self) -> None:
+        # Whatever is buffered is stale now: the client has to reload
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESET)
+
+    async def get(self) -> Any:
+        return await self.queue.get()
+
+    def drain(self) -> List[Any]:
+        items = []
+        while not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        return items
+
+    def close(self) -> None:
+        self._broker.unsubscribe(self)
+
+
+class ProgressBroker:
+    """In-process fan-out of project progress deltas."""
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self.subscribers: Set[Subscription] = set()
+        # Receives locally published deltas (cross-process relay)
+        self.forward: Optional[Callable[[Dict[str, Any]], None]] = None
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, self.max_queue)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscribers.discard(subscription)
+
+    def publish(self, delta: Dict[str, Any], *, local: bool = True) -> None:
+        """Deliver to subscribers without waiting; never blocks."""
+        self.published += 1
+        for subscription in list(self.subscribers):
+            if not subscription.offer(delta):
+                self.unsubscribe(subscription)
+                subscription.drop()
+                self.dropped += 1
+        if local and self.forward is not None:
+            self.forward(delta)
+
+    def publish_many(self, deltas: Iterable[Dict[str, Any]]) -> None:
+        for delta in deltas:
+            self.publish(delta)
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
+
+
+progress_broker = ProgressBroker(settings.progress_queue_size)
+caches.register('progress_subscribers', progress_broker)
+
+
+def progress_delta(project: CharityProject) -> Dict[str, Any]:
+    return {
+        'id': project.id,
+        'invested_amount': project.invested_amount,
+        'fully_invested': project.fully_invested,
+    }
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_progress_deltas(session, flush_context):
+    deltas = []
+    for obj in chain(session.new, session.dirty):
+        if not isinstance(obj, CharityProject):
+            continue
+        state = inspect(obj)
+        if obj in session.new or any(
+            state.attrs[field].history.has_changes()
+            for field in PROGRESS_FIELDS
+        ):
+            deltas.append(progress_delta(obj))
+    if deltas:
+        on_commit(session, lambda: progress_broker.publish_many(deltas))
+
+
+def format_event(event_name: str, data: Any = None) -> str:
+    lines = [f'event: {event_name}']
+    if data is not None:
+        lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def progress_events(
+    broker: ProgressBroker,
+    keepalive_seconds: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """SSE stream for one subscriber; pending deltas go out in one chunk.
+
+    Subscribes on first iteration, so a client gone before the stream
+    started leaves nothing behind.
+    """
+    if keepalive_seconds is None:
+        keepalive_seconds = settings.progress_keepalive_seconds
+    subscription = broker.subscribe()
+    try:
+        yield f'retry: {settings.progress_retry_ms}\n\n'
+        while True:
+            try:
+                first = await asyncio.wait_for(
+                    subscription.get(), keepalive_seconds
+                )
+            except asyncio.TimeoutError:
+                # Keeps idle connections open through proxies
+                yield ': keepalive\n\n'
+                continue
+            chunk = []
+            for delta in [first, *subscription.drain()]:
+                if delta is RESET:
+                    chunk.append(format_event('reset'))
+                    yield ''.join(chunk)
+                    return
+                chunk.append(format_event('progress', delta))
+            yield ''.join(chunk)
+    finally:
+        subscription.close()
@@ -0,0 +1,160 @@
+"""Cross-process fan-out of progress deltas through a local relay.
+
+Each app process sends the deltas it publishes to the relay, and the
+relay forwards every line to all other connected processes, whose
+brokers pass it on to their own SSE subscribers. A stand-in for a real
+pub/sub broker when running several workers on one machine:
+
+    python -m app.services.progress_relay --port 8765
+    PROGRESS_RELAY_ADDRESS=127.0.0.1:8765 uvicorn app.main:app --workers 4
+"""
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.services.progress import ProgressBroker
+
+# Peers whose unsent output grows beyond this are disconnected
+MAX_WRITE_BUFFER = 1024 * 1024
+# Reconnect delay: doubles after every failed attempt, up to the maximum
+RECONNECT_SECONDS = 1.0
+MAX_RECONNECT_SECONDS = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+class ProgressRelay:
+    """Forwards newline-delimited messages to every other peer."""
+
+    def __init__(self):
+        self.peers: Set[asyncio.StreamWriter] = set()
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.peers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for peer in list(self.peers):
+                    if peer is writer:
+                        continue
+                    if (
+                        peer.transport.get_write_buffer_size() >
+                        MAX_WRITE_BUFFER
+                    ):
+                        self.peers.discard(peer)
+                        peer.close()
+                        continue
+                    peer.write(line)
+        except ConnectionError:
+            pass
+        finally:
+            self.peers.discard(writer)
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port)
+
+
+class ProgressRelayClient:
+    """Connects a broker to the relay, reconnecting when it goes away.
+
+    Deltas published while disconnected are not replayed: subscribers
+    of other processes catch up with the next delta of the project.
+    Lines that aren't a JSON object are logged and skipped.
+    """
+
+    def __init__(self, broker: ProgressBroker, address: str):
+        self.broker = broker
+        self.host, self.port = parse_address(address)
+        self.connected = asyncio.Event()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self.broker.forward = self.send
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self.broker.forward = None
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def send(self, delta: Dict[str, Any]) -> None:
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            return
+        writer.write(json.dumps(delta).encode() + b'\n')
+
+    def receive(self, line: bytes) -> None:
+        try:
+            delta = json.loads(line)
+        except ValueError:
+            delta = None
+        if not isinstance(delta, dict):
+            logger.warning('Skipping malformed relay line: %.200r', line)
+            return
+        self.broker.publish(delta, local=False)
+
+    async def _run(self) -> None:
+        delay = RECONNECT_SECONDS
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(
+                    self.host, self.port
+                )
+            except OSError as error:
+                logger.warning(
+                    'Progress relay unavailable (%s), retrying in %.0f s',
+                    error, delay,
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_SECONDS)
+                continue
+            delay = RECONNECT_SECONDS
+            self._writer = writer
+            self.connected.set()
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    self.receive(line)
+            # ValueError: a line longer than the reader's limit
+            except (OSError, ValueError) as error:
+                logger.warning('Progress relay connection lost: %s', error)
+            finally:
+                self.connected.clear()
+                self._writer = None
+                writer.close()
+            await asyncio.sleep(delay)
+
+
+async def serve_forever(host: str, port: int) -> None:
+    server = await ProgressRelay().serve(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Relay project progress deltas between app processes.'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(serve_forever(args.host, args.port))
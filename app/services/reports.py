@@ -0,0 +1,102 @@
+"""Superuser reports over closed projects, cached between closings."""
+import csv
+import io
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.memory import caches
+from app.crud.charity_project import charity_project_crud
+from app.crud.fund_stats import fund_stats_crud
+
+SPEED_REPORT_FIELDS = (
+    'id', 'name', 'create_date', 'close_date', 'duration_seconds',
+)
+# Larger reports are streamed but not kept in memory
+REPORT_CACHE_MAX_ROWS = 10000
+REPORT_CACHE_MAX_ENTRIES = 32
+
+
+class ClosedProjectsReportCache:
+    """Report rows keyed by `limit`, for one count of closed projects.
+
+    Closed projects never change, so the report can only change when
+    one more project closes, which bumps `fund_stats.closed_projects`.
+    The count is read from the database before serving, so closings
+    committed by other processes (workers, the import, CLI tools) make
+    the cached rows stale as well.
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self._entries: Dict[Optional[int], List[Dict[str, Any]]] = {}
+
+    def get(
+        self, limit: Optional[int], version: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        if version != self.version:
+            return None
+        return self._entries.get(limit)
+
+    def put(
+        self,
+        limit: Optional[int],
+        rows: List[Dict[str, Any]],
+        version: int,
+    ) -> None:
+        if version != self.version:
+            self.invalidate()
+            self.version = version
+        if len(self._entries) >= REPORT_CACHE_MAX_ENTRIES:
+            self._entries.clear()
+        self._entries[limit] = rows
+
+    def invalidate(self) -> None:
+        self.version = None
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+closed_projects_report = ClosedProjectsReportCache()
+caches.register('closed_projects_report', closed_projects_report)
+
+
+async def fundraising_speed_rows(
+    session: AsyncSession,
+    limit: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Closed projects, fastest funded first; from cache when possible."""
+    version = await fund_stats_crud.closed_projects(session)
+    cached = closed_projects_report.get(limit, version)
+    if cached is not None:
+        for row in cached:
+            yield row
+        return
+    rows: Optional[List[Dict[str, Any]]] = []
+    async for row in charity_project_crud.stream_closed_by_speed(
+        session, limit
+    ):
+        row = dict(row._mapping)
+        if rows is not None:
+            rows.append(row)
+            if len(rows) > REPORT_CACHE_MAX_ROWS:
+                rows = None
+        yield row
+    if rows is not None:
+        closed_projects_report.put(limit, rows, version)
+
+
+async def fundraising_speed_csv(
+    session: AsyncSession,
+    limit: Optional[int] = None,
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=SPEED_REPORT_FIELDS)
+    writer.writeheader()
+    async for row in fundraising_speed_rows(session, limit):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
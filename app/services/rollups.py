@@ -0,0 +1,83 @@
+"""Backfill of donation rollups from the donation history.
+
+Normally rollups are maintained by `app.services.accounting`; the
+backfill (re)builds them for data that predates them:
+
+    python -m app.services.rollups --chunk-size 10000
+"""
+import argparse
+import asyncio
+from sqlalchemy import asc, func, select, union_all
+
+from app.core.db import AsyncSessionLocal
+from app.crud.donation_rollup import donation_rollup_crud
+from app.models.archive import DonationArchive
+from app.models.donation import Donation
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+async def backfill_rollups(
+    session_factory=AsyncSessionLocal,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Rebuild rollups from scratch, committing after every chunk.
+
+    Only donations existing at start are processed: newer ones are
+    rolled up incrementally by the create endpoint meanwhile. Projects
+    created during the run may invest into not yet processed donations
+    and be counted twice, so run it while projects aren't being added.
+    Archived donations are included. Returns the number of donations
+    processed.
+    """
+    donation = union_all(*(
+        select(
+            model.id,
+            model.create_date,
+            model.full_amount,
+            model.invested_amount,
+        )
+        for model in (Donation, DonationArchive)
+    )).subquery()
+    async with session_factory() as session:
+        last_id = (await session.execute(
+            select(func.max(donation.c.id))
+        )).scalar() or 0
+        await donation_rollup_crud.clear(session)
+        await session.commit()
+
+        processed = 0
+        after_id = 0
+        while after_id < last_id:
+            rows = (await session.execute(
+                select(donation)
+                .where(donation.c.id > after_id, donation.c.id <= last_id)
+                .order_by(asc(donation.c.id))
+                .limit(chunk_size)
+            )).all()
+            if not rows:
+                break
+            await donation_rollup_crud.add_many(session, (
+                (row.create_date, {
+                    "donation_count": 1,
+                    "total_amount": row.full_amount,
+                    "invested_amount": row.invested_amount,
+                })
+                for row in rows
+            ))
+            await session.commit()
+            processed += len(rows)
+            after_id = rows[-1].id
+        return processed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rebuild donation rollups from history in chunks."
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE
+    )
+    args = parser.parse_args()
+    total = asyncio.run(backfill_rollups(chunk_size=args.chunk_size))
+    print(f"Rolled up {total} donations")
@@ -0,0 +1,417 @@
+"""Columnar snapshots of the fund database.
+
+A snapshot is a directory with a `manifest.json` and, per table column,
+a NumPy `.npy` file: int64, bool or datetime64[us] arrays, or for
+strings a `uint8` heap with `int64` offsets (row i is
+`heap[offsets[i]:offsets[i + 1]]`). Nullable columns get a boolean
+`.null.npy` mask. All files are memory-mapped, both when written and
+when read, so neither side holds a whole table in memory:
+
+    python -m app.services.snapshot export ./snapshot
+    python -m app.services.snapshot import ./snapshot --chunk-size 50000
+
+Analytics and reconciliation tools open it without a database:
+
+    snapshot = Snapshot.open('./snapshot')
+    amounts = snapshot['donation'].column('full_amount')  # np.memmap
+
+NumPy is an optional dependency (`pip install numpy`). Only the source
+tables are stored, with the archives of `app.services.archive`. After
+a restore, fund statistics, donor summaries and donation rollups are
+rebuilt. The change sequence is moved past the restored `change_seq`
+values; `--replace` also clears the change feed's tombstones, which
+describe deletions of the replaced rows.
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import (
+    Boolean, DateTime, Integer, String, Table, delete, func, insert,
+    select, text,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import AsyncSessionLocal
+from app.crud.donor_summary import donor_summary_crud
+from app.crud.fund_stats import fund_stats_crud
+from app.models.archive import CharityProjectArchive, DonationArchive
+from app.models.auth_user import AuthUser
+from app.models.change_feed import (
+    CHANGE_SEQUENCE_ID, ChangeSequence, ChangeTombstone,
+)
+from app.models.charity_project import CharityProject
+from app.models.donation import Donation
+
+SNAPSHOT_FORMAT = 'qrkot-columnar-snapshot'
+SNAPSHOT_VERSION = 1
+MANIFEST = 'manifest.json'
+DEFAULT_CHUNK_SIZE = 50000
+TABLES: Sequence[Table] = (
+    AuthUser.__table__,
+    CharityProject.__table__,
+    Donation.__table__,
+    CharityProjectArchive.__table__,
+    DonationArchive.__table__,
+)
+KINDS = {
+    'int64': 'int64',
+    'bool': 'bool',
+    'datetime': 'datetime64[us]',
+}
+
+
+def load_numpy():
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError(
+            'Columnar snapshots need NumPy: pip install numpy'
+        ) from error
+    return numpy
+
+
+def column_kind(column) -> str:
+    # Boolean first: it is not an Integer subclass, but be explicit
+    if isinstance(column.type, Boolean):
+        return 'bool'
+    if isinstance(column.type, Integer):
+        return 'int64'
+    if isinstance(column.type, DateTime):
+        return 'datetime'
+    if isinstance(column.type, String):
+        return 'string'
+    raise TypeError(
+        f'{column.table.name}.{column.name}: '
+        f'unsupported type {column.type!r}'
+    )
+
+
+class StringColumn:
+    """Lazily decoded strings over a heap and offsets (zero-copy)."""
+
+    def __init__(self, heap, offsets, nulls=None):
+        self.heap = heap
+        self.offsets = offsets
+        self.nulls = nulls
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        if self.nulls is not None and self.nulls[index]:
+            return None
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return bytes(self.heap[start:end]).decode('utf-8')
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+class SnapshotTable:
+    def __init__(self, path: Path, name: str, meta: Dict[str, Any]):
+        self.path = path
+        self.name = name
+        self.rows: int = meta['rows']
+        self.columns: Dict[str, Dict[str, Any]] = meta['columns']
+
+    def _load(self, file_name: str):
+        numpy = load_numpy()
+        path = self.path / file_name
+        if path.stat().st_size and self.rows:
+            return numpy.load(path, mmap_mode='r')
+        # Empty arrays can't be memory-mapped
+        return numpy.load(path)
+
+    def nulls(self, name: str):
+        """Boolean mask of NULLs, or None for a NOT NULL column."""
+        if not self.columns[name]['nullable']:
+            return None
+        return self._load(f'{self.name}.{name}.null.npy')
+
+    def column(self, name: str):
+        """A memory-mapped array, or a `StringColumn` for strings."""
+        kind = self.columns[name]['kind']
+        prefix = f'{self.name}.{name}'
+        if kind == 'string':
+            heap_path = self.path / f'{prefix}.heap'
+            numpy = load_numpy()
+            heap = (
+                numpy.memmap(heap_path, dtype='uint8', mode='r')
+                if heap_path.stat().st_size else
+                numpy.empty(0, dtype='uint8')
+            )
+            return StringColumn(
+                heap, self._load(f'{prefix}.offsets.npy'), self.nulls(name)
+            )
+        return self._load(f'{prefix}.npy')
+
+    def chunks(self, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Rows as dicts of Python values, `chunk_size` at a time."""
+        columns = {name: self.column(name) for name in self.columns}
+        masks = {name: self.nulls(name) for name in self.columns}
+        for start in range(0, self.rows, chunk_size):
+            end = min(start + chunk_size, self.rows)
+            values = {}
+            for name, column in columns.items():
+                if isinstance(column, StringColumn):
+                    values[name] = [column[i] for i in range(start, end)]
+                    continue
+                chunk = column[start:end].tolist()
+                mask = masks[name]
+                if mask is not None:
+                    chunk = [
+                        None if null else value
+                        for value, null in zip(chunk, mask[start:end])
+                    ]
+                values[name] = chunk
+            yield [
+                {name: values[name][i] for name in values}
+                for i in range(end - start)
+            ]
+
+
+class Snapshot:
+    def __init__(self, path: Path, manifest: Dict[str, Any]):
+        self.path = path
+        self.manifest = manifest
+        self.tables = {
+            name: SnapshotTable(path, name, meta)
+            for name, meta in manifest['tables'].items()
+        }
+
+    @classmethod
+    def open(cls, path) -> 'Snapshot':
+        path = Path(path)
+        manifest = json.loads((path / MANIFEST).read_text(encoding='utf-8'))
+        if manifest.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f'{path} is not a columnar snapshot')
+        if manifest['version'] > SNAPSHOT_VERSION:
+            raise ValueError(
+                f'Snapshot version {manifest["version"]} is newer than '
+                f'supported {SNAPSHOT_VERSION}'
+            )
+        return cls(path, manifest)
+
+    def __getitem__(self, name: str) -> SnapshotTable:
+        return self.tables[name]
+
+
+class TableWriter:
+    """Fills preallocated memory-mapped column files chunk by chunk."""
+
+    def __init__(self, path: Path, table: Table, rows: int):
+        numpy = load_numpy()
+        self.numpy = numpy
+        self.table = table
+        self.rows = rows
+        self.written = 0
+        self.meta = {'rows': rows, 'columns': {}}
+        self.arrays = {}
+        self.heaps = {}
+        self.heap_sizes = {}
+        for column in table.columns:
+            kind = column_kind(column)
+            prefix = path / f'{table.name}.{column.name}'
+            self.meta['columns'][column.name] = {
+                'kind': kind, 'nullable': bool(column.nullable),
+            }
+            if kind == 'string':
+                self.arrays[column.name] = self._open(
+                    Path(f'{prefix}.offsets.npy'), 'int64', rows + 1
+                )
+                self.arrays[column.name][0] = 0
+                self.heaps[column.name] = open(f'{prefix}.heap', 'wb')
+                self.heap_sizes[column.name] = 0
+            else:
+                self.arrays[column.name] = self._open(
+                    Path(f'{prefix}.npy'), KINDS[kind], rows
+                )
+            if column.nullable:
+                self.arrays[f'{column.name}.null'] = self._open(
+                    Path(f'{prefix}.null.npy'), 'bool', rows
+                )
+
+    def _open(self, path: Path, dtype: str, length: int):
+        if length == 0:
+            self.numpy.save(path, self.numpy.empty(0, dtype=dtype))
+            return self.numpy.empty(0, dtype=dtype)
+        return self.numpy.lib.format.open_memmap(
+            path, mode='w+', dtype=dtype, shape=(length,)
+        )
+
+    def write(self, rows: Sequence[Any]) -> None:
+        numpy = self.numpy
+        start, end = self.written, self.written + len(rows)
+        # select(table) returns columns in table order
+        for index, column in enumerate(self.table.columns):
+            name = column.name
+            values = [row[index] for row in rows]
+            if column.nullable:
+                self.arrays[f'{name}.null'][start:end] = [
+                    value is None for value in values
+                ]
+            if name in self.heaps:
+                encoded = [(value or '').encode('utf-8') for value in values]
+                ends = numpy.cumsum(
+                    [len(item) for item in encoded], dtype='int64'
+                )
+                self.arrays[name][start + 1:end + 1] = (
+                    self.heap_sizes[name] + ends
+                )
+                self.heaps[name].write(b''.join(encoded))
+                self.heap_sizes[name] += int(ends[-1]) if len(ends) else 0
+                continue
+            if column_kind(column) != 'datetime':
+                values = [0 if value is None else value for value in values]
+            # None becomes NaT for datetimes
+            self.arrays[name][start:end] = numpy.array(
+                values, dtype=self.arrays[name].dtype
+            )
+        self.written = end
+
+    def close(self) -> None:
+        for heap in self.heaps.values():
+            heap.close()
+        for array in self.arrays.values():
+            if isinstance(array, self.numpy.memmap):
+                array.flush()
+        if self.written != self.rows:
+            raise RuntimeError(
+                f'{self.table.name}: expected {self.rows} rows, '
+                f'got {self.written}'
+            )
+
+
+async def export_snapshot(
+    path,
+    session_factory=AsyncSessionLocal,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    tables: Sequence[Table] = TABLES,
+) -> Dict[str, int]:
+    """Dump `tables` into `path` from one consistent read transaction."""
+    load_numpy()
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        'format': SNAPSHOT_FORMAT,
+        'version': SNAPSHOT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'tables': {},
+    }
+    async with session_factory() as session:
+        async with session.begin():
+            for table in tables:
+                rows = (await session.execute(
+                    select(func.count()).select_from(table)
+                )).scalar_one()
+                writer = TableWriter(path, table, rows)
+                result = await session.stream(
+                    select(table).order_by(*table.primary_key.columns)
+                )
+                async for chunk in result.partitions(chunk_size):
+                    writer.write(chunk)
+                writer.close()
+                manifest['tables'][table.name] = writer.meta
+    (path / MANIFEST).write_text(
+        json.dumps(manifest, indent=2), encoding='utf-8'
+    )
+    return {
+        name: meta['rows'] for name, meta in manifest['tables'].items()
+    }
+
+
+async def reset_sequences(session: AsyncSession, tables: Sequence[Table]):
+    """Move id sequences (PostgreSQL) and `change_seq` past restored rows
+    and the remaining tombstones."""
+    if session.sync_session.get_bind().dialect.name == 'postgresql':
+        for table in tables:
+            await session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'),"
+                f" COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1,"
+                f" false)"
+            ))
+    last_seq = 0
+    for table in [*tables, ChangeTombstone.__table__]:
+        if 'change_seq' in table.columns:
+            last_seq = max(last_seq, (await session.execute(
+                select(func.max(table.c.change_seq))
+            )).scalar() or 0)
+    await session.execute(delete(ChangeSequence))
+    await session.execute(insert(ChangeSequence).values(
+        id=CHANGE_SEQUENCE_ID, value=last_seq
+    ))
+
+
+async def import_snapshot(
+    path,
+    session_factory=AsyncSessionLocal,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    replace: bool = False,
+) -> Dict[str, int]:
+    """Bulk-insert a snapshot, committing after every chunk.
+
+    The tables must be empty unless `replace` is set, which deletes
+    their rows first. It also deletes the change feed's tombstones: the
+    restored ids may exist again, and a feed reader must not be told
+    they were deleted.
+    """
+    from app.services.rollups import backfill_rollups
+
+    snapshot = Snapshot.open(path)
+    tables = [table for table in TABLES if table.name in snapshot.tables]
+    restored = {}
+    async with session_factory() as session:
+        if replace:
+            await session.execute(delete(ChangeTombstone))
+        for table in reversed(tables):
+            if replace:
+                await session.execute(delete(table))
+            elif (await session.execute(
+                select(func.count()).select_from(table)
+            )).scalar_one():
+                raise RuntimeError(
+                    f'Table {table.name} is not empty (use --replace)'
+                )
+        await session.commit()
+        for table in tables:
+            restored[table.name] = 0
+            for rows in snapshot[table.name].chunks(chunk_size):
+                # executemany with one compiled INSERT per chunk
+                await session.execute(insert(table), rows)
+                await session.commit()
+                restored[table.name] += len(rows)
+        await reset_sequences(session, tables)
+        await fund_stats_crud.rebuild(session)
+        await donor_summary_crud.rebuild(session)
+        await session.commit()
+    await backfill_rollups(session_factory, chunk_size)
+    return restored
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Export or restore a columnar snapshot of the fund.'
+    )
+    parser.add_argument('command', choices=('export', 'import'))
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument(
+        '--replace', action='store_true',
+        help='import: delete existing rows first',
+    )
+    args = parser.parse_args()
+    if args.command == 'export':
+        counts = asyncio.run(export_snapshot(
+            args.path, chunk_size=args.chunk_size
+        ))
+    else:
+        counts = asyncio.run(import_snapshot(
+            args.path, chunk_size=args.chunk_size, replace=args.replace
+        ))
+    for name, rows in counts.items():
+        print(f'{name}: {rows} rows')
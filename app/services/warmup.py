@@ -0,0 +1,144 @@
+"""Startup warm-up: pool connections, hot statements, caches, bcrypt.
+
+Runs in the background after startup; until it has finished the
+process is live but not ready (`GET /health/ready` answers 503), so a
+load balancer only routes traffic to warmed-up workers.
+"""
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, ReadSessionLocal, engine
+from app.core.db import read_engine
+from app.core.security import get_password_hash
+from app.core.user import get_user
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.crud.fund_stats import fund_stats_crud
+from app.services.reports import fundraising_speed_rows
+
+RETRY_SECONDS = 5
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    def __init__(self):
+        self.ready = False
+        self.skipped = False
+        self.attempts = 0
+        self.duration_ms: Optional[float] = None
+        self.steps_ms: Dict[str, float] = {}
+        self.error: Optional[str] = None
+
+    def mark_skipped(self) -> None:
+        self.ready = True
+        self.skipped = True
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'ready': self.ready,
+            'skipped': self.skipped,
+            'attempts': self.attempts,
+            'duration_ms': self.duration_ms,
+            'steps_ms': self.steps_ms,
+            'error': self.error,
+        }
+
+
+async def warm_pool(target_engine: AsyncEngine, connections: int) -> None:
+    """Open `connections` connections at once, then return them to the pool.
+
+    Holding them together forces distinct connections (each one runs
+    the connect-time PRAGMAs); the pool keeps up to `pool_size`.
+    """
+    async with AsyncExitStack() as stack:
+        for _ in range(connections):
+            connection = await stack.enter_async_context(
+                target_engine.connect()
+            )
+            await connection.exec_driver_sql('SELECT 1')
+
+
+async def warm_statements(session_factory) -> None:
+    """Run the hot queries once to compile their cached statements.
+
+    Every query is bounded (`LIMIT 1` or a lookup of a missing id), so
+    warming up costs the same on a large database as on an empty one.
+    """
+    async with session_factory() as session:
+        await get_user(session, 0)
+        await charity_project_crud.get_open_ordered(session, limit=1)
+        await donation_crud.get_open_ordered(session, limit=1)
+        await charity_project_crud.get_multi(session, limit=1)
+        await donation_crud.get_by_user(session, 0)
+        await fund_stats_crud.read(session)
+
+
+async def warm_reports(session_factory) -> None:
+    async with session_factory() as session:
+        async for _ in fundraising_speed_rows(session):
+            pass
+
+
+async def run_warmup(
+    state: WarmupState,
+    *,
+    session_factory=AsyncSessionLocal,
+    target_engine: AsyncEngine = engine,
+    connections: Optional[int] = None,
+    bcrypt: Optional[bool] = None,
+) -> WarmupState:
+    """Run every warm-up step, retrying until all of them succeed."""
+    if connections is None:
+        connections = (
+            settings.warmup_pool_connections
+            if settings.warmup_pool_connections is not None
+            else settings.pool_size
+        )
+    if bcrypt is None:
+        bcrypt = settings.warmup_bcrypt
+    steps = {
+        'pool': lambda: warm_pool(target_engine, connections),
+        'statements': lambda: warm_statements(session_factory),
+        'reports': lambda: warm_reports(session_factory),
+    }
+    if read_engine is not None and target_engine is engine:
+        steps['replica_pool'] = lambda: warm_pool(read_engine, connections)
+        steps['replica_statements'] = (
+            lambda: warm_statements(ReadSessionLocal)
+        )
+    if bcrypt:
+        # First hash also loads the bcrypt backend
+        steps['bcrypt'] = lambda: run_in_threadpool(
+            get_password_hash, 'warm-up'
+        )
+    while True:
+        state.attempts += 1
+        started = time.perf_counter()
+        try:
+            for name, step in steps.items():
+                step_started = time.perf_counter()
+                await step()
+                state.steps_ms[name] = round(
+                    (time.perf_counter() - step_started) * 1000, 3
+                )
+        except Exception as error:
+            state.error = f'{type(error).__name__}: {error}'
+            logger.exception('Warm-up failed, retrying')
+            await asyncio.sleep(RETRY_SECONDS)
+            continue
+        state.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        state.error = None
+        state.ready = True
+        logger.info(
+            'Warm-up finished in %.1f ms: %s',
+            state.duration_ms, state.steps_ms,
+        )
+        return state
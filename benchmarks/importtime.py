@@ -0,0 +1,116 @@
+"""Import-time breakdown of the app against a per-module budget.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters,
+takes the median per module and checks it against a budget: own (self)
+time for `app.*` modules, cumulative time for third-party packages and
+for the whole import. Exits with status 1 if any budget is exceeded:
+
+    python -m benchmarks.importtime --runs 5
+    python -m benchmarks.importtime --budget app.main=600 --top 15
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+# Milliseconds. `app.*` budgets are for the module's own code (self
+# time; modules without an entry get DEFAULT_APP_BUDGET_MS), the rest
+# are cumulative. passlib and jwt must not be imported at startup;
+# email_validator is pulled in by fastapi.openapi.models itself
+BUDGETS_MS = {
+    'app.main': 80,
+    'fastapi': 400,
+    'sqlalchemy': 250,
+    'pydantic': 150,
+    'email_validator': 120,
+    'passlib': 0,
+    'jwt': 0,
+}
+DEFAULT_APP_BUDGET_MS = 25
+TOTAL_BUDGET_MS = 1000
+
+
+def import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """{module: (self_us, cumulative_us)} of a single cold import."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            times[name] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def median_times(module: str, runs: int) -> Dict[str, Tuple[float, float]]:
+    samples: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+    for _ in range(runs):
+        for name, times in import_times(module).items():
+            samples[name].append(times)
+    return {
+        name: (
+            statistics.median(s for s, _ in values) / 1000,
+            statistics.median(c for _, c in values) / 1000,
+        )
+        for name, values in samples.items()
+    }
+
+
+def parse_budget(value: str) -> Tuple[str, float]:
+    module, _, ms = value.partition('=')
+    return module, float(ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='app.main')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument(
+        '--budget', type=parse_budget, action='append', default=[],
+        metavar='MODULE=MS', help='override a budget (repeatable)',
+    )
+    parser.add_argument(
+        '--top', type=int, default=10,
+        help='also list the N slowest modules by self time',
+    )
+    args = parser.parse_args()
+    budgets = {'total': TOTAL_BUDGET_MS, **BUDGETS_MS, **dict(args.budget)}
+
+    times = median_times(args.module, args.runs)
+    times['total'] = (0.0, times.get(args.module, (0.0, 0.0))[1])
+    rows = [name for name in times if name.startswith('app.')]
+    rows += [name for name in budgets if name not in rows]
+    over = []
+    print(f'{"module":<40}{"self ms":>9}{"cum ms":>9}{"budget":>9}')
+    for name in sorted(rows, key=lambda n: -times.get(n, (0, 0))[1]):
+        self_ms, cumulative_ms = times.get(name, (0.0, 0.0))
+        budget = budgets.get(name, DEFAULT_APP_BUDGET_MS)
+        spent = self_ms if name.startswith('app.') else cumulative_ms
+        status = ''
+        if spent > budget:
+            status = '  OVER'
+            over.append(name)
+        print(
+            f'{name:<40}{self_ms:>9.1f}{cumulative_ms:>9.1f}'
+            f'{budget:>9.0f}{status}'
+        )
+    if args.top:
+        print(f'\nslowest {args.top} modules by self time:')
+        slowest = sorted(times.items(), key=lambda item: -item[1][0])
+        for name, (self_ms, _) in slowest[:args.top]:
+            print(f'{name:<40}{self_ms:>9.1f}')
+    if over:
+        print(f'\nover budget: {", ".join(over)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
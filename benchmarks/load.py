@@ -0,0 +1,400 @@
+"""Load harness: replay a JSONL trace or a generated request mix.
+
+Runs the ASGI app in-process against a temporary SQLite database (and
+then also counts DB statements per route), or sends real HTTP requests
+to a running server with `--url`. Reports throughput and p50/p95/p99
+latency per route:
+
+    python -m benchmarks.load --requests 2000 --concurrency 20
+    python -m benchmarks.load --trace requests.jsonl --paced
+    python -m benchmarks.load --url http://127.0.0.1:8000 \\
+        --admin-email admin@example.com --admin-password secret
+
+Traces are recorded by running the app with `REQUEST_LOG_PATH=...`
+(`app.core.request_log`). On replay, registrations and logins get fresh
+harness credentials, and requests that carried a token are sent with
+the superuser's token.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# (weight, operation) of the generated mix
+MIX = (
+    (50, 'list_projects'),
+    (20, 'donate'),
+    (10, 'my_donations'),
+    (10, 'login'),
+    (5, 'register'),
+    (5, 'create_project'),
+)
+USERS = 20
+PASSWORD = 'load-test-password'
+ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+current_route: ContextVar[Optional[str]] = ContextVar(
+    'current_route', default=None
+)
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    query: str = ''
+    body: Any = None
+    token: Optional[str] = None
+    offset_ms: float = 0.0
+
+
+def route_of(method: str, path: str) -> str:
+    return f'{method} {ID_SEGMENT.sub("/{id}", path)}'
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class AsgiClient:
+    """Calls the ASGI app directly, without sockets."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, request: Request) -> Tuple[int, bytes]:
+        body = b'' if request.body is None else json.dumps(
+            request.body
+        ).encode()
+        headers = [(b'host', b'load'), (b'content-type', b'application/json')]
+        if request.token:
+            headers.append(
+                (b'authorization', f'Bearer {request.token}'.encode())
+            )
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': request.method,
+            'scheme': 'http',
+            'path': request.path,
+            'raw_path': request.path.encode(),
+            'root_path': '',
+            'query_string': request.query.encode(),
+            'headers': headers,
+            'client': ('127.0.0.1', 1),
+            'server': ('load', 80),
+        }
+        sent = False
+        response = {'status': 0, 'body': []}
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {'type': 'http.request', 'body': body}
+            # Don't report a disconnect before the response is complete
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif message['type'] == 'http.response.body':
+                response['body'].append(message.get('body', b''))
+
+        await self.app(scope, receive, send)
+        return response['status'], b''.join(response['body'])
+
+
+class HttpClient:
+    """Real HTTP against a running server (requests in worker threads)."""
+
+    def __init__(self, base_url: str, concurrency: int):
+        import requests
+
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        self.executor = ThreadPoolExecutor(concurrency)
+
+    def _send(self, request: Request) -> Tuple[int, bytes]:
+        headers = {}
+        if request.token:
+            headers['Authorization'] = f'Bearer {request.token}'
+        url = self.base_url + request.path
+        if request.query:
+            url += '?' + request.query
+        response = self.session.request(
+            request.method, url, json=request.body, headers=headers
+        )
+        return response.status_code, response.content
+
+    async def request(self, request: Request) -> Tuple[int, bytes]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._send, request)
+
+
+class Harness:
+    def __init__(self, client, seed: int = 0):
+        self.client = client
+        self.random = random.Random(seed)
+        self.users: List[Tuple[str, str]] = []
+        self.user_tokens: List[str] = []
+        self.admin_token: Optional[str] = None
+        self._unique = 0
+
+    def unique(self, prefix: str) -> str:
+        self._unique += 1
+        return f'{prefix}-{os.getpid()}-{self._unique}'
+
+    async def login(self, email: str, password: str) -> str:
+        status, body = await self.client.request(Request(
+            'POST', '/auth/login',
+            body={'email': email, 'password': password},
+        ))
+        if status != 200:
+            raise RuntimeError(f'login of {email} failed: {status} {body}')
+        return json.loads(body)['access_token']
+
+    async def setup_users(self, count: int) -> None:
+        for _ in range(count):
+            email = f'{self.unique("user")}@example.com'
+            await self.client.request(Request(
+                'POST', '/auth/register',
+                body={'email': email, 'password': PASSWORD},
+            ))
+            self.users.append((email, PASSWORD))
+            self.user_tokens.append(await self.login(email, PASSWORD))
+
+    def build(self, operation: str) -> Request:
+        user = self.random.randrange(len(self.users))
+        if operation == 'list_projects':
+            return Request('GET', '/charity_project/')
+        if operation == 'donate':
+            return Request(
+                'POST', '/donation/',
+                body={'full_amount': self.random.randint(1, 500)},
+                token=self.user_tokens[user],
+            )
+        if operation == 'my_donations':
+            return Request(
+                'GET', '/donation/my', token=self.user_tokens[user]
+            )
+        if operation == 'login':
+            email, password = self.users[user]
+            return Request(
+                'POST', '/auth/login',
+                body={'email': email, 'password': password},
+            )
+        if operation == 'register':
+            return Request('POST', '/auth/register', body={
+                'email': f'{self.unique("new")}@example.com',
+                'password': PASSWORD,
+            })
+        if operation == 'create_project':
+            return Request('POST', '/charity_project/', body={
+                'name': self.unique('project'),
+                'description': 'Load test',
+                'full_amount': self.random.randint(100, 5000),
+            }, token=self.admin_token)
+        raise ValueError(operation)
+
+    def generated(self, requests: int) -> Iterator[Request]:
+        weights, operations = zip(*MIX)
+        for operation in self.random.choices(
+            operations, weights=weights, k=requests
+        ):
+            yield self.build(operation)
+
+    def replayed(self, trace: Path) -> Iterator[Request]:
+        with trace.open(encoding='utf-8') as lines:
+            for line in lines:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                method, path = record['method'], record['path']
+                body = record.get('body')
+                if path.startswith('/auth/register'):
+                    yield self.build('register')
+                    continue
+                if path.startswith('/auth/login'):
+                    yield self.build('login')
+                    continue
+                if (
+                    method == 'POST' and
+                    path.startswith('/charity_project') and
+                    isinstance(body, dict) and 'name' in body
+                ):
+                    body = {**body, 'name': self.unique(body['name'])}
+                yield Request(
+                    method, path,
+                    query=record.get('query', ''),
+                    body=body,
+                    token=self.admin_token if record.get('auth') else None,
+                    offset_ms=record.get('offset_ms', 0.0),
+                )
+
+    async def run(
+        self, requests: List[Request], concurrency: int, paced: bool
+    ) -> Tuple[float, Dict[str, List[Tuple[int, float]]]]:
+        results: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        queue: asyncio.Queue = asyncio.Queue()
+        for request in requests:
+            queue.put_nowait(request)
+        started = time.perf_counter()
+
+        async def worker():
+            while not queue.empty():
+                request = queue.get_nowait()
+                if paced:
+                    delay = (
+                        request.offset_ms / 1000 -
+                        (time.perf_counter() - started)
+                    )
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                route = route_of(request.method, request.path)
+                current_route.set(route)
+                request_started = time.perf_counter()
+                status, _ = await self.client.request(request)
+                results[route].append(
+                    (status, time.perf_counter() - request_started)
+                )
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started, results
+
+
+def print_report(
+    elapsed: float,
+    results: Dict[str, List[Tuple[int, float]]],
+    statements: Optional[Dict[str, int]],
+) -> None:
+    total = sum(len(samples) for samples in results.values())
+    print(
+        f'{total} requests in {elapsed:.2f} s: '
+        f'{total / elapsed:.1f} req/s\n'
+    )
+    header = (
+        f'{"route":<32}{"count":>7}{"non-2xx":>8}'
+        f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}'
+    )
+    if statements is not None:
+        header += f'{"stmts/req":>11}'
+    print(header)
+    for route in sorted(results, key=lambda r: -len(results[r])):
+        samples = results[route]
+        latencies = sorted(seconds * 1000 for _, seconds in samples)
+        failed = sum(1 for status, _ in samples if not 200 <= status < 300)
+        line = (
+            f'{route:<32}{len(samples):>7}{failed:>8}'
+            f'{percentile(latencies, 0.50):>9.1f}'
+            f'{percentile(latencies, 0.95):>9.1f}'
+            f'{percentile(latencies, 0.99):>9.1f}'
+        )
+        if statements is not None:
+            line += f'{statements.get(route, 0) / len(samples):>11.1f}'
+        print(line)
+
+
+async def in_process(args) -> None:
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = (
+        f'sqlite+aiosqlite:///{Path(tmp) / "load.db"}'
+    )
+    os.environ.setdefault('BCRYPT_ROUNDS', str(args.bcrypt_rounds))
+
+    # Imported after DATABASE_URL is set: the engine is created on import
+    from sqlalchemy import event, update
+
+    from app.core.db import AsyncSessionLocal, Base, engine
+    from app.main import app
+    from app.models.auth_user import AuthUser
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    statements: Dict[str, int] = defaultdict(int)
+
+    @event.listens_for(engine.sync_engine, 'before_cursor_execute')
+    def count_statement(conn, cursor, statement, parameters, context, many):
+        route = current_route.get()
+        if route is not None:
+            statements[route] += 1
+
+    async with app.router.lifespan_context(app):
+        harness = Harness(AsgiClient(app), seed=args.seed)
+        admin_email = 'admin@example.com'
+        await harness.client.request(Request(
+            'POST', '/auth/register',
+            body={'email': admin_email, 'password': PASSWORD},
+        ))
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(AuthUser)
+                .where(AuthUser.email == admin_email)
+                .values(is_superuser=True)
+            )
+            await session.commit()
+        harness.admin_token = await harness.login(admin_email, PASSWORD)
+        await harness.setup_users(USERS)
+        await drive(harness, args, statements)
+
+
+async def remote(args) -> None:
+    if not (args.admin_email and args.admin_password):
+        raise SystemExit('--url needs --admin-email and --admin-password')
+    harness = Harness(HttpClient(args.url, args.concurrency), seed=args.seed)
+    harness.admin_token = await harness.login(
+        args.admin_email, args.admin_password
+    )
+    await harness.setup_users(USERS)
+    await drive(harness, args, None)
+
+
+async def drive(
+    harness: Harness, args, statements: Optional[Dict[str, int]]
+) -> None:
+    if args.trace:
+        requests = list(harness.replayed(args.trace))
+    else:
+        requests = list(harness.generated(args.requests))
+    if statements is not None:
+        statements.clear()
+    elapsed, results = await harness.run(
+        requests, args.concurrency, args.paced
+    )
+    print_report(elapsed, results, statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trace', type=Path, help='JSONL trace to replay')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument(
+        '--paced', action='store_true',
+        help='keep the recorded offsets between trace requests',
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--bcrypt-rounds', type=int, default=4,
+        help='bcrypt cost for the in-process run (default: 4)',
+    )
+    parser.add_argument('--url', help='base URL of a running server')
+    parser.add_argument('--admin-email')
+    parser.add_argument('--admin-password')
+    args = parser.parse_args()
+    asyncio.run(remote(args) if args.url else in_process(args))
+
+
+if __name__ == '__main__':
+    main()
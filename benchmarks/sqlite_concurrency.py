@@ -0,0 +1,115 @@
+"""Concurrent read/write benchmark: default SQLite engine vs tuned profile.
+
+Writers insert donations and commit one by one (like `POST /donation/`),
+readers keep listing open donations (like `GET /donation/`). Run from the
+repository root:
+
+    python -m benchmarks.sqlite_concurrency --seconds 5 --readers 8
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base, create_engine_for_url
+from app.models import auth_user, charity_project  # noqa: F401
+from app.models.donation import Donation
+
+SEED_ROWS = 2000
+
+
+async def writer(session_factory, deadline, stats):
+    while time.perf_counter() < deadline:
+        async with session_factory() as session:
+            session.add(Donation(user_id=1, full_amount=100))
+            try:
+                await session.commit()
+                stats['writes'] += 1
+            except OperationalError:
+                stats['errors'] += 1
+
+
+async def reader(session_factory, deadline, stats):
+    stmt = (
+        select(Donation)
+        .where(Donation.fully_invested.is_(False))
+        .order_by(Donation.id.desc())
+        .limit(100)
+    )
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        async with session_factory() as session:
+            try:
+                (await session.execute(stmt)).scalars().all()
+            except OperationalError:
+                stats['errors'] += 1
+                continue
+        stats['latencies'].append(time.perf_counter() - started)
+
+
+async def run(engine, args):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with session_factory() as session:
+        session.add_all(
+            Donation(user_id=1, full_amount=100) for _ in range(SEED_ROWS)
+        )
+        await session.commit()
+
+    stats = {'writes': 0, 'errors': 0, 'latencies': []}
+    deadline = time.perf_counter() + args.seconds
+    await asyncio.gather(
+        *(writer(session_factory, deadline, stats)
+          for _ in range(args.writers)),
+        *(reader(session_factory, deadline, stats)
+          for _ in range(args.readers)),
+    )
+    await engine.dispose()
+    return stats
+
+
+def report(name, stats, seconds):
+    latencies = sorted(stats['latencies']) or [0.0]
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f'{name:<8} writes/s={stats["writes"] / seconds:8.1f} '
+        f'reads/s={len(stats["latencies"]) / seconds:8.1f} '
+        f'read p50={statistics.median(latencies) * 1000:7.2f}ms '
+        f'p95={p95 * 1000:7.2f}ms errors={stats["errors"]}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        default_url = f'sqlite+aiosqlite:///{Path(tmp) / "default.db"}'
+        tuned_url = f'sqlite+aiosqlite:///{Path(tmp) / "tuned.db"}'
+        report(
+            'default',
+            asyncio.run(run(create_async_engine(default_url), args)),
+            args.seconds,
+        )
+        report(
+            'tuned',
+            asyncio.run(run(create_engine_for_url(tuned_url), args)),
+            args.seconds,
+        )
+
+
+if __name__ == '__main__':
+    main()
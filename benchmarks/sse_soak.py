@@ -0,0 +1,102 @@
+"""Soak test of `GET /charity_project/stream` with many idle subscribers.
+
+Opens N concurrent SSE connections against the ASGI app in-process (no
+sockets), keeps them idle, then publishes progress deltas and reports
+fan-out latency and memory held per connection:
+
+    python -m benchmarks.sse_soak --subscribers 5000 --messages 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from app.main import app
+from app.services.progress import progress_broker
+
+SCOPE = {
+    'type': 'http',
+    'asgi': {'version': '3.0'},
+    'http_version': '1.1',
+    'method': 'GET',
+    'scheme': 'http',
+    'path': '/charity_project/stream',
+    'raw_path': b'/charity_project/stream',
+    'root_path': '',
+    'query_string': b'',
+    'headers': [(b'host', b'bench')],
+    'client': ('127.0.0.1', 1),
+    'server': ('bench', 80),
+}
+
+
+class Connection:
+    def __init__(self, disconnected: asyncio.Event):
+        self.disconnected = disconnected
+        self.received_at = []
+        self._requested = False
+
+    async def receive(self):
+        if not self._requested:
+            self._requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] != 'http.response.body':
+            return
+        count = message.get('body', b'').count(b'event: progress')
+        self.received_at.extend([time.perf_counter()] * count)
+
+
+async def soak(subscribers: int, messages: int) -> None:
+    disconnected = asyncio.Event()
+    connections = [Connection(disconnected) for _ in range(subscribers)]
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tasks = [
+        asyncio.create_task(app(dict(SCOPE), conn.receive, conn.send))
+        for conn in connections
+    ]
+    while len(progress_broker) < subscribers:
+        await asyncio.sleep(0.01)
+    held = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    latencies = []
+    for number in range(messages):
+        published_at = time.perf_counter()
+        progress_broker.publish(
+            {'id': 1, 'invested_amount': number, 'fully_invested': False}
+        )
+        while any(len(c.received_at) <= number for c in connections):
+            await asyncio.sleep(0)
+        latencies.append(
+            max(c.received_at[number] for c in connections) - published_at
+        )
+
+    disconnected.set()
+    await asyncio.gather(*tasks)
+    print(f'subscribers:            {subscribers}')
+    print(f'memory per connection:  {held / subscribers / 1024:.1f} KiB')
+    print(
+        'fan-out to all (ms):    '
+        f'median {statistics.median(latencies) * 1000:.1f}, '
+        f'max {max(latencies) * 1000:.1f}'
+    )
+    print(f'dropped subscribers:    {progress_broker.dropped}')
+    print(f'left subscribed:        {len(progress_broker)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=5000)
+    parser.add_argument('--messages', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(soak(args.subscribers, args.messages))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Python overhead of the donation path's statements: select() vs lambda_stmt.
+
+Runs the statements `POST /donation/` issues before allocation (user
+lookup in `current_user`, open project queue) against an in-memory SQLite
+database, once rebuilding `select()` constructs on every call (the old
+code) and once through the cached `lambda_stmt` CRUD methods:
+
+    python -m benchmarks.statement_cache --iterations 3000
+"""
+import argparse
+import asyncio
+import cProfile
+import pstats
+import time
+
+from sqlalchemy import asc, lambda_stmt, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.crud.charity_project import charity_project_crud
+from app.models.auth_user import AuthUser
+from app.models.charity_project import CharityProject
+from app.models.donation import Donation  # noqa: F401
+
+OPEN_PROJECTS = 5
+
+
+async def rebuilt_statements(session, user_id):
+    await session.execute(select(AuthUser).where(AuthUser.id == user_id))
+    result = await session.execute(
+        select(CharityProject)
+        .where(CharityProject.fully_invested.is_(False))
+        .order_by(asc(CharityProject.create_date), asc(CharityProject.id))
+    )
+    return result.scalars().all()
+
+
+async def cached_statements(session, user_id):
+    await session.execute(lambda_stmt(
+        lambda: select(AuthUser).where(AuthUser.id == user_id)
+    ))
+    return await charity_project_crud.get_open_ordered(session)
+
+
+def sql_layer_seconds(profile):
+    """Time spent inside SQLAlchemy's statement construction/compilation."""
+    stats = pstats.Stats(profile)
+    return sum(
+        tottime
+        for (filename, _, _), (_, _, tottime, _, _) in stats.stats.items()
+        if '/sqlalchemy/sql/' in filename
+    )
+
+
+async def measure(session, path, iterations):
+    await path(session, 1)  # warm the compiled cache
+    profile = cProfile.Profile()
+    started = time.perf_counter()
+    profile.enable()
+    for _ in range(iterations):
+        await path(session, 1)
+    profile.disable()
+    elapsed = time.perf_counter() - started
+    return elapsed, sql_layer_seconds(profile)
+
+
+async def main(iterations):
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession)
+    async with session_factory() as session:
+        session.add(AuthUser(email='bench@example.com', hashed_password='x'))
+        session.add_all(
+            CharityProject(name=f'project {i}', description='-',
+                           full_amount=1000)
+            for i in range(OPEN_PROJECTS)
+        )
+        await session.commit()
+        for name, path in (
+            ('select() per call', rebuilt_statements),
+            ('lambda_stmt', cached_statements),
+        ):
+            elapsed, sql_layer = await measure(session, path, iterations)
+            print(
+                f'{name:<18} {elapsed / iterations * 1e6:8.1f} us/request, '
+                f'of which sqlalchemy.sql {sql_layer / iterations * 1e6:7.1f}'
+                ' us (profiled)'
+            )
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=3000)
+    asyncio.run(main(parser.parse_args().iterations))
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 import pytest
@@ -7,6 +8,9 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+# The app's own outbox workers would poll the development database
+os.environ.setdefault('OUTBOX_WORKERS', '0')
+
 try:
     from app.main import app  # noqa
 except (NameError, ImportError) as error:
@@ -16,10 +20,10 @@ except (NameError, ImportError) as error:
     )
 
 try:
-    from app.core.db import Base, get_async_session  # noqa
+    from app.core.db import Base, get_async_session, get_read_session  # noqa
 except (NameError, ImportError) as error:
     raise AssertionError(
-        'При импорте объектов `Base, get_async_session` '
+        'При импорте объектов `Base, get_async_session, get_read_session` '
         'из модуля `app.core.db` возникло исключение:\n'
         f'{type(error).__name__}: {error}.'
     )
@@ -80,3 +84,11 @@ def mixer():
     mixer_engine = create_engine(f'sqlite:///{str(TEST_DB)}')
     session = sessionmaker(bind=mixer_engine)
     return _mixer(session=session(), commit=True)
+
+
+@pytest.fixture
+def count_queries():
+    """`with count_queries() as queries:` counts test engine statements."""
+    from app.core.query_counter import QueryCounter
+
+    return lambda: QueryCounter(engine)
@@ -1,6 +1,7 @@
 import pytest
 from conftest import (
-    app, current_superuser, current_user, get_async_session, override_db
+    app, current_superuser, current_user, get_async_session,
+    get_read_session, override_db
 )
 from fastapi import HTTPException
 from fastapi.testclient import TestClient
@@ -36,6 +37,7 @@ def user_client():
 
     app.dependency_overrides = {}
     app.dependency_overrides[get_async_session] = override_db
+    app.dependency_overrides[get_read_session] = override_db
     app.dependency_overrides[current_user] = lambda: user
     app.dependency_overrides[current_superuser] = (
         lambda: raise_forbidden()
@@ -48,6 +50,7 @@ def user_client():
 def test_client():
     app.dependency_overrides = {}
     app.dependency_overrides[get_async_session] = override_db
+    app.dependency_overrides[get_read_session] = override_db
     app.dependency_overrides[current_user] = lambda: not_auth_user
     with TestClient(app) as client:
         yield client
@@ -57,6 +60,14 @@ def test_client():
 def superuser_client():
     app.dependency_overrides = {}
     app.dependency_overrides[get_async_session] = override_db
+    app.dependency_overrides[get_read_session] = override_db
     app.dependency_overrides[current_superuser] = lambda: superuser
     with TestClient(app) as client:
         yield client
+
+
+@pytest.fixture
+def admin_client(superuser_client):
+    # The superuser is also the current user (own donations, summaries)
+    app.dependency_overrides[current_user] = lambda: superuser
+    return superuser_client
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from conftest import TestingSessionLocal
+
+from app.services.archive import archive_closed
+
+DONATION_URL = '/donation/'
+PROJECTS_URL = '/charity_project/'
+
+
+async def test_archive_closed_rows(admin_client):
+    project = admin_client.post(PROJECTS_URL, json={
+        'name': 'chimichangas4life',
+        'description': 'Huge fan of chimichangas',
+        'full_amount': 100,
+    }).json()
+    donation = admin_client.post(DONATION_URL, json={'full_amount': 150})
+
+    assert await archive_closed(TestingSessionLocal, timedelta(days=1)) == {
+        'charity_project': 0, 'donation': 0,
+    }, 'Свежие закрытые проекты не должны переноситься в архив.'
+    moved = await archive_closed(TestingSessionLocal, timedelta(0), 1)
+    assert moved == {'charity_project': 1, 'donation': 0}, (
+        'Закрытый проект должен переноситься в архив, '
+        'а неинвестированный донат — оставаться в рабочей таблице.'
+    )
+
+    assert admin_client.get(PROJECTS_URL).json() == []
+    archived = admin_client.get(
+        PROJECTS_URL, params={'include_archived': True}
+    ).json()
+    assert archived == [project | {
+        'invested_amount': 100,
+        'fully_invested': True,
+        'close_date': archived[0]['close_date'],
+    }], 'С `include_archived=true` список должен включать архив.'
+    assert admin_client.post(PROJECTS_URL, json={
+        'name': 'chimichangas4life',
+        'description': 'Same name',
+        'full_amount': 10,
+    }).status_code == 400, 'Имя проекта должно быть уникально и с архивом.'
+    assert admin_client.patch(
+        f'{PROJECTS_URL}{project["id"]}', json={'full_amount': 500}
+    ).status_code == 400, 'Архивный проект закрыт для редактирования.'
+
+    admin_client.post(PROJECTS_URL, json={
+        'name': 'nunchaku',
+        'description': 'Nunchaku is better',
+        'full_amount': 50,
+    })
+    moved = await archive_closed(TestingSessionLocal, timedelta(0))
+    assert moved == {'charity_project': 1, 'donation': 1}
+    assert admin_client.get(DONATION_URL).json() == []
+    assert [
+        item['id'] for item in admin_client.get(
+            '/donation/my', params={'include_archived': True}
+        ).json()
+    ] == [donation.json()['id']]
+    assert admin_client.get('/stats/check').json()['consistent'], (
+        'Архивирование не должно менять статистику фонда.'
+    )
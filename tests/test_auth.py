@@ -1,3 +1,5 @@
+import sqlite3
+
 REGISTER_URL = '/auth/register'
 
 
@@ -49,3 +51,40 @@ def test_register_invalid_pass(user_client):
         'Убедитесь, что в ответе на некорректный POST-запрос '
         f'к эндпоинту `{REGISTER_URL}` есть ключ `detail`.'
     )
+
+
+def test_login_rehashes_outdated_password_cost(test_client):
+    from conftest import TEST_DB
+    from app.core.security import configure_password_hashing, pwd_context
+
+    user_data = {'email': 'dead@pool.com', 'password': 'chimichangas4life'}
+    default_rounds = pwd_context.handler('bcrypt').default_rounds
+    configure_password_hashing(4)
+    try:
+        test_client.post(REGISTER_URL, json=user_data)
+        configure_password_hashing(5)
+        response = test_client.post('/auth/login', json=user_data)
+        assert response.status_code == 200, (
+            'Вход с корректными данными должен вернуть статус-код 200.'
+        )
+    finally:
+        configure_password_hashing(default_rounds)
+    with sqlite3.connect(TEST_DB) as connection:
+        (hashed_password,) = connection.execute(
+            'SELECT hashed_password FROM auth_user'
+        ).fetchone()
+    assert hashed_password.startswith('$2b$05$'), (
+        'При входе пароль, захешированный с устаревшей стоимостью bcrypt, '
+        'должен перехешироваться с текущей стоимостью.'
+    )
+
+
+def test_calibrate_bcrypt_rounds_respects_budget():
+    from app.core.constants import BCRYPT_MIN_ROUNDS
+    from app.core.security import calibrate_bcrypt_rounds
+
+    assert calibrate_bcrypt_rounds(0) == BCRYPT_MIN_ROUNDS, (
+        'Если ни одна стоимость bcrypt не укладывается в бюджет, '
+        'должна выбираться минимальная.'
+    )
+    assert calibrate_bcrypt_rounds(10 ** 6, max_rounds=6) == 6
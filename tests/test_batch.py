@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+import pytest
+from conftest import TestingSessionLocal
+
+from app.crud.charity_project import charity_project_crud
+from app.services.archive import archive_closed
+
+PROJECTS_BATCH_URL = '/charity_project/batch'
+DONATIONS_BATCH_URL = '/donation/batch'
+
+
+def test_projects_batch(
+    user_client, charity_project, charity_project_nunchaku
+):
+    ids = [charity_project_nunchaku.id, 999, charity_project.id]
+    response = user_client.get(
+        PROJECTS_BATCH_URL,
+        params={'ids': ','.join(map(str, ids + [charity_project.id]))},
+    )
+    assert response.status_code == 200, response.json()
+    data = response.json()
+    assert [item['id'] for item in data['items']] == [
+        charity_project_nunchaku.id, charity_project.id,
+    ], 'Проекты должны возвращаться в порядке `ids`, без повторов.'
+    assert data['missing'] == [999]
+    repeated = user_client.get(
+        PROJECTS_BATCH_URL,
+        params=[('ids', charity_project.id), ('ids', 999)],
+    )
+    assert repeated.json()['missing'] == [999]
+
+
+@pytest.mark.parametrize(
+    'ids', ['', 'a,1', ','.join(['1'] * 1001)], ids=['empty', 'nan', 'long']
+)
+def test_batch_invalid_ids(user_client, ids):
+    response = user_client.get(PROJECTS_BATCH_URL, params={'ids': ids})
+    assert response.status_code == 422
+
+
+async def test_get_many_chunks(charity_project, charity_project_nunchaku):
+    async with TestingSessionLocal() as session:
+        found, missing = await charity_project_crud.get_many(
+            session,
+            [charity_project.id, 0, charity_project_nunchaku.id, 998, 999],
+            chunk_size=2,
+        )
+    assert [project.name for project in found] == [
+        charity_project.name, charity_project_nunchaku.name,
+    ]
+    assert missing == [0, 998, 999]
+
+
+async def test_projects_batch_include_archived(admin_client):
+    closed = admin_client.post('/charity_project/', json={
+        'name': 'closed', 'description': 'closed', 'full_amount': 10,
+    }).json()
+    admin_client.post('/donation/', json={'full_amount': 10})
+    open_project = admin_client.post('/charity_project/', json={
+        'name': 'open', 'description': 'open', 'full_amount': 10,
+    }).json()
+    await archive_closed(TestingSessionLocal, timedelta(0))
+
+    params = {'ids': f'{closed["id"]},{open_project["id"]}'}
+    data = admin_client.get(PROJECTS_BATCH_URL, params=params).json()
+    assert data['missing'] == [closed['id']]
+    data = admin_client.get(
+        PROJECTS_BATCH_URL, params=params | {'include_archived': True}
+    ).json()
+    assert [item['id'] for item in data['items']] == [
+        closed['id'], open_project['id'],
+    ], 'Архивные проекты должны находиться с `include_archived=true`.'
+    assert data['missing'] == []
+
+
+def test_donations_batch(superuser_client, donation, another_donation):
+    response = superuser_client.get(
+        DONATIONS_BATCH_URL,
+        params={'ids': f'{another_donation.id},{donation.id},7'},
+    )
+    assert response.status_code == 200, response.json()
+    data = response.json()
+    assert [item['id'] for item in data['items']] == [
+        another_donation.id, donation.id,
+    ]
+    assert 'user_id' in data['items'][0]
+    assert data['missing'] == [7]
+
+
+def test_donations_batch_superuser_only(user_client, donation):
+    response = user_client.get(
+        DONATIONS_BATCH_URL, params={'ids': donation.id}
+    )
+    assert response.status_code == 403
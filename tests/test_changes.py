@@ -0,0 +1,72 @@
+CHANGES_URL = '/changes/'
+PROJECTS_URL = '/charity_project/'
+DONATION_URL = '/donation/'
+
+
+def summarize(changes):
+    return [
+        (change['entity'], change['op'], change['id']) for change in changes
+    ]
+
+
+def test_change_feed_follows_writes(admin_client):
+    project = admin_client.post(PROJECTS_URL, json={
+        'name': 'chimichangas4life',
+        'description': 'Huge fan of chimichangas',
+        'full_amount': 100,
+    }).json()
+    temporary = admin_client.post(PROJECTS_URL, json={
+        'name': 'to be removed',
+        'description': 'Temporary',
+        'full_amount': 1000,
+    }).json()
+    admin_client.delete(f'{PROJECTS_URL}{temporary["id"]}')
+
+    response = admin_client.get(CHANGES_URL)
+    assert response.status_code == 200, (
+        f'GET-запрос к `{CHANGES_URL}` должен вернуть статус-код 200.'
+    )
+    data = response.json()
+    assert summarize(data['changes']) == [
+        ('charity_project', 'upsert', project['id']),
+        ('charity_project', 'delete', temporary['id']),
+    ]
+    cursor = data['next_since']
+    assert data['has_more'] is False
+
+    donation = admin_client.post(DONATION_URL, json={'full_amount': 40})
+    data = admin_client.get(CHANGES_URL, params={'since': cursor}).json()
+    assert sorted(summarize(data['changes'])) == [
+        ('charity_project', 'upsert', project['id']),
+        ('donation', 'upsert', donation.json()['id']),
+    ], 'Распределение должно отмечать изменённые проекты и донаты.'
+    assert [
+        change['data']['invested_amount'] for change in data['changes']
+    ] == [40, 40]
+    seqs = [change['seq'] for change in data['changes']]
+    assert seqs == sorted(seqs) and seqs[0] > cursor
+    assert admin_client.get(
+        CHANGES_URL, params={'since': data['next_since']}
+    ).json() == {
+        'changes': [], 'next_since': data['next_since'], 'has_more': False,
+    }
+
+
+def test_change_feed_pages(admin_client):
+    for amount in (10, 20, 30):
+        admin_client.post(DONATION_URL, json={'full_amount': amount})
+    first = admin_client.get(CHANGES_URL, params={'limit': 2}).json()
+    assert len(first['changes']) == 2 and first['has_more'] is True
+    second = admin_client.get(CHANGES_URL, params={
+        'limit': 2, 'since': first['next_since'],
+    }).json()
+    assert second['has_more'] is False
+    assert [
+        change['data']['full_amount']
+        for change in first['changes'] + second['changes']
+    ] == [10, 20, 30], 'Курсор должен продолжать выдачу без пропусков.'
+
+
+def test_change_feed_superuser_only(user_client):
+    response = user_client.get(CHANGES_URL)
+    assert response.status_code == 403
@@ -38,3 +38,110 @@ def test_check_db_url():
                 'Укажите значение по умолчанию для подключения базы данных '
                 'sqlite '
             )
+
+
+async def test_sqlite_engine_applies_pragmas(tmp_path):
+    from sqlalchemy import text
+
+    from app.core.db import create_engine_for_url
+
+    engine = create_engine_for_url(
+        f'sqlite+aiosqlite:///{tmp_path / "tuned.db"}'
+    )
+    async with engine.connect() as conn:
+        journal_mode = (await conn.execute(
+            text('PRAGMA journal_mode')
+        )).scalar()
+        busy_timeout = (await conn.execute(
+            text('PRAGMA busy_timeout')
+        )).scalar()
+    await engine.dispose()
+    assert journal_mode == 'wal', (
+        'Движок SQLite должен переводить базу в режим WAL.'
+    )
+    assert busy_timeout > 0, 'Для SQLite должен быть задан busy_timeout.'
+
+
+def test_sync_sqlite_replica(tmp_path):
+    import sqlite3
+
+    from app.core.replica import sync_sqlite_replica
+
+    primary_url = f'sqlite+aiosqlite:///{tmp_path / "primary.db"}'
+    replica_url = f'sqlite+aiosqlite:///{tmp_path / "replica.db"}'
+    with sqlite3.connect(tmp_path / 'primary.db') as connection:
+        connection.execute('CREATE TABLE donation (id INTEGER PRIMARY KEY)')
+        connection.execute('INSERT INTO donation VALUES (1)')
+    sync_sqlite_replica(primary_url, replica_url)
+    with sqlite3.connect(tmp_path / 'replica.db') as connection:
+        rows = connection.execute('SELECT id FROM donation').fetchall()
+    assert rows == [(1,)], 'Реплика должна содержать данные основной БД.'
+
+
+async def test_read_session_routing(monkeypatch, tmp_path):
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from starlette.requests import Request
+
+    from app.core import db
+    from app.core.replica import PrimaryPins, pin_key
+
+    replica = db.create_engine_for_url(
+        f'sqlite+aiosqlite:///{tmp_path / "replica.db"}'
+    )
+    pins = PrimaryPins(ttl_seconds=60)
+    monkeypatch.setattr(db, 'read_engine', replica)
+    monkeypatch.setattr(db, 'primary_pins', pins)
+    monkeypatch.setattr(
+        db, 'ReadSessionLocal', sessionmaker(bind=replica, class_=AsyncSession)
+    )
+
+    def request(token, cookie=b''):
+        headers = [(b'authorization', f'Bearer {token}'.encode())]
+        if cookie:
+            headers.append((b'cookie', cookie))
+        return Request({'type': 'http', 'headers': headers})
+
+    async def read_session(request, primary_session):
+        generator = db.get_read_session(request, primary_session)
+        session = await generator.__anext__()
+        await generator.aclose()
+        return session
+
+    primary_session = db.AsyncSessionLocal()
+    pins.pin(pin_key('Bearer donor'))
+    session = await read_session(request('reader'), primary_session)
+    assert session.bind is replica, 'Чтение должно направляться на реплику.'
+    session = await read_session(request('donor'), primary_session)
+    assert session is primary_session, (
+        'После записи клиент должен читать с основной БД.'
+    )
+    session = await read_session(
+        request('reader', b'read_primary=1'), primary_session
+    )
+    assert session is primary_session, (
+        'Cookie после записи в другом воркере тоже ведёт на основную БД.'
+    )
+    assert not any('donor' in key for key in pins._pins), (
+        'Токены не должны храниться в памяти в открытом виде.'
+    )
+    await replica.dispose()
+
+
+def test_write_sets_primary_cookie(monkeypatch):
+    from types import SimpleNamespace
+
+    from fastapi import Response
+
+    from app.core import db
+    from app.core.replica import PIN_COOKIE
+
+    monkeypatch.setattr(db, 'read_engine', object())
+    response = Response()
+    db._pin_writer_to_primary(SimpleNamespace(info={
+        db.PIN_KEY: None, db.PIN_RESPONSE: response, db.WROTE: True,
+    }))
+    cookie = response.headers['set-cookie']
+    assert cookie.startswith(f'{PIN_COOKIE}=1;') and 'Max-Age=5' in cookie, (
+        'Ответ на запись должен ставить cookie для чтения с основной БД.'
+    )
@@ -0,0 +1,187 @@
+import pytest
+from conftest import TestingSessionLocal
+
+from app.models.auth_user import AuthUser
+
+IMPORT_URL = '/donation/import'
+DONATION_URL = '/donation/'
+PROJECTS_URL = '/charity_project/'
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, 'import_batch_size', 2)
+
+
+@pytest.fixture
+async def donor():
+    async with TestingSessionLocal() as session:
+        session.add(AuthUser(
+            id=7, email='donor@pool.com', hashed_password='-',
+        ))
+        await session.commit()
+
+
+@pytest.mark.usefixtures('donor')
+def test_import_ndjson_allocates_fifo(admin_client):
+    admin_client.post(PROJECTS_URL, json={
+        'name': 'chimichangas4life',
+        'description': 'Huge fan of chimichangas',
+        'full_amount': 150,
+    })
+    admin_client.post(PROJECTS_URL, json={
+        'name': 'nunchaku',
+        'description': 'Nunchaku is better',
+        'full_amount': 1000,
+    })
+    body = '\n'.join([
+        '{"full_amount": 100, "comment": "offline"}',
+        '{"full_amount": 0}',
+        'not json',
+        '',
+        '{"full_amount": 100, "user_id": 7}',
+        '{"full_amount": 30, "extra": 1}',
+        '{"full_amount": 25}',
+    ])
+    response = admin_client.post(
+        IMPORT_URL, data=body.encode(),
+        headers={'Content-Type': 'application/x-ndjson'},
+    )
+    assert response.status_code == 200, (
+        f'POST-запрос суперюзера к `{IMPORT_URL}` должен вернуть 200.'
+    )
+    report = response.json()
+    assert {
+        key: report[key]
+        for key in ('imported', 'invested_amount', 'failed', 'batches')
+    } == {'imported': 3, 'invested_amount': 225, 'failed': 3, 'batches': 2}
+    assert [error['line'] for error in report['errors']] == [2, 3, 6], (
+        'Ошибочные строки должны перечисляться с номерами и пропускаться.'
+    )
+
+    donations = admin_client.get(DONATION_URL).json()
+    assert [
+        (donation['user_id'], donation['invested_amount'])
+        for donation in donations
+    ] == [(1, 100), (7, 100), (1, 25)]
+    projects = admin_client.get(PROJECTS_URL).json()
+    assert [
+        (project['invested_amount'], project['fully_invested'])
+        for project in projects
+    ] == [(150, True), (75, False)], (
+        'Импортированные донаты должны распределяться по очереди проектов.'
+    )
+    assert admin_client.get('/stats/check').json()['consistent'], (
+        'Импорт должен обновлять статистику фонда.'
+    )
+
+
+def test_import_rejects_unknown_users(admin_client):
+    body = '\n'.join([
+        '{"full_amount": 100, "user_id": 7}',
+        '{"full_amount": 50}',
+        '{"full_amount": 30, "user_id": 8}',
+    ])
+    report = admin_client.post(
+        IMPORT_URL, data=body.encode(),
+        headers={'Content-Type': 'application/x-ndjson'},
+    ).json()
+    assert report['imported'] == 1
+    assert report['errors'] == [
+        {'line': 1, 'error': 'unknown user_id 7'},
+        {'line': 3, 'error': 'unknown user_id 8'},
+    ], (
+        'Строки с `user_id` незарегистрированных пользователей должны '
+        'отклоняться с номером строки.'
+    )
+    assert [
+        donation['user_id'] for donation in admin_client.get(
+            DONATION_URL
+        ).json()
+    ] == [1]
+
+
+def test_import_csv(admin_client):
+    body = (
+        'full_amount,comment\n'
+        '100,"From the fair, day 1"\n'
+        'abc,bad amount\n'
+        '50,\n'
+    )
+    report = admin_client.post(
+        IMPORT_URL, data=body.encode(),
+        headers={'Content-Type': 'text/csv'},
+    ).json()
+    assert report['imported'] == 2
+    assert report['errors'][0]['line'] == 3
+    assert [
+        donation['comment'] for donation in admin_client.get(
+            DONATION_URL
+        ).json()
+    ] == ['From the fair, day 1', None]
+
+    response = admin_client.post(
+        IMPORT_URL, params={'format': 'csv'}, data=b'amount\n1\n'
+    )
+    assert response.status_code == 400, (
+        'CSV с неизвестными колонками должен отклоняться целиком.'
+    )
+
+
+def test_import_superuser_only(user_client):
+    assert user_client.post(
+        IMPORT_URL, data=b'{"full_amount": 1}'
+    ).status_code == 403
+
+
+async def test_iter_lines_bounds_memory():
+    from app.services.donation_import import iter_lines
+
+    async def chunks():
+        for chunk in (b'{"a"', b': 1}\nxxxx', b'xxxx', b'xxxx\n{}', b'\n'):
+            yield chunk
+
+    assert [
+        line async for line in iter_lines(chunks(), max_line_bytes=6)
+    ] == [(1, b'{"a": 1}'), (2, None), (3, b'{}')], (
+        'Слишком длинная строка не должна накапливаться в памяти.'
+    )
+
+
+async def test_import_statements_dont_grow_with_donors(
+    admin_client, count_queries, monkeypatch
+):
+    from app.core.config import settings
+    from app.models.donor_summary import DonorSummary
+
+    monkeypatch.setattr(settings, 'import_batch_size', 100)
+    async with TestingSessionLocal() as session:
+        session.add_all(
+            AuthUser(id=user_id, email=f'{user_id}@pool.com',
+                     hashed_password='-')
+            for user_id in range(10, 20)
+        )
+        await session.commit()
+
+    def statements(user_ids):
+        body = '\n'.join(
+            f'{{"full_amount": 10, "user_id": {user_id}}}'
+            for user_id in user_ids
+        )
+        with count_queries() as queries:
+            report = admin_client.post(
+                IMPORT_URL, data=body.encode(),
+                headers={'Content-Type': 'application/x-ndjson'},
+            ).json()
+        assert report['imported'] == len(user_ids)
+        return queries.count
+
+    assert statements(range(10, 20)) == statements([10] * 10), (
+        'Число SQL-запросов импорта не должно зависеть от числа донатеров.'
+    )
+    async with TestingSessionLocal() as session:
+        summary = await session.get(DonorSummary, 10)
+    assert (summary.donation_count, summary.total_donated) == (11, 110)
+    assert summary.last_donation_date is not None
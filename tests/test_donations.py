@@ -221,3 +221,30 @@ def test_create_donation_check_create_date(user_client):
         'Убедитесь, что при неодновременном создании двух пожертвований '
         'у них отличаются значения в поле `create_date`.'
     )
+
+
+def test_get_my_donation_summary(user_client, charity_project_little_invested):
+    summary_url = MY_DONATIONS_URL + '/summary'
+    response = user_client.get(summary_url)
+    assert response.status_code == 200, (
+        'GET-запрос зарегистрированного пользователя к эндпоинту '
+        f'`{summary_url}` должен вернуть ответ со статус-кодом 200.'
+    )
+    assert response.json() == {
+        'donation_count': 0,
+        'total_donated': 0,
+        'total_invested': 0,
+        'last_donation_date': None,
+    }
+    user_client.post(DONATIONS_URL, json={'full_amount': 100})
+    last = user_client.post(DONATIONS_URL, json={'full_amount': 2000000})
+    data = user_client.get(summary_url).json()
+    assert data == {
+        'donation_count': 2,
+        'total_donated': 2000100,
+        'total_invested': 999900,
+        'last_donation_date': last.json()['create_date'],
+    }, (
+        f'Сводка `{summary_url}` должна учитывать все донаты пользователя '
+        'и суммы, распределённые по проектам.'
+    )
@@ -0,0 +1,74 @@
+import pytest
+from conftest import engine
+from sqlalchemy import event
+
+PROJECTS_URL = '/charity_project/'
+
+
+@pytest.fixture
+def statements():
+    captured = []
+
+    def capture(conn, cursor, statement, *args):
+        captured.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', capture)
+    yield captured
+    event.remove(engine.sync_engine, 'before_cursor_execute', capture)
+
+
+def test_projects_sparse_fields(
+    user_client, charity_project, charity_project_nunchaku, statements
+):
+    response = user_client.get(
+        PROJECTS_URL, params={'fields': 'name,invested_amount,id'}
+    )
+    assert response.status_code == 200, response.json()
+    assert response.json() == [
+        {
+            'name': project.name,
+            'invested_amount': project.invested_amount,
+            'id': project.id,
+        }
+        for project in (charity_project, charity_project_nunchaku)
+    ], 'Ответ должен содержать только запрошенные поля.'
+    selects = [sql for sql in statements if 'FROM charity_project' in sql]
+    assert selects and all('description' not in sql for sql in selects), (
+        'Незапрошенный `description` не должен читаться из БД.'
+    )
+
+
+def test_projects_sparse_fields_with_archive(user_client, charity_project):
+    response = user_client.get(PROJECTS_URL, params={
+        'fields': 'id,create_date', 'include_archived': True,
+    })
+    assert response.json() == [{
+        'id': charity_project.id,
+        'create_date': charity_project.create_date.isoformat(),
+    }]
+
+
+@pytest.mark.parametrize('fields', ['', 'name,secret', 'remaining_amount'])
+def test_unknown_fields(user_client, fields):
+    response = user_client.get(PROJECTS_URL, params={'fields': fields})
+    assert response.status_code == 422, (
+        'Поля должны проверяться по схеме ответа.'
+    )
+
+
+def test_my_donations_sparse_fields(user_client, donation):
+    response = user_client.get('/donation/my', params={'fields': 'comment'})
+    assert response.json() == [{'comment': donation.comment}]
+    response = user_client.get('/donation/my', params={'fields': 'user_id'})
+    assert response.status_code == 422, (
+        '`user_id` не входит в схему ответа `/donation/my`.'
+    )
+
+
+def test_all_donations_sparse_fields(superuser_client, donation):
+    response = superuser_client.get('/donation/', params={
+        'fields': 'user_id,full_amount',
+    })
+    assert response.json() == [{
+        'user_id': donation.user_id, 'full_amount': donation.full_amount,
+    }]
@@ -0,0 +1,57 @@
+from conftest import TestingSessionLocal, app, engine
+from sqlalchemy import event
+
+from app.services.warmup import WarmupState, run_warmup, warm_statements
+
+
+def test_ready_without_warmup(test_client):
+    assert test_client.get('/health/live').json() == {'status': 'ok'}
+    response = test_client.get('/health/ready')
+    assert response.status_code == 200, (
+        'Без прогрева приложение должно сразу быть готовым.'
+    )
+    assert response.json()['skipped'] is True
+
+
+def test_not_ready_until_warmed_up(test_client):
+    app.state.warmup = WarmupState()
+    response = test_client.get('/health/ready')
+    assert response.status_code == 503, (
+        'Пока идёт прогрев, `/health/ready` должен отвечать 503.'
+    )
+    assert test_client.get('/health/live').status_code == 200
+
+
+async def test_warmup_steps():
+    state = WarmupState()
+    await run_warmup(
+        state,
+        session_factory=TestingSessionLocal,
+        target_engine=engine,
+        connections=2,
+        bcrypt=True,
+    )
+    assert state.ready and state.error is None
+    assert set(state.steps_ms) == {'pool', 'statements', 'reports', 'bcrypt'}
+    assert state.duration_ms >= sum(state.steps_ms.values()) * 0.99
+
+
+async def test_warmup_queries_bounded():
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', record)
+    try:
+        await warm_statements(TestingSessionLocal)
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', record)
+    unbounded = [
+        statement for statement in statements
+        if 'ORDER BY' in statement and 'LIMIT' not in statement and
+        'user_id = ?' not in statement
+    ]
+    assert statements and not unbounded, (
+        'Прогрев не должен читать очереди и списки целиком.'
+    )
@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from conftest import TestingSessionLocal
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+
+DONATION_URL = '/donation/'
+PROJECTS_URL = '/charity_project/'
+KEY = {'Idempotency-Key': '5a0b1c9e-retry'}
+
+
+@pytest.mark.usefixtures('charity_project')
+def test_repeated_key_replays_response(admin_client):
+    first = admin_client.post(
+        DONATION_URL, json={'full_amount': 100}, headers=KEY
+    )
+    second = admin_client.post(
+        DONATION_URL, json={'full_amount': 100}, headers=KEY
+    )
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json(), (
+        'Повтор запроса с тем же `Idempotency-Key` должен вернуть '
+        'сохранённый ответ.'
+    )
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert len(admin_client.get(DONATION_URL).json()) == 1, (
+        'Повтор с тем же ключом не должен создавать новый донат.'
+    )
+    assert admin_client.get(PROJECTS_URL).json()[0]['invested_amount'] == 100
+
+    other_body = admin_client.post(
+        DONATION_URL, json={'full_amount': 5}, headers=KEY
+    )
+    assert other_body.status_code == 422, (
+        'Тот же ключ с другим телом запроса должен отклоняться.'
+    )
+    assert admin_client.post(
+        PROJECTS_URL, headers=KEY, json={
+            'name': 'nunchaku',
+            'description': 'Nunchaku is better',
+            'full_amount': 50,
+        },
+    ).status_code == 200, 'Ключи действуют в пределах эндпоинта.'
+
+
+def test_concurrent_duplicates_wait(admin_client):
+    def post(_):
+        return admin_client.post(
+            DONATION_URL, json={'full_amount': 100}, headers=KEY
+        ).json()
+
+    with ThreadPoolExecutor(5) as pool:
+        responses = list(pool.map(post, range(5)))
+    assert all(response == responses[0] for response in responses)
+    assert len(admin_client.get(DONATION_URL).json()) == 1, (
+        'Одновременные повторы должны дождаться первого запроса.'
+    )
+
+
+def test_expired_key_is_reused(admin_client, monkeypatch):
+    monkeypatch.setattr(settings, 'idempotency_ttl_hours', 0)
+    for _ in range(2):
+        admin_client.post(
+            DONATION_URL, json={'full_amount': 100}, headers=KEY
+        )
+    assert len(admin_client.get(DONATION_URL).json()) == 2
+
+
+async def test_expired_keys_purged_without_outbox(admin_client, monkeypatch):
+    from app.services.idempotency import PurgeSchedule
+
+    monkeypatch.setattr(settings, 'outbox_workers', 0)
+    monkeypatch.setattr(
+        'app.services.idempotency.expired_keys_purge', PurgeSchedule(60)
+    )
+    async with TestingSessionLocal() as session:
+        session.add(IdempotencyKey(
+            scope='donation', key='stale', fingerprint='-',
+            expires_at=datetime.now() - timedelta(hours=1),
+        ))
+        await session.commit()
+
+    admin_client.post(DONATION_URL, json={'full_amount': 100}, headers=KEY)
+    async with TestingSessionLocal() as session:
+        keys = (await session.execute(
+            select(IdempotencyKey.key)
+        )).scalars().all()
+    assert keys == [KEY['Idempotency-Key']], (
+        'Просроченные ключи должны удаляться и без воркеров outbox.'
+    )
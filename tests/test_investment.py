@@ -60,3 +60,43 @@ def test_donation_to_little_invest_project(
     )
     assert not charity_project_nunchaku.fully_invested, common_asser_msg
     assert charity_project_nunchaku.invested_amount == 0, common_asser_msg
+
+
+async def remaining_amounts():
+    from conftest import TestingSessionLocal
+    from sqlalchemy import select
+    from app.models.charity_project import CharityProject
+
+    async with TestingSessionLocal() as session:
+        result = await session.execute(
+            select(CharityProject.name, CharityProject.remaining_amount)
+        )
+        return dict(result.all())
+
+
+async def test_remaining_amount_follows_allocation(
+        admin_client, charity_project_little_invested,
+        charity_project_nunchaku
+):
+    common_asser_msg = (
+        'Поле `remaining_amount` должно равняться '
+        '`full_amount - invested_amount` и обнуляться при закрытии.'
+    )
+    project_id = charity_project_little_invested.id
+    nunchaku_id = charity_project_nunchaku.id
+    assert await remaining_amounts() == {
+        'chimichangas4life': 999900, 'nunchaku': 5000000,
+    }, common_asser_msg
+    admin_client.post(DONATION_URL, json={'full_amount': 900})
+    assert await remaining_amounts() == {
+        'chimichangas4life': 999000, 'nunchaku': 5000000,
+    }, common_asser_msg
+    admin_client.patch(
+        f'{PROJECTS_URL}{nunchaku_id}', json={'full_amount': 10}
+    )
+    admin_client.patch(
+        f'{PROJECTS_URL}{project_id}', json={'full_amount': 1000}
+    )
+    assert await remaining_amounts() == {
+        'chimichangas4life': 0, 'nunchaku': 10,
+    }, common_asser_msg
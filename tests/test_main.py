@@ -0,0 +1,57 @@
+import json
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from app.main import OPENAPI_PATH, create_app
+
+
+def test_checked_in_openapi_up_to_date():
+    generated = create_app(openapi_static=False).openapi()
+    checked_in = json.loads(OPENAPI_PATH.read_text(encoding='utf-8'))
+    assert generated == checked_in, (
+        'openapi.json устарел: выполните '
+        '`python -m app.main --write-openapi openapi.json`.'
+    )
+
+
+def test_static_openapi_served():
+    app = create_app(openapi_static=True)
+    with TestClient(app) as client:
+        response = client.get('/openapi.json')
+    assert response.status_code == 200
+    assert response.json() == json.loads(
+        OPENAPI_PATH.read_text(encoding='utf-8')
+    )
+
+
+def test_heavy_dependencies_imported_lazily():
+    code = (
+        'import sys, app.main; '
+        'print(sorted({"passlib", "jwt"} & set(sys.modules)))'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True, text=True, check=True,
+        cwd=OPENAPI_PATH.parent,
+    )
+    assert result.stdout.strip() == '[]', (
+        'passlib и jwt не должны импортироваться при импорте приложения.'
+    )
+
+
+def test_app_built_on_first_access():
+    code = (
+        'import app.main as main; print(main._app is None); '
+        'print(main.app is main.app, main._app is main.app)'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True, text=True, check=True,
+        cwd=OPENAPI_PATH.parent,
+    )
+    assert result.stdout.split() == ['True', 'True', 'True'], (
+        'Импорт `app.main` не должен создавать приложение: с '
+        '`--factory` оно создавалось бы дважды.'
+    )
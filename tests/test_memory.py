@@ -0,0 +1,70 @@
+import pytest
+
+from app.services.memory import allocation_tracer
+
+MEMORY_URL = '/memory/'
+TRACEMALLOC_URL = '/memory/tracemalloc/'
+
+
+@pytest.fixture
+def tracer_stopped():
+    yield
+    if allocation_tracer.tracing:
+        allocation_tracer.stop()
+
+
+def test_memory_report(superuser_client, charity_project, donation):
+    response = superuser_client.get(MEMORY_URL)
+    assert response.status_code == 200, response.json()
+    data = response.json()
+    assert {'CharityProject', 'Donation'} <= data['orm_instances'].keys()
+    assert data['orm_instances']['CharityProject'] >= 1, (
+        'Живые ORM-объекты должны учитываться.'
+    )
+    assert {
+        'closed_projects_report', 'idempotency_locks', 'primary_pins',
+        'progress_subscribers', 'sql_compiled_statements',
+    } <= data['caches'].keys(), 'Отчёт должен включать кеши приложения.'
+    assert data['tracemalloc']['tracing'] is False
+
+
+def test_memory_superuser_only(user_client):
+    assert user_client.get(MEMORY_URL).status_code == 403
+    assert user_client.post(
+        TRACEMALLOC_URL + 'start'
+    ).status_code == 403
+    assert allocation_tracer.tracing is False
+
+
+def test_tracemalloc_diff(superuser_client, tracer_stopped):
+    assert superuser_client.get(
+        TRACEMALLOC_URL + 'top'
+    ).status_code == 409, 'Без tracemalloc отчёт недоступен.'
+    response = superuser_client.post(
+        TRACEMALLOC_URL + 'start', params={'frames': 5}
+    )
+    assert response.json()['tracing'] is True
+    assert superuser_client.post(
+        TRACEMALLOC_URL + 'snapshot'
+    ).json()['has_baseline'] is True
+
+    leak = [bytearray(1024) for _ in range(1000)]  # noqa: F841
+    response = superuser_client.get(TRACEMALLOC_URL + 'top', params={
+        'compare': True, 'limit': 5,
+    })
+    data = response.json()
+    assert data['compared'] is True
+    assert any(
+        'test_memory.py' in site['site'] and site['size_diff'] >= 1024000
+        for site in data['sites']
+    ), 'Рост памяти с базового снимка должен указывать на место выделения.'
+
+    response = superuser_client.get(TRACEMALLOC_URL + 'top', params={
+        'group_by': 'traceback', 'limit': 1,
+    })
+    assert response.json()['sites'][0]['size_diff'] is None
+
+    response = superuser_client.post(TRACEMALLOC_URL + 'stop')
+    assert response.json() == response.json() | {
+        'tracing': False, 'has_baseline': False,
+    }
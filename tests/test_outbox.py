@@ -0,0 +1,236 @@
+from datetime import datetime, timedelta
+
+import asyncio
+
+import pytest
+from conftest import engine
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.outbox import outbox_crud
+from app.models.outbox import OutboxEvent
+from app.services.outbox import (
+    OutboxHandlers, OutboxWorkerPool, outbox_handlers,
+)
+
+PROJECTS_URL = '/charity_project/'
+DONATION_URL = '/donation/'
+
+WorkerSessionLocal = sessionmaker(
+    class_=AsyncSession, expire_on_commit=False, bind=engine,
+)
+
+
+async def outbox_events():
+    async with WorkerSessionLocal() as session:
+        result = await session.execute(
+            select(OutboxEvent).order_by(OutboxEvent.id)
+        )
+        return list(result.scalars().all())
+
+
+async def queue_events(*event_types):
+    async with WorkerSessionLocal() as session:
+        for number, event_type in enumerate(event_types):
+            outbox_crud.add(session, event_type, number=number)
+        await session.commit()
+
+
+async def test_events_written_with_allocation(admin_client):
+    admin_client.post(PROJECTS_URL, json={
+        'name': 'chimichangas4life',
+        'description': 'Huge fan of chimichangas',
+        'full_amount': 100,
+    })
+    admin_client.post(DONATION_URL, json={'full_amount': 150})
+    events = [
+        (event.event_type, event.payload) for event in await outbox_events()
+    ]
+    assert events == [
+        ('donation_created', {'donation_id': 1, 'user_id': 1, 'amount': 150}),
+        ('project_closed', {'project_id': 1}),
+    ], 'Создание доната должно записывать события outbox в той же транзакции.'
+
+
+async def test_worker_delivers_and_retries():
+    handlers = OutboxHandlers()
+    seen = []
+    calls = {'flaky': 0}
+
+    @handlers.register('donation_created')
+    async def record(session, payload):
+        seen.append(payload['number'])
+
+    @handlers.register('project_closed')
+    async def flaky(session, payload):
+        calls['flaky'] += 1
+        if calls['flaky'] == 1:
+            raise RuntimeError('temporary failure')
+
+    await queue_events('donation_created', 'project_closed')
+    pool = OutboxWorkerPool(
+        WorkerSessionLocal, handlers, workers=1, batch_size=10,
+    )
+    assert await pool.run_once() == 2
+    assert seen == [0]
+    first, second = await outbox_events()
+    assert first.processed_at is not None and first.locked_by is None
+    assert second.processed_at is None and second.attempts == 1
+    assert 'temporary failure' in second.last_error
+    assert second.available_at > datetime.now(), (
+        'Упавшее событие должно откладываться до повторной попытки.'
+    )
+
+    assert await pool.run_once() == 0, 'Повтор не должен наступать сразу.'
+    async with WorkerSessionLocal() as session:
+        await session.execute(
+            update(OutboxEvent).values(available_at=datetime.now())
+        )
+        await session.commit()
+    assert await pool.run_once() == 1
+    assert calls['flaky'] == 2
+    assert pool.metrics.snapshot()['delivered'] == 2
+    assert pool.metrics.snapshot()['retried'] == 1
+    async with WorkerSessionLocal() as session:
+        lag = await outbox_crud.get_lag(session)
+    assert lag.pending == 0
+
+
+async def test_lease_prevents_double_delivery():
+    await queue_events('donation_created')
+    async with WorkerSessionLocal() as session:
+        claimed = await outbox_crud.claim(session, 10, lease_seconds=30)
+        await session.commit()
+        assert len(claimed) == 1
+        assert await outbox_crud.claim(session, 10, lease_seconds=30) == [], (
+            'Событие под арендой не должно выдаваться другому воркеру.'
+        )
+        # The worker died: once the lease expires the event is redelivered
+        await session.execute(update(OutboxEvent).values(
+            locked_until=datetime.now() - timedelta(seconds=1)
+        ))
+        await session.commit()
+        reclaimed = await outbox_crud.claim(session, 10, lease_seconds=30)
+        await session.commit()
+    assert [event.id for event in reclaimed] == [claimed[0].id]
+    assert reclaimed[0].attempts == 2
+
+
+async def test_event_given_up_after_max_attempts():
+    attempts = 3
+    handlers = OutboxHandlers()
+
+    @handlers.register('donation_created')
+    async def broken(session, payload):
+        raise RuntimeError('permanent failure')
+
+    await queue_events('donation_created')
+    pool = OutboxWorkerPool(
+        WorkerSessionLocal, handlers, workers=1, max_attempts=attempts,
+    )
+    for _ in range(attempts):
+        async with WorkerSessionLocal() as session:
+            await session.execute(
+                update(OutboxEvent).values(available_at=datetime.now())
+            )
+            await session.commit()
+        await pool.run_once()
+    [event] = await outbox_events()
+    assert event.failed and event.processed_at is not None
+    assert pool.metrics.failed == 1
+
+
+async def test_worker_pool_drains_in_background():
+    handlers = OutboxHandlers()
+    seen = []
+
+    @handlers.register('donation_created')
+    async def record(session, payload):
+        seen.append(payload['number'])
+
+    pool = OutboxWorkerPool(
+        WorkerSessionLocal, handlers,
+        workers=2, batch_size=2, poll_interval=0.01,
+    )
+    await pool.start()
+    try:
+        await queue_events(*['donation_created'] * 5)
+        for _ in range(100):
+            if len(seen) == 5:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await pool.stop()
+    assert sorted(seen) == [0, 1, 2, 3, 4], (
+        'Каждое событие должно быть доставлено ровно один раз.'
+    )
+    assert not pool.running
+
+
+async def test_worker_survives_purge_failure(monkeypatch):
+    handlers = OutboxHandlers()
+    seen = []
+    purges = []
+
+    @handlers.register('donation_created')
+    async def record(session, payload):
+        seen.append(payload['number'])
+
+    async def broken_purge(session, before):
+        purges.append(before)
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(outbox_crud, 'purge_processed', broken_purge)
+    pool = OutboxWorkerPool(
+        WorkerSessionLocal, handlers,
+        workers=1, poll_interval=0.01, purge_interval=0.01,
+    )
+    await pool.start()
+    try:
+        await queue_events('donation_created')
+        for _ in range(100):
+            if len(purges) >= 2 and seen:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await pool.stop()
+    assert len(purges) >= 2, 'Очистка должна повторяться после ошибки.'
+    assert seen == [0], 'Ошибка очистки не должна мешать доставке.'
+
+
+async def test_delivered_events_purged_without_workers():
+    await queue_events('donation_created', 'project_closed')
+    async with WorkerSessionLocal() as session:
+        await session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id == 1)
+            .values(processed_at=datetime.now() - timedelta(days=2))
+        )
+        await session.commit()
+    pool = OutboxWorkerPool(
+        WorkerSessionLocal, OutboxHandlers(),
+        workers=0, purge_interval=0.01,
+    )
+    await pool.start()
+    try:
+        for _ in range(100):
+            if len(await outbox_events()) == 1:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await pool.stop()
+    assert [event.id for event in await outbox_events()] == [2], (
+        'Доставленные события должны удаляться и без воркеров; '
+        'недоставленные — оставаться.'
+    )
+    assert not pool.running
+
+
+@pytest.mark.parametrize('event_type', [
+    'donation_created', 'project_closed', 'donation_fully_invested',
+])
+def test_every_event_type_has_a_handler(event_type):
+    assert outbox_handlers.for_type(event_type), (
+        f'Для событий `{event_type}` должен быть зарегистрирован обработчик.'
+    )
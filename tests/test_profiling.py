@@ -0,0 +1,173 @@
+import asyncio
+import pstats
+
+import pytest
+from conftest import (
+    TestingSessionLocal, get_async_session, get_read_session, override_db,
+)
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profiling import PROFILE_START, RequestProfiler
+from app.core.security import create_access_token
+from app.main import create_app
+from app.models.auth_user import AuthUser
+
+PROJECTS_URL = '/charity_project/'
+DONATIONS_URL = '/donation/'
+
+
+async def bearer(is_superuser):
+    async with TestingSessionLocal() as session:
+        user = AuthUser(
+            email=f'{is_superuser}@pool.com',
+            hashed_password='-',
+            is_superuser=is_superuser,
+        )
+        session.add(user)
+        await session.flush()
+        user_id = user.id
+        await session.commit()
+        return {
+            'Authorization': 'Bearer ' + create_access_token(
+                {'sub': str(user_id)}
+            ),
+        }
+
+
+@pytest.fixture
+def profiled_client(monkeypatch, tmp_path):
+    # Real authentication: it decides whether the profile starts
+    monkeypatch.setattr(settings, 'profile_dir', '')
+    inner = create_app()
+    inner.dependency_overrides = {
+        get_async_session: override_db,
+        get_read_session: override_db,
+    }
+    profiler = RequestProfiler(inner, str(tmp_path))
+    with TestClient(profiler) as client:
+        yield client
+
+
+async def test_profile_request(profiled_client, tmp_path):
+    headers = await bearer(is_superuser=True)
+    profiled_client.post('/donation/', headers=headers, json={
+        'full_amount': 100,
+    })
+    response = profiled_client.post(
+        PROJECTS_URL,
+        params={'_profile': 1},
+        headers=headers,
+        json={'name': 'cat', 'description': 'food', 'full_amount': 10},
+    )
+    assert response.status_code == 200, response.json()
+    timings = dict(
+        item.strip().split(';dur=')
+        for item in response.headers['server-timing'].split(',')
+    )
+    assert list(timings) == ['total', 'allocation', 'sql', 'serialization']
+    assert float(timings['sql']) > 0
+    assert float(timings['total']) >= float(timings['allocation'])
+    stats = pstats.Stats(str(tmp_path / response.headers['x-profile']))
+    assert any(
+        key[0].endswith('investment.py') for key in stats.stats
+    ), 'Профиль должен включать распределение донатов.'
+
+    response = profiled_client.get(
+        DONATIONS_URL, headers={'X-Profile': '1', **headers}
+    )
+    assert 'server-timing' in response.headers
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+async def test_profile_public_endpoint_not_profiled(profiled_client, tmp_path):
+    # Nobody is authenticated, so the token isn't even looked at
+    response = profiled_client.get(
+        PROJECTS_URL, params={'_profile': 1},
+        headers=await bearer(is_superuser=True),
+    )
+    assert response.status_code == 200
+    assert 'x-profile' not in response.headers
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize('query', ['', '_profile=0'])
+async def test_profile_not_requested(profiled_client, tmp_path, query):
+    response = profiled_client.get(
+        f'{DONATIONS_URL}?{query}', headers=await bearer(is_superuser=True)
+    )
+    assert response.status_code == 200
+    assert 'server-timing' not in response.headers
+    assert not list(tmp_path.iterdir())
+
+
+async def test_profile_superuser_only(profiled_client, tmp_path):
+    for headers, code in (
+        ({}, 401), (await bearer(is_superuser=False), 200),
+    ):
+        response = profiled_client.get(
+            f'{DONATIONS_URL}my', params={'_profile': 1}, headers=headers
+        )
+        assert response.status_code == code
+        assert 'x-profile' not in response.headers, (
+            'Профилирование доступно только суперюзеру.'
+        )
+    assert not list(tmp_path.iterdir())
+
+
+def streaming_profiler(directory, max_files=0):
+    """A profiler around a stream that ends when `done` is set."""
+    done = asyncio.Event()
+
+    async def stream(scope, receive, send):
+        # Stands in for the authentication of a superuser
+        await scope['state'][PROFILE_START]()
+        await send({'type': 'http.response.start', 'status': 200})
+        await send({'type': 'http.response.body', 'body': b'data: 1\n\n',
+                    'more_body': True})
+        if scope['path'] == '/stream':
+            await done.wait()
+        await send({'type': 'http.response.body', 'body': b''})
+
+    return RequestProfiler(stream, str(directory), max_files), done
+
+
+async def profiled_call(profiler, path):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    await profiler({
+        'type': 'http', 'method': 'GET', 'path': path,
+        'query_string': b'_profile=1', 'headers': [],
+    }, receive, send)
+    return messages
+
+
+async def test_profile_stream_releases_lock(tmp_path):
+    profiler, done = streaming_profiler(tmp_path)
+    stream = asyncio.create_task(profiled_call(profiler, '/stream'))
+    # An endless stream must not hold the next profile back
+    messages = await asyncio.wait_for(
+        profiled_call(profiler, '/other'), timeout=5
+    )
+    assert dict(messages[0]['headers'])[b'x-profile']
+    assert not stream.done()
+    done.set()
+    await stream
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+async def test_profile_dir_keeps_newest(tmp_path):
+    profiler, _ = streaming_profiler(tmp_path, max_files=2)
+    names = []
+    for number in range(4):
+        messages = await profiled_call(profiler, f'/path{number}')
+        names.append(dict(messages[0]['headers'])[b'x-profile'].decode())
+    assert sorted(path.name for path in tmp_path.iterdir()) == names[2:], (
+        'В каталоге профилей должны оставаться только последние файлы.'
+    )
@@ -0,0 +1,161 @@
+import asyncio
+
+from app.services.progress import (
+    RESET, ProgressBroker, progress_broker, progress_events,
+)
+from app.services.progress_relay import ProgressRelay, ProgressRelayClient
+
+PROJECTS_URL = '/charity_project/'
+DONATION_URL = '/donation/'
+
+
+def test_allocation_publishes_progress(admin_client):
+    subscription = progress_broker.subscribe()
+    try:
+        admin_client.post(PROJECTS_URL, json={
+            'name': 'chimichangas4life',
+            'description': 'Huge fan of chimichangas',
+            'full_amount': 100,
+        })
+        admin_client.post(DONATION_URL, json={'full_amount': 30})
+        admin_client.post(DONATION_URL, json={'full_amount': 100})
+        admin_client.post(DONATION_URL, json={'full_amount': 5})
+        deltas = subscription.drain()
+    finally:
+        subscription.close()
+    assert deltas == [
+        {'id': 1, 'invested_amount': 0, 'fully_invested': False},
+        {'id': 1, 'invested_amount': 30, 'fully_invested': False},
+        {'id': 1, 'invested_amount': 100, 'fully_invested': True},
+    ], 'После каждого коммита, изменившего проект, должна уходить дельта.'
+    assert subscription not in progress_broker.subscribers
+
+
+def test_slow_subscriber_dropped():
+    broker = ProgressBroker(max_queue=2)
+    slow = broker.subscribe()
+    fast = broker.subscribe()
+    for invested in (10, 20):
+        broker.publish({'id': 1, 'invested_amount': invested})
+    fast.drain()
+    broker.publish({'id': 1, 'invested_amount': 30})
+    assert slow.dropped and slow.drain() == [RESET], (
+        'Переполненный подписчик должен отключаться с событием reset.'
+    )
+    assert not fast.dropped
+    assert fast.drain() == [{'id': 1, 'invested_amount': 30}]
+    assert broker.subscribers == {fast}
+
+
+async def test_progress_events_stream():
+    broker = ProgressBroker(max_queue=8)
+    events = progress_events(broker, keepalive_seconds=0.01)
+    assert (await events.__anext__()).startswith('retry: ')
+    assert await events.__anext__() == ': keepalive\n\n'
+    broker.publish({'id': 1, 'invested_amount': 5, 'fully_invested': False})
+    broker.publish({'id': 2, 'invested_amount': 9, 'fully_invested': True})
+    assert await events.__anext__() == (
+        'event: progress\n'
+        'data: {"id":1,"invested_amount":5,"fully_invested":false}\n\n'
+        'event: progress\n'
+        'data: {"id":2,"invested_amount":9,"fully_invested":true}\n\n'
+    ), 'Накопившиеся дельты должны уходить одним куском.'
+    await events.aclose()
+    assert len(broker) == 0, 'Закрытый поток должен отписываться.'
+
+
+async def test_soak_thousands_of_idle_subscribers():
+    subscribers, messages = 3000, 5
+    broker = ProgressBroker(max_queue=messages)
+    received = [0] * subscribers
+
+    async def consume(number):
+        async for chunk in progress_events(broker, keepalive_seconds=60):
+            received[number] += chunk.count('event: progress')
+            if received[number] == messages:
+                return
+
+    async def drained():
+        while any(
+            not subscription.queue.empty()
+            for subscription in broker.subscribers
+            if subscription is not stalled
+        ):
+            await asyncio.sleep(0)
+
+    consumers = [
+        asyncio.create_task(consume(number)) for number in range(subscribers)
+    ]
+    stalled = broker.subscribe()
+    while len(broker) < subscribers + 1:
+        await asyncio.sleep(0)
+    for invested in range(messages):
+        broker.publish({'id': 1, 'invested_amount': invested})
+        await drained()
+    await asyncio.wait_for(asyncio.gather(*consumers), timeout=30)
+    assert received == [messages] * subscribers
+    broker.publish({'id': 1, 'invested_amount': messages})
+    assert stalled.dropped and broker.dropped == 1, (
+        'Только не читающий подписчик должен быть отключён.'
+    )
+
+
+async def test_relay_fans_out_between_processes():
+    server = await ProgressRelay().serve('127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    first, second = ProgressBroker(8), ProgressBroker(8)
+    clients = [
+        ProgressRelayClient(broker, f'127.0.0.1:{port}')
+        for broker in (first, second)
+    ]
+    try:
+        for client in clients:
+            await client.start()
+            await asyncio.wait_for(client.connected.wait(), timeout=5)
+        local = first.subscribe()
+        remote = second.subscribe()
+        first.publish({'id': 7, 'invested_amount': 70})
+        delta = await asyncio.wait_for(remote.get(), timeout=5)
+        assert delta == {'id': 7, 'invested_amount': 70}, (
+            'Дельта должна доходить до подписчиков другого процесса.'
+        )
+        await asyncio.sleep(0.05)
+        assert local.drain() == [{'id': 7, 'invested_amount': 70}], (
+            'Релей не должен возвращать дельту отправителю.'
+        )
+    finally:
+        for client in clients:
+            await client.stop()
+        server.close()
+        await server.wait_closed()
+
+
+async def test_relay_client_survives_bad_lines_and_restarts():
+    relay = ProgressRelay()
+    server = await relay.serve('127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    broker = ProgressBroker(8)
+    client = ProgressRelayClient(broker, f'127.0.0.1:{port}')
+    try:
+        await client.start()
+        await asyncio.wait_for(client.connected.wait(), timeout=5)
+        subscription = broker.subscribe()
+        await asyncio.sleep(0.05)
+        for peer in relay.peers:
+            peer.write(b'not json\n[1, 2]\n{"id": 7}\n')
+        delta = await asyncio.wait_for(subscription.get(), timeout=5)
+        assert delta == {'id': 7}, (
+            'Некорректная строка не должна останавливать клиент релея.'
+        )
+
+        server.close()
+        for peer in list(relay.peers):
+            peer.close()
+        await server.wait_closed()
+        await asyncio.sleep(0.05)
+        server = await relay.serve('127.0.0.1', port)
+        await asyncio.wait_for(client.connected.wait(), timeout=5)
+    finally:
+        await client.stop()
+        server.close()
+        await server.wait_closed()
@@ -0,0 +1,125 @@
+"""Statement budgets of the main endpoints.
+
+Each budget must hold whatever the size of the queues: a test that
+fails here usually means a loop started issuing a statement per row
+(N+1) or a handler refreshes what it has just written.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from conftest import TestingSessionLocal
+
+from app.models.charity_project import CharityProject
+from app.models.donation import Donation
+
+QUERY_BUDGETS = {
+    'POST /donation/': 10,
+    'POST /charity_project/': 12,
+    'PATCH /charity_project/{id}': 4,
+    'DELETE /charity_project/{id}': 6,
+    'GET /charity_project/': 1,
+    'GET /charity_project/batch': 1,
+    'GET /donation/': 1,
+    'GET /donation/my': 1,
+    'GET /donation/my/summary': 1,
+    'GET /stats/': 1,
+}
+QUEUE_SIZES = [1, 30]
+
+
+@pytest.fixture
+def within_budget(admin_client, count_queries):
+    def call(endpoint, **kwargs):
+        method, path = endpoint.split(' ')
+        url = path.format(**kwargs.pop('path_params', {}))
+        with count_queries() as queries:
+            response = admin_client.request(method, url, **kwargs)
+        assert response.status_code == 200, response.json()
+        queries.check(QUERY_BUDGETS[endpoint], endpoint)
+        return response
+    return call
+
+
+async def add_rows(objects):
+    async with TestingSessionLocal() as session:
+        session.add_all(objects)
+        await session.commit()
+
+
+async def open_projects(size):
+    now = datetime.now()
+    await add_rows([
+        CharityProject(
+            name=f'project {number}',
+            description='description',
+            full_amount=10,
+            create_date=now - timedelta(hours=size - number),
+        )
+        for number in range(size)
+    ])
+
+
+async def open_donations(size):
+    # Different donors and hours: one summary and rollup row each
+    now = datetime.now()
+    await add_rows([
+        Donation(
+            user_id=100 + number,
+            full_amount=10,
+            create_date=now - timedelta(hours=size - number),
+        )
+        for number in range(size)
+    ])
+
+
+@pytest.mark.parametrize('size', QUEUE_SIZES)
+async def test_create_donation_budget(within_budget, size):
+    await open_projects(size)
+    # Closes all projects but the last one
+    response = within_budget('POST /donation/', json={
+        'full_amount': size * 10 - 5,
+    })
+    assert response.json()['full_amount'] == size * 10 - 5
+
+
+@pytest.mark.parametrize('size', QUEUE_SIZES)
+async def test_create_project_budget(within_budget, size):
+    await open_donations(size)
+    within_budget('POST /charity_project/', json={
+        'name': 'cat food',
+        'description': 'description',
+        'full_amount': size * 10 - 5,
+    })
+
+
+@pytest.mark.parametrize('size', QUEUE_SIZES)
+async def test_read_budgets(within_budget, size):
+    await open_projects(size)
+    await open_donations(size)
+    for endpoint in QUERY_BUDGETS:
+        if endpoint.startswith('GET '):
+            within_budget(endpoint, params={'ids': '1,2,3'})
+
+
+async def test_update_and_delete_budgets(within_budget):
+    await open_projects(2)
+    within_budget(
+        'PATCH /charity_project/{id}',
+        path_params={'id': 1},
+        json={'full_amount': 20},
+    )
+    within_budget('DELETE /charity_project/{id}', path_params={'id': 2})
+
+
+def test_budget_failure_lists_statements(count_queries):
+    from app.core.query_counter import QueryBudgetExceeded
+
+    queries = count_queries()
+    queries.statements = ['SELECT 1', 'SELECT\n  2']
+    with pytest.raises(QueryBudgetExceeded) as error:
+        queries.check(1, 'GET /')
+    assert str(error.value) == (
+        'GET / ran 2 SQL statements, budget is 1:\n'
+        '1. SELECT 1\n'
+        '2. SELECT 2'
+    )
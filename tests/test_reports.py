@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+REPORT_URL = '/charity_project/report'
+
+
+@pytest.fixture
+def closed_projects(mixer):
+    from app.services.reports import closed_projects_report
+
+    closed_projects_report.invalidate()
+    start = datetime(2010, 10, 10)
+    return [
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=name,
+            description='Closed',
+            full_amount=100,
+            invested_amount=100,
+            fully_invested=True,
+            create_date=start,
+            close_date=start + timedelta(seconds=seconds),
+        )
+        for name, seconds in (('slow', 3600), ('fast', 60), ('medium', 600))
+    ]
+
+
+@pytest.mark.usefixtures('closed_projects', 'charity_project_nunchaku')
+def test_speed_report_sorted_in_sql(superuser_client):
+    response = superuser_client.get(REPORT_URL)
+    assert response.status_code == 200, (
+        f'GET-запрос суперпользователя к `{REPORT_URL}` должен вернуть 200.'
+    )
+    data = response.json()
+    assert [(row['name'], row['duration_seconds']) for row in data] == [
+        ('fast', 60), ('medium', 600), ('slow', 3600),
+    ], 'Отчёт должен содержать только закрытые проекты, быстрые первыми.'
+    top = superuser_client.get(REPORT_URL, params={'limit': 1}).json()
+    assert [row['name'] for row in top] == ['fast']
+
+
+@pytest.mark.usefixtures('closed_projects')
+def test_speed_report_csv(superuser_client):
+    response = superuser_client.get(REPORT_URL, params={'format': 'csv'})
+    assert response.headers['content-type'].startswith('text/csv')
+    lines = response.text.splitlines()
+    assert lines[0] == 'id,name,create_date,close_date,duration_seconds'
+    assert [line.split(',')[1] for line in lines[1:]] == [
+        'fast', 'medium', 'slow',
+    ]
+
+
+@pytest.mark.usefixtures('closed_projects')
+def test_speed_report_cache_invalidated_on_close(superuser_client, donation):
+    assert len(superuser_client.get(REPORT_URL).json()) == 3
+    superuser_client.post('/charity_project/', json={
+        'name': 'instant',
+        'description': 'Closed by an existing donation',
+        'full_amount': 10,
+    })
+    names = [row['name'] for row in superuser_client.get(REPORT_URL).json()]
+    assert 'instant' in names, (
+        'Закрытие проекта должно сбрасывать кеш отчёта.'
+    )
+
+
+@pytest.mark.usefixtures('closed_projects')
+async def test_speed_report_sees_closings_of_other_processes(
+    superuser_client
+):
+    from sqlalchemy import insert
+
+    from conftest import TestingSessionLocal
+    from app.crud.fund_stats import fund_stats_crud
+    from app.models.charity_project import CharityProject
+
+    assert len(superuser_client.get(REPORT_URL).json()) == 3
+    # As if closed by another process: nothing in this one sees the ORM
+    # object change
+    async with TestingSessionLocal() as session:
+        await session.execute(insert(CharityProject).values(
+            name='elsewhere', description='Closed', full_amount=1,
+            invested_amount=1, fully_invested=True, remaining_amount=0,
+            create_date=datetime(2010, 10, 10),
+            close_date=datetime(2010, 10, 10, 0, 0, 1),
+        ))
+        await fund_stats_crud.add(session, closed_projects=1)
+        await session.commit()
+    names = [row['name'] for row in superuser_client.get(REPORT_URL).json()]
+    assert names[0] == 'elsewhere', (
+        'Кеш отчёта должен сверяться с числом закрытых проектов в БД.'
+    )
+
+
+def test_speed_report_superuser_only(user_client):
+    assert user_client.get(REPORT_URL).status_code == 403
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from conftest import (
+    app, current_superuser, get_async_session, get_read_session, override_db,
+)
+from fastapi.testclient import TestClient
+from fixtures.user import superuser
+
+from app.core.constants import REQUEST_LOG_MAX_BODY_BYTES
+from app.core.request_log import RequestRecorder
+
+
+@pytest.fixture
+def overrides(monkeypatch):
+    # Not nested in another client: the app's startup must run once
+    monkeypatch.setattr(app, 'dependency_overrides', {
+        get_async_session: override_db,
+        get_read_session: override_db,
+        current_superuser: lambda: superuser,
+    })
+
+
+def test_requests_recorded_without_secrets(overrides, tmp_path):
+    trace = tmp_path / 'requests.jsonl'
+    with TestClient(RequestRecorder(app, str(trace))) as client:
+        client.post('/auth/register', json={
+            'email': 'dead@pool.com', 'password': 'chimichangas',
+        })
+        client.get(
+            '/charity_project/', params={'limit': 5},
+            headers={'Authorization': 'Bearer secret-token'},
+        )
+    records = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert [
+        (record['method'], record['path'], record['status'])
+        for record in records
+    ] == [('POST', '/auth/register', 201), ('GET', '/charity_project/', 200)]
+    register, listing = records
+    assert register['body'] == {'email': 'dead@pool.com', 'password': '***'}, (
+        'Пароли не должны попадать в журнал запросов.'
+    )
+    assert register['auth'] is False
+    assert listing['auth'] is True and listing['query'] == 'limit=5'
+    assert 'secret-token' not in trace.read_text()
+    assert listing['offset_ms'] >= register['offset_ms'] == 0
+
+
+def test_only_small_json_bodies_recorded(overrides, tmp_path):
+    trace = tmp_path / 'requests.jsonl'
+    with TestClient(RequestRecorder(app, str(trace))) as client:
+        client.post(
+            '/donation/import?format=ndjson',
+            data='{"full_amount": 100}\n',
+            headers={'Content-Type': 'application/x-ndjson'},
+        )
+        client.post('/charity_project/', json={
+            'name': 'Big', 'full_amount': 100,
+            'description': 'x' * REQUEST_LOG_MAX_BODY_BYTES,
+        })
+    records = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert [record['path'] for record in records] == [
+        '/donation/import', '/charity_project/',
+    ]
+    assert [record['body'] for record in records] == [None, None], (
+        'Потоковые и слишком большие тела не должны записываться в журнал.'
+    )
@@ -0,0 +1,114 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, select
+
+pytest.importorskip('numpy')
+
+
+@pytest.mark.usefixtures(
+    'small_fully_charity_project', 'donation', 'another_donation'
+)
+async def test_snapshot_round_trip(tmp_path):
+    from conftest import TestingSessionLocal
+    from app.models.charity_project import CharityProject
+    from app.models.donation import Donation
+    from app.services.snapshot import (
+        Snapshot, export_snapshot, import_snapshot,
+    )
+
+    counts = await export_snapshot(tmp_path, TestingSessionLocal, 1)
+    assert counts == {
+        'auth_user': 0, 'charity_project': 1, 'donation': 2,
+        'charity_project_archive': 0, 'donation_archive': 0,
+    }
+
+    # Readable without the database
+    snapshot = Snapshot.open(tmp_path)
+    donations = snapshot['donation']
+    assert donations.column('full_amount').tolist() == [100, 2000]
+    assert list(donations.column('comment')) == [
+        'To you for chimichangas', 'From admin',
+    ]
+    assert donations.nulls('close_date').tolist() == [True, True]
+    projects = snapshot['charity_project']
+    assert projects.column('close_date')[0].item() == datetime(2010, 10, 11)
+    assert projects.column('fully_invested').tolist() == [True]
+
+    async with TestingSessionLocal() as session:
+        before = [
+            row._asdict() for row in (await session.execute(
+                select(Donation.__table__).order_by(Donation.id)
+            )).all()
+        ]
+        await session.execute(delete(Donation))
+        await session.execute(delete(CharityProject))
+        await session.commit()
+
+    restored = await import_snapshot(tmp_path, TestingSessionLocal, 1)
+    assert restored == counts
+    async with TestingSessionLocal() as session:
+        after = [
+            row._asdict() for row in (await session.execute(
+                select(Donation.__table__).order_by(Donation.id)
+            )).all()
+        ]
+    assert after == before, (
+        'Восстановленные из снимка донаты должны совпадать с исходными.'
+    )
+    with pytest.raises(RuntimeError):
+        await import_snapshot(tmp_path, TestingSessionLocal)
+
+
+@pytest.mark.usefixtures('donation', 'another_donation')
+async def test_snapshot_import_rebuilds_donor_summaries(tmp_path):
+    from conftest import TestingSessionLocal
+    from app.models.donor_summary import DonorSummary
+    from app.services.snapshot import export_snapshot, import_snapshot
+
+    await export_snapshot(tmp_path, TestingSessionLocal)
+    async with TestingSessionLocal() as session:
+        session.add(DonorSummary(
+            user_id=99, donation_count=5, total_donated=500,
+            total_invested=0,
+        ))
+        await session.commit()
+
+    await import_snapshot(tmp_path, TestingSessionLocal, replace=True)
+    async with TestingSessionLocal() as session:
+        summaries = [
+            (row.user_id, row.donation_count, row.total_donated,
+             row.last_donation_date)
+            for row in (await session.execute(
+                select(DonorSummary).order_by(DonorSummary.user_id)
+            )).scalars()
+        ]
+    assert summaries == [
+        (1, 1, 2000, datetime(2012, 12, 12)),
+        (2, 1, 100, datetime(2011, 11, 11)),
+    ], (
+        'После восстановления снимка сводки донатеров должны быть '
+        'пересчитаны из донатов, а устаревшие строки удалены.'
+    )
+
+
+@pytest.mark.usefixtures('donation', 'another_donation')
+async def test_snapshot_replace_clears_tombstones(tmp_path):
+    from conftest import TestingSessionLocal
+    from app.crud.change_feed import DELETE, get_changes
+    from app.models.donation import Donation
+    from app.services.snapshot import export_snapshot, import_snapshot
+
+    await export_snapshot(tmp_path, TestingSessionLocal)
+    async with TestingSessionLocal() as session:
+        await session.delete(await session.get(Donation, 1))
+        await session.commit()
+
+    await import_snapshot(tmp_path, TestingSessionLocal, replace=True)
+    async with TestingSessionLocal() as session:
+        changes = await get_changes(session, 0, 100)
+        assert await session.get(Donation, 1) is not None
+    assert changes and DELETE not in {change.op for change in changes}, (
+        'После восстановления с --replace лента изменений не должна '
+        'сообщать об удалении восстановленных строк.'
+    )
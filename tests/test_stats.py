@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+STATS_URL = '/stats/'
+CHECK_URL = '/stats/check'
+PROJECTS_URL = '/charity_project/'
+DONATION_URL = '/donation/'
+
+
+def test_stats_empty(test_client):
+    response = test_client.get(STATS_URL)
+    assert response.status_code == 200, (
+        f'GET-запрос к эндпоинту `{STATS_URL}` должен вернуть статус-код 200.'
+    )
+    assert response.json() == {
+        'total_donated': 0,
+        'total_invested': 0,
+        'uninvested_balance': 0,
+        'open_projects': 0,
+        'closed_projects': 0,
+        'open_donations': 0,
+    }
+
+
+def test_stats_follow_allocation(admin_client):
+    admin_client.post(DONATION_URL, json={'full_amount': 300})
+    admin_client.post(PROJECTS_URL, json={
+        'name': 'chimichangas4life',
+        'description': 'Huge fan of chimichangas',
+        'full_amount': 100,
+    })
+    admin_client.post(PROJECTS_URL, json={
+        'name': 'nunchaku',
+        'description': 'Nunchaku is better',
+        'full_amount': 1000,
+    })
+    admin_client.post(DONATION_URL, json={'full_amount': 50})
+    project = admin_client.post(PROJECTS_URL, json={
+        'name': 'to be removed',
+        'description': 'Temporary',
+        'full_amount': 10,
+    }).json()
+    admin_client.delete(f'{PROJECTS_URL}{project["id"]}')
+
+    assert admin_client.get(STATS_URL).json() == {
+        'total_donated': 350,
+        'total_invested': 350,
+        'uninvested_balance': 0,
+        'open_projects': 1,
+        'closed_projects': 1,
+        'open_donations': 0,
+    }, 'Статистика фонда должна обновляться при каждой операции.'
+    assert admin_client.get(CHECK_URL).json() == {
+        'consistent': True,
+        'mismatches': {},
+    }, 'Статистика фонда должна совпадать с полным пересчётом.'
+
+
+@pytest.mark.usefixtures('donation')
+def test_stats_check_reports_mismatch(admin_client):
+    response = admin_client.get(CHECK_URL)
+    data = response.json()
+    assert not data['consistent']
+    assert data['mismatches']['total_donated'] == {
+        'stored': 0, 'actual': 100,
+    }
+    admin_client.post('/stats/rebuild')
+    assert admin_client.get(CHECK_URL).json()['consistent'], (
+        'После пересчёта статистика должна быть согласована.'
+    )
+
+
+@pytest.mark.usefixtures('donation', 'another_donation')
+def test_rebuild_donor_summaries(admin_client):
+    summary_url = DONATION_URL + 'my/summary'
+    assert admin_client.get(summary_url).json()['donation_count'] == 0
+    admin_client.post('/stats/rebuild')
+    assert admin_client.get(summary_url).json() == {
+        'donation_count': 1,
+        'total_donated': 2000,
+        'total_invested': 0,
+        'last_donation_date': '2012-12-12T00:00:00',
+    }, 'Пересчёт должен заполнять сводки по уже сделанным донатам.'
+
+
+def test_stats_check_superuser_only(user_client):
+    assert user_client.get(CHECK_URL).status_code == 403
+
+
+def test_donation_rollups(user_client):
+    user_client.post(DONATION_URL, json={'full_amount': 100})
+    user_client.post(DONATION_URL, json={'full_amount': 50})
+    now = datetime.now()
+    response = user_client.get('/stats/donations', params={
+        'start': (now - timedelta(days=1)).isoformat(),
+        'end': (now + timedelta(days=1)).isoformat(),
+        'granularity': 'hour',
+    })
+    assert response.status_code == 200, (
+        'GET-запрос к эндпоинту `/stats/donations` должен вернуть 200.'
+    )
+    data = response.json()
+    assert sum(row['donation_count'] for row in data) == 2
+    assert sum(row['total_amount'] for row in data) == 150, (
+        'Агрегаты донатов должны обновляться при создании доната.'
+    )
+
+
+async def test_donation_rollup_buckets():
+    from conftest import TestingSessionLocal
+    from app.crud.donation_rollup import donation_rollup_crud
+
+    async with TestingSessionLocal() as session:
+        await donation_rollup_crud.add_many(session, [
+            (datetime(2011, 11, 11, 10, 15), {'total_amount': 100}),
+            (datetime(2011, 11, 11, 10, 45), {'total_amount': 50}),
+            (datetime(2011, 11, 11, 12, 0), {'total_amount': 7}),
+        ])
+        await session.commit()
+        hourly = await donation_rollup_crud.get_range(
+            session, 'hour', datetime(2011, 11, 11), datetime(2011, 11, 12)
+        )
+        daily = await donation_rollup_crud.get_range(
+            session, 'day', datetime(2011, 11, 11), datetime(2011, 11, 12)
+        )
+    assert [(row.bucket_start.hour, row.total_amount) for row in hourly] == [
+        (10, 100 + 50), (12, 7),
+    ], 'Почасовые агрегаты донатов отличаются от ожидаемых.'
+    assert [row.total_amount for row in daily] == [157], (
+        'Дневные агрегаты донатов отличаются от ожидаемых.'
+    )
+
+
+@pytest.mark.usefixtures('donation', 'another_donation')
+async def test_backfill_rollups():
+    from conftest import TestingSessionLocal
+    from app.crud.donation_rollup import donation_rollup_crud
+    from app.services.rollups import backfill_rollups
+
+    processed = await backfill_rollups(TestingSessionLocal, chunk_size=1)
+    assert processed == 2
+    async with TestingSessionLocal() as session:
+        rollups = await donation_rollup_crud.get_range(
+            session, 'day', datetime(2011, 1, 1), datetime(2013, 1, 1)
+        )
+    assert [
+        (rollup.bucket_start, rollup.total_amount) for rollup in rollups
+    ] == [
+        (datetime(2011, 11, 11), 100),
+        (datetime(2012, 12, 12), 2000),
+    ], 'Бэкфилл должен агрегировать историю донатов по интервалам.'